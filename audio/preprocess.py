@@ -1,28 +1,155 @@
 import librosa, soundfile as sf
-from typing import List
+import numpy as np
+from typing import List, Iterable, Iterator, Tuple, Dict, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from settings import settings
-import math, os, shutil
+from audio.stitch import stitch_segments
+from audio.vad import iter_span_windows, stream_detect_windows, window_step
+import math, os, shutil, subprocess
 try:
     from pydub import AudioSegment  # type: ignore
 except Exception:  # pydub optional (fallback ke pure librosa splitting)
     AudioSegment = None  # type: ignore
+try:
+    import soxr  # type: ignore  # resampler streaming (dependency librosa>=0.10)
+except Exception:
+    soxr = None  # type: ignore
+
+def load_16k_mono(in_path: str) -> np.ndarray:
+    """Decode + resample sekali ke array float32 16k mono (tanpa file interim)."""
+    y, sr = librosa.load(in_path, sr=None, mono=True)
+    if sr != settings.SAMPLE_RATE:
+        y = librosa.resample(y, orig_sr=sr, target_sr=settings.SAMPLE_RATE)
+    return np.ascontiguousarray(y, dtype=np.float32)
 
 def resample_to_16k_mono(in_path: str, out_path: str):
     """Resample file ke 16k mono (librosa)"""
     # Ensure output directory exists
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    y, sr = librosa.load(in_path, sr=None, mono=True)
-    if sr != settings.SAMPLE_RATE:
-        y = librosa.resample(y, orig_sr=sr, target_sr=settings.SAMPLE_RATE)
-    sf.write(out_path, y, settings.SAMPLE_RATE)
+    sf.write(out_path, load_16k_mono(in_path), settings.SAMPLE_RATE)
+
+def iter_windows(y: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (start_sample, window) dengan window = view NumPy (zero-copy) atas `y`."""
+    sr = settings.SAMPLE_RATE
+    win = settings.WINDOW_SECONDS * sr
+    step = window_step(win, settings.AUDIO_OVERLAP_SECONDS * sr)
+    n = len(y)
+    start = 0
+    while start < n:
+        yield start, y[start:start + win]
+        start += step
+
+def _window_items(windows: Iterable[Tuple[int, np.ndarray]], base_name: str) -> Iterator[Dict[str, Any]]:
+    sr = settings.SAMPLE_RATE
+    for i, (start, view) in enumerate(windows):
+        yield {"file": f"{base_name}#{i:03d}", "offset": start / sr, "duration": len(view) / sr, "raw": view}
+
+def segment_windows(y: np.ndarray, base_name: str, spans: List[Tuple[int, int]] | None = None) -> List[Dict[str, Any]]:
+    """Window in-memory siap STT: {"file": label, "offset": detik, "duration", "raw": view}.
+
+    `spans` (sample, hasil VAD) menggantikan pemotongan fixed WINDOW_SECONDS.
+    """
+    windows = iter_windows(y) if spans is None else ((s, y[s:e]) for s, e in spans)
+    return list(_window_items(windows, base_name))
 
 def _ffmpeg_available() -> bool:
     return shutil.which("ffmpeg") is not None or shutil.which("ffmpeg.exe") is not None
 
+def can_stream(in_path: str) -> bool:
+    """True jika file bisa di-decode block-wise (ffmpeg pipe atau soundfile)."""
+    if _ffmpeg_available():
+        return True
+    try:
+        sf.info(in_path)
+        return True
+    except Exception:
+        return False
+
+def _ffmpeg_blocks(in_path: str, block_samples: int) -> Iterator[np.ndarray]:
+    # ffmpeg decode + resample + downmix incremental, output float32 LE ke stdout
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", in_path,
+           "-f", "f32le", "-ac", "1", "-ar", str(settings.SAMPLE_RATE), "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            buf = proc.stdout.read(block_samples * 4)
+            if not buf:
+                break
+            yield np.frombuffer(buf[:len(buf) - len(buf) % 4], dtype="<f4")
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg decode gagal: {proc.stderr.read().decode(errors='ignore').strip()}")
+    finally:
+        if proc.poll() is None:  # consumer berhenti lebih awal
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+def _soundfile_blocks(in_path: str, block_samples: int) -> Iterator[np.ndarray]:
+    # Fallback tanpa ffmpeg: baca block-wise + resample streaming (soxr) jika perlu
+    sr = settings.SAMPLE_RATE
+    native_sr = sf.info(in_path).samplerate
+    resampler = None
+    if native_sr != sr:
+        if soxr is None:
+            raise RuntimeError("streaming resample butuh ffmpeg atau paket soxr")
+        resampler = soxr.ResampleStream(native_sr, sr, 1, dtype="float32")
+    native_block = max(1, block_samples * native_sr // sr)
+    for block in sf.blocks(in_path, blocksize=native_block, dtype="float32", always_2d=True):
+        mono = block.mean(axis=1, dtype=np.float32)
+        yield resampler.resample_chunk(mono) if resampler is not None else mono
+    if resampler is not None:
+        tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if len(tail):
+            yield tail
+
+def stream_16k_mono(in_path: str) -> Iterator[np.ndarray]:
+    """Decode + resample incremental: yield block float32 16k mono (AUDIO_STREAM_BLOCK_SECONDS).
+
+    Memori puncak O(block), bukan O(file). Prefer ffmpeg pipe; fallback soundfile+soxr.
+    """
+    block_samples = max(1, int(settings.AUDIO_STREAM_BLOCK_SECONDS * settings.SAMPLE_RATE))
+    if _ffmpeg_available():
+        return _ffmpeg_blocks(in_path, block_samples)
+    return _soundfile_blocks(in_path, block_samples)
+
+def iter_stream_windows(blocks: Iterable[np.ndarray]) -> Iterator[Tuple[int, np.ndarray]]:
+    """Seperti `iter_windows`, tapi atas stream block: window di-yield begitu tersedia.
+
+    Buffer hanya menyimpan satu window + satu block (O(window)).
+    """
+    sr = settings.SAMPLE_RATE
+    win = settings.WINDOW_SECONDS * sr
+    step = window_step(win, settings.AUDIO_OVERLAP_SECONDS * sr)
+    buf = np.zeros(0, dtype=np.float32)
+    start = 0
+    for block in blocks:
+        buf = np.concatenate([buf, block])
+        while len(buf) >= win:
+            yield start, buf[:win]
+            start += step
+            buf = buf[step:]
+    # sisa ekor (window terakhir lebih pendek), sama dengan iter_windows
+    while len(buf) > 0:
+        yield start, buf[:win]
+        start += step
+        buf = buf[step:]
+
+def stream_segment_windows(in_path: str, base_name: str, spans: List[Tuple[int, int]] | None = None) -> Iterator[Dict[str, Any]]:
+    """Versi streaming `segment_windows`: generator window siap STT."""
+    blocks = stream_16k_mono(in_path)
+    windows = iter_stream_windows(blocks) if spans is None else iter_span_windows(blocks, spans)
+    return _window_items(windows, base_name)
+
+def stream_vad_segment_windows(in_path: str, base_name: str, report: Dict[str, Any] | None = None) -> Iterator[Dict[str, Any]]:
+    """Streaming + VAD dalam satu decode: window mengikuti batas bicara, di-yield begitu final.
+
+    `report` diisi {"spans", "total"} (sample) setelah generator habis.
+    """
+    return _window_items(stream_detect_windows(stream_16k_mono(in_path), report), base_name)
 
 def split_audio_with_overlap(path_16k: str) -> List[str]:
-    """Potong audio 16k mono menjadi window + overlap.
+    """Potong audio 16k mono menjadi window + overlap (mode debug: AUDIO_SEGMENT_TO_DISK).
 
     Fallback otomatis ke pemotongan berbasis numpy+librosa jika ffmpeg/pydub tidak tersedia.
     Output: stored in data/interim/audio_segments/ dengan naming clean
@@ -41,7 +168,7 @@ def split_audio_with_overlap(path_16k: str) -> List[str]:
         audio = AudioSegment.from_file(path_16k).set_channels(1).set_frame_rate(sr)
         win_ms = win_s * 1000
         ov_ms = ov_s * 1000
-        step = win_ms - ov_ms if win_ms > ov_ms else win_ms
+        step = window_step(win_ms, ov_ms)
         paths: List[str] = []
         i = 0
         start = 0
@@ -59,7 +186,7 @@ def split_audio_with_overlap(path_16k: str) -> List[str]:
     y, file_sr = librosa.load(path_16k, sr=sr, mono=True)
     win_samples = win_s * sr
     ov_samples = ov_s * sr
-    step = win_samples - ov_samples if win_samples > ov_samples else win_samples
+    step = window_step(win_samples, ov_samples)
     n = len(y)
     idx = 0
     start = 0
@@ -74,7 +201,7 @@ def split_audio_with_overlap(path_16k: str) -> List[str]:
         start += step
     return out_paths
 
-def transcribe_segments_parallel(chunk_paths: List[str], stt_fn, language: str | None) -> List[dict]:
+def transcribe_segments_parallel(chunk_paths: List[Any], stt_fn, language: str | None) -> List[dict]:
     """Transkripsi segmen secara paralel (ThreadPool) sampai STT_MAX_WORKERS."""
     if not chunk_paths:
         return []
@@ -87,12 +214,10 @@ def transcribe_segments_parallel(chunk_paths: List[str], stt_fn, language: str |
             try:
                 results[idx] = fut.result()
             except Exception as e:
-                results[idx] = {"file": chunk_paths[idx], "text": "", "error": str(e), "chunks": []}
+                p = chunk_paths[idx]
+                results[idx] = {"file": p["file"] if isinstance(p, dict) else p, "text": "", "error": str(e), "chunks": []}
     return results
 
 def merge_overlap_text(segments: List[dict]) -> str:
-    """Gabungkan teks segmen overlapped secara sederhana.
-
-    Saat ini: sederhana join newline. (Bisa dikembangkan: deteksi duplikasi overlap.)
-    """
-    return "\n".join([s.get("text", "").strip() for s in segments if s and s.get("text")])
+    """Gabungkan teks segmen overlapped tanpa duplikasi area overlap (lihat `audio.stitch`)."""
+    return stitch_segments(segments)[0]
@@ -0,0 +1,168 @@
+"""Stitching transkrip antar window yang overlap.
+
+Window STT saling overlap (AUDIO_OVERLAP_SECONDS) supaya kalimat di tepi window
+tidak terpotong; akibatnya kata di area overlap muncul dua kali. Modul ini
+membuang duplikasi tsb:
+
+- Timestamp tersedia (`chunks` dari pipeline HF, return_timestamps=True):
+  area overlap dibagi di titik tengahnya; chunk masuk window tempat sebagian
+  besar durasinya jatuh (titik tengah chunk sebelum titik potong). Window kanan
+  menyimpan semua chunk yang berakhir setelah audio yang sudah tercakup, lalu
+  kata kepala yang duplikat dengan ekor teks sebelumnya dibuang -> kata di
+  sekitar titik potong tidak hilang maupun dobel.
+- Timestamp tidak ada: fallback ke longest common subsequence (LCS) kata antara
+  ekor teks sebelumnya dan kepala teks berikutnya. Subsequence (bukan run kontigu)
+  supaya kata yang didengar beda oleh dua window di area overlap tidak memutus
+  kecocokan; alignment hanya diterima jika berakhir di ujung ekor dan cukup rapat.
+
+Setiap kalimat output membawa offset waktu global (detik dari awal file).
+"""
+from __future__ import annotations
+from typing import List, Dict, Any, Tuple, Optional
+import re
+
+from settings import settings
+from audio.vad import window_step
+
+# Batas jumlah kata di ekor/kepala yang dibandingkan saat fallback (overlap 2s ≈ <10 kata)
+_FALLBACK_SCAN_WORDS = 50
+_FALLBACK_MIN_MATCH = 2
+# Kata terakhir yang cocok harus <= sekian kata dari ujung ekor; minimal separuh kata
+# kepala yang dibuang harus cocok (sisanya dianggap beda dengar ASR)
+_FALLBACK_TAIL_SLACK = 2
+_FALLBACK_MIN_DENSITY = 0.5
+# Toleransi selisih timestamp antar window untuk audio yang sama (detik)
+_COVER_TOL = 0.1
+
+_NORM_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _norm(word: str) -> str:
+    return _NORM_RE.sub("", word.lower())
+
+
+def _segment_bounds(segments: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+    """(offset, end) global tiap segmen; segmen mode file tidak punya offset -> dihitung dari indeks."""
+    win = settings.WINDOW_SECONDS
+    ov = settings.AUDIO_OVERLAP_SECONDS
+    step = window_step(win, ov)
+    bounds = []
+    for i, seg in enumerate(segments):
+        seg = seg or {}
+        off = float(seg.get("offset", i * step))
+        bounds.append((off, off + float(seg.get("duration") or win)))
+    return bounds
+
+
+def _timed_chunks(seg: Dict[str, Any]) -> Optional[List[Tuple[float, Optional[float], str]]]:
+    """Chunk (start, end, text) relatif window, atau None jika timestamp tidak lengkap."""
+    chunks = seg.get("chunks") or []
+    out = []
+    for ch in chunks:
+        ts = ch.get("timestamp") or (None, None)
+        text = (ch.get("text") or "").strip()
+        if ts[0] is None:
+            return None
+        if text:
+            out.append((float(ts[0]), None if ts[1] is None else float(ts[1]), text))
+    return out or None
+
+
+def _chunk_end(timed: List[Tuple[float, Optional[float], str]], k: int, duration: float) -> float:
+    """Akhir chunk k; end None (chunk terakhir Whisper) -> awal chunk berikut / akhir window."""
+    end = timed[k][1]
+    if end is not None:
+        return end
+    return timed[k + 1][0] if k + 1 < len(timed) else max(duration, timed[k][0])
+
+
+def _lcs_pairs(a: List[str], b: List[str]) -> List[Tuple[int, int]]:
+    """Pasangan indeks (i, j) dari LCS kata a vs b; DP O(len(a)*len(b)).
+
+    Backtrack dari kanan bawah -> saat seri, pasangan dengan i terbesar (paling dekat ujung ekor) dipilih.
+    """
+    dp = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i - 1] and a[i - 1] == b[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1] + 1
+            else:
+                dp[i][j] = max(dp[i - 1][j], dp[i][j - 1])
+    pairs = []
+    i, j = len(a), len(b)
+    while i and j:
+        if a[i - 1] and a[i - 1] == b[j - 1] and dp[i][j] == dp[i - 1][j - 1] + 1:
+            pairs.append((i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif dp[i - 1][j] >= dp[i][j - 1]:
+            i -= 1
+        else:
+            j -= 1
+    return pairs[::-1]
+
+
+def _drop_text_overlap(prev_words: List[str], text: str) -> str:
+    """Buang kepala `text` yang sudah ada di ekor teks sebelumnya (fallback tanpa timestamp)."""
+    words = text.split()
+    tail = [_norm(w) for w in prev_words[-_FALLBACK_SCAN_WORDS:]]
+    head = [_norm(w) for w in words[:_FALLBACK_SCAN_WORDS]]
+    pairs = _lcs_pairs(tail, head)
+    if len(pairs) < _FALLBACK_MIN_MATCH or pairs[-1][0] < len(tail) - 1 - _FALLBACK_TAIL_SLACK:
+        return text
+    j_end = pairs[-1][1] + 1
+    if len(pairs) < _FALLBACK_MIN_DENSITY * j_end:
+        return text
+    return " ".join(words[j_end:])
+
+
+def stitch_segments(segments: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Gabungkan segmen STT tanpa duplikasi overlap.
+
+    Return (teks, kalimat) dengan kalimat = [{"start", "end", "text"}] dalam detik global.
+    """
+    # bounds dihitung sebelum filter: offset mode file bergantung pada indeks asli
+    pairs = [(s, b) for s, b in zip(segments, _segment_bounds(segments)) if s and (s.get("text") or "").strip()]
+    if not pairs:
+        return "", []
+    segs = [s for s, _ in pairs]
+    bounds = [b for _, b in pairs]
+    # Titik potong antar window = tengah area overlap (atau awal window berikut jika tidak overlap)
+    cuts = []
+    for (off, end), (nxt_off, _) in zip(bounds, bounds[1:]):
+        cuts.append((nxt_off + end) / 2 if end > nxt_off else nxt_off)
+
+    lines: List[str] = []
+    sentences: List[Dict[str, Any]] = []
+    emitted_words: List[str] = []
+    covered = float("-inf")  # akhir (detik global) audio yang teksnya sudah dikeluarkan
+    for i, seg in enumerate(segs):
+        off, end = bounds[i]
+        hi = cuts[i] if i < len(cuts) else float("inf")
+        timed = _timed_chunks(seg)
+        if timed is not None:
+            kept = []
+            for k, (s, _, t) in enumerate(timed):
+                gs, ge = off + s, off + _chunk_end(timed, k, end - off)
+                if ge <= covered + _COVER_TOL or (gs + ge) / 2 >= hi:
+                    continue  # sudah tercakup window kiri / mayoritas milik window kanan
+                if gs < covered and emitted_words:
+                    t = _drop_text_overlap(emitted_words, t)  # chunk melintasi tepi: buang kata dobel
+                    if not t:
+                        continue
+                kept.append((gs, None if timed[k][1] is None else ge, t))
+                covered = max(covered, ge)
+            for s, e, t in kept:
+                sentences.append({"start": round(s, 2), "end": None if e is None else round(e, 2), "text": t})
+            line = " ".join(t for _, _, t in kept)
+        else:
+            line = seg["text"].strip()
+            if i > 0 and bounds[i - 1][1] > off:
+                line = _drop_text_overlap(emitted_words, line)
+            if line:
+                sentences.append({"start": round(off, 2), "end": round(end, 2), "text": line})
+            covered = max(covered, end)  # disimpan utuh (termasuk overlap)
+        if line:
+            lines.append(line)
+            emitted_words.extend(line.split())
+            emitted_words = emitted_words[-_FALLBACK_SCAN_WORDS:]
+    return "\n".join(lines), sentences
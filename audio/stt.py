@@ -1,52 +1,181 @@
-from transformers import pipeline as hf_pipeline
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Tuple
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from settings import settings
-import os
+from telemetry import get_logger, span
+from audio.stt_backends import STTBackend, get_backend
+import multiprocessing as mp
+import os, time
 try:
     import torch
 except Exception:  # torch may not be installed with GPU support
     torch = None  # type: ignore
 
-_ASR_PIPELINE = None  # global cache to avoid reloading model for every batch
-
-def _select_device():
-    # Allow override via env STT_DEVICE (e.g., "cuda:0" or "cpu")
-    override = os.getenv("STT_DEVICE")
-    if override:
-        return override
-    if torch is not None and torch.cuda.is_available():
-        return 0  # HF pipeline accepts int GPU index
-    return "cpu"
-
-
-def _get_asr():
-    global _ASR_PIPELINE
-    if _ASR_PIPELINE is None:
-        device = _select_device()
-        print(f"[stt] loading model {settings.STT_MODEL} on device={device}")
-        _ASR_PIPELINE = hf_pipeline(
-            "automatic-speech-recognition",
-            model=settings.STT_MODEL,
-            chunk_length_s=None,
-            return_timestamps=True,
-            device=device,
-        )
-    return _ASR_PIPELINE
+_log = get_logger("stt")
+
+_STT_POOL: ProcessPoolExecutor | None = None  # worker STT_PROCESSES (satu model per proses)
+
+def _get_asr() -> STTBackend:
+    """Backend STT aktif (settings.STT_BACKEND), di-cache per proses."""
+    return get_backend()
+
+def _asr_input(src: Any) -> Any:
+    # Segmen = path file (mode debug) atau window in-memory {"file","offset","duration","raw"}
+    if isinstance(src, dict):
+        return {"raw": src["raw"], "sampling_rate": settings.SAMPLE_RATE}
+    return src
+
+def _to_segment(src: Any, out: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(src, dict):
+        return {"file": src["file"], "offset": src.get("offset", 0.0), "duration": src.get("duration"),
+                "text": out.get("text", ""), "chunks": out.get("chunks")}
+    return {"file": src, "text": out.get("text", ""), "chunks": out.get("chunks")}
+
+def _error_segment(src: Any, err: Exception) -> Dict[str, Any]:
+    seg = _to_segment(src, {"text": ""})
+    seg.update({"error": str(err), "chunks": []})
+    return seg
+
+def stt_one(src: Any, language: str | None = None) -> Dict[str, Any]:
+    """Transcribe satu segmen (path / window in-memory) dengan pipeline cache."""
+    return _to_segment(src, _get_asr().transcribe([_asr_input(src)], language)[0])
+
+def stt_batch(inputs: Iterable[Any], language: str | None = None, batch_size: int | None = None) -> List[Dict[str, Any]]:
+    """Transcribe banyak segmen sekaligus: N window di-stack jadi satu tensor fitur
+    lalu di-decode dalam satu panggilan generate per batch.
+
+    Whisper selalu mem-pad fitur ke 30s, jadi teks & timestamp per segmen sama
+    dengan mode per-file. Jika satu batch gagal, batch tsb diulang per segmen
+    supaya error hanya menandai segmen yang rusak (format sama dgn mode thread).
+
+    `inputs` boleh generator (mode streaming): batch diambil lazily sehingga STT
+    mulai sebelum decode selesai dan hanya satu batch window yang ditahan di RAM.
+    """
+    bs = max(1, batch_size or settings.STT_BATCH_SIZE)
+    results: List[Dict[str, Any]] = []
+    it = iter(inputs)
+    start = 0
+    while True:
+        group = list(islice(it, bs))
+        if not group:
+            break
+        asr = _get_asr()
+        audio_s = sum(src.get("duration") or 0.0 for src in group if isinstance(src, dict))
+        try:
+            with span("stt.batch", segments=len(group), audio_s=audio_s):
+                outs = asr.transcribe([_asr_input(src) for src in group], language)
+            results.extend(_to_segment(src, o) for src, o in zip(group, outs))
+        except Exception as e:
+            _log.warning(f"batch {start}-{start + len(group) - 1} gagal ({e}) -> fallback per segmen")
+            for src in group:
+                try:
+                    results.append(stt_one(src, language))
+                except Exception as e1:
+                    results.append(_error_segment(src, e1))
+        start += len(group)
+    return results
 
 def stt_batch_30s(chunk_paths: List[str], language: str | None = None) -> List[Dict[str, Any]]:
     """Transcribe list of 30s audio chunk paths.
 
-    Caches underlying HF pipeline for performance.
+    Caches underlying HF pipeline for performance; segments are decoded in
+    batches of STT_BATCH_SIZE.
+    """
+    return stt_batch(chunk_paths, language)
+
+def _worker_threads() -> int:
+    if settings.STT_THREADS_PER_PROCESS > 0:
+        return settings.STT_THREADS_PER_PROCESS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.STT_PROCESSES))
+
+def _worker_init(threads: int) -> None:
+    # Tiap worker: batasi intra-op threads torch lalu load model sekali
+    if torch is not None:
+        torch.set_num_threads(threads)
+    _get_asr()
+
+def _worker_transcribe(items: List[Any], language: str | None) -> Tuple[int, float, List[Dict[str, Any]]]:
+    t0 = time.perf_counter()
+    out = stt_batch(items, language, batch_size=len(items))
+    return os.getpid(), time.perf_counter() - t0, out
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _STT_POOL
+    if _STT_POOL is None:
+        procs = max(1, settings.STT_PROCESSES)
+        threads = _worker_threads()
+        _log.info(f"starting {procs} worker process(es), torch threads/worker={threads}")
+        # spawn: aman untuk torch (fork setelah torch init bisa deadlock)
+        _STT_POOL = ProcessPoolExecutor(max_workers=procs, mp_context=mp.get_context("spawn"),
+                                        initializer=_worker_init, initargs=(threads,))
+    return _STT_POOL
+
+def shutdown_stt_pool() -> None:
+    global _STT_POOL
+    if _STT_POOL is not None:
+        _STT_POOL.shutdown(wait=True, cancel_futures=True)
+        _STT_POOL = None
+
+def stt_multiprocess(inputs: Iterable[Any], language: str | None = None) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, float]]]:
+    """Transkripsi di STT_PROCESSES proses worker (satu model Whisper per proses).
+
+    Batch STT_BATCH_SIZE window dikirim ke call queue bersama executor; worker yang
+    idle mengambil batch berikutnya. In-flight dibatasi 2x jumlah worker supaya
+    generator streaming tetap O(window). Hasil dikembalikan urut input bersama
+    statistik per worker: {pid: {"batches", "segments", "seconds"}}.
+    """
+    pool = _get_pool()
+    bs = max(1, settings.STT_BATCH_SIZE)
+    max_inflight = 2 * max(1, settings.STT_PROCESSES)
+    it = iter(inputs)
+    inflight: deque = deque()
+    results: List[Dict[str, Any]] = []
+    stats: Dict[int, Dict[str, float]] = {}
+
+    def _collect(fut, group) -> None:
+        try:
+            pid, secs, out = fut.result()
+        except BrokenProcessPool as e:
+            shutdown_stt_pool()  # pool rusak (mis. OOM) -> dibuat ulang di panggilan berikut
+            results.extend(_error_segment(src, e) for src in group)
+            return
+        except Exception as e:
+            results.extend(_error_segment(src, e) for src in group)
+            return
+        st = stats.setdefault(pid, {"batches": 0, "segments": 0, "seconds": 0.0})
+        st["batches"] += 1; st["segments"] += len(out); st["seconds"] = round(st["seconds"] + secs, 3)
+        results.extend(out)
+
+    while True:
+        group = list(islice(it, bs))
+        if group:
+            inflight.append((_get_pool().submit(_worker_transcribe, group, language), group))
+        if inflight and (len(inflight) >= max_inflight or not group):
+            _collect(*inflight.popleft())
+        if not group and not inflight:
+            break
+    return results, stats
+
+def transcribe_segments(chunk_paths: Iterable[Any], language: str | None = None,
+                        stats: Dict[int, Dict[str, float]] | None = None) -> List[Dict[str, Any]]:
+    """Pilih mode transkripsi: proses worker (STT_PROCESSES > 1), batched
+    (STT_BATCH_SIZE > 1) atau ThreadPool per segmen.
+
+    Segmen boleh berupa path file, window in-memory dari `segment_windows`, atau
+    generator `stream_segment_windows` (selalu diproses lazily lewat `stt_batch`).
+    `stats` (opsional) diisi timing per worker pada mode multi-proses.
     """
-    asr = _get_asr()
-    outs = []
-    for p in chunk_paths:
-        if language:
-            o = asr(p, generate_kwargs={"language": language})
-        else:
-            o = asr(p)
-        outs.append({"file": p, "text": o.get("text", ""), "chunks": o.get("chunks")})
-    return outs
+    if settings.STT_PROCESSES > 1:
+        results, worker_stats = stt_multiprocess(chunk_paths, language)
+        if stats is not None:
+            stats.update(worker_stats)
+        return results
+    if settings.STT_BATCH_SIZE > 1 or not isinstance(chunk_paths, list):
+        return stt_batch(chunk_paths, language)
+    from audio.preprocess import transcribe_segments_parallel
+    return transcribe_segments_parallel(chunk_paths, stt_one, language)
 
 def merge_text(segments: List[Dict[str, Any]]) -> str:
     return "\n".join([s.get("text", "").strip() for s in segments if s.get("text")])
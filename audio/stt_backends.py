@@ -0,0 +1,140 @@
+"""Backend STT yang bisa dipilih lewat `settings.STT_BACKEND`.
+
+Semua backend mengembalikan format yang sama dengan pipeline HF
+`automatic-speech-recognition` (return_timestamps=True):
+    {"text": str, "chunks": [{"text": str, "timestamp": (start, end)}]}
+sehingga `node_stt`, stitching, dan worker multi-proses tidak perlu tahu
+backend mana yang aktif.
+
+Backend bawaan:
+- "hf"      : pipeline transformers float32 (perilaku lama).
+- "hf_int8" : model yang sama, layer Linear di-quantize dinamis ke int8 (CPU).
+- "onnx"    : export ONNX Runtime via optimum (opsional, jika terinstall).
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Type
+import os, threading
+
+from transformers import pipeline as hf_pipeline
+from settings import settings
+from telemetry import get_logger
+try:
+    import torch
+except Exception:  # torch may not be installed with GPU support
+    torch = None  # type: ignore
+
+_log = get_logger("stt")
+
+
+def _select_device():
+    # Allow override via env STT_DEVICE (e.g., "cuda:0" or "cpu")
+    override = os.getenv("STT_DEVICE")
+    if override:
+        return override
+    if torch is not None and torch.cuda.is_available():
+        return 0  # HF pipeline accepts int GPU index
+    return "cpu"
+
+
+class STTBackend(ABC):
+    """Interface backend STT: batch input pipeline HF -> list output format HF."""
+
+    name: str = ""
+
+    @abstractmethod
+    def transcribe(self, inputs: List[Any], language: str | None = None) -> List[Dict[str, Any]]:
+        """`inputs`: path file atau {"raw": float32 16k, "sampling_rate"}; satu batch."""
+
+
+class HFPipelineBackend(STTBackend):
+    name = "hf"
+
+    def __init__(self, device=None):
+        device = _select_device() if device is None else device
+        _log.info(f"loading model {settings.STT_MODEL} on device={device} (backend={self.name})")
+        self.pipe = hf_pipeline(
+            "automatic-speech-recognition",
+            model=settings.STT_MODEL,
+            chunk_length_s=None,
+            return_timestamps=True,
+            device=device,
+        )
+
+    def transcribe(self, inputs: List[Any], language: str | None = None) -> List[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {"generate_kwargs": {"language": language}} if language else {}
+        if len(inputs) == 1:
+            return [self.pipe(inputs[0], **kwargs)]
+        return list(self.pipe(list(inputs), batch_size=len(inputs), **kwargs))
+
+
+class HFInt8Backend(HFPipelineBackend):
+    """Pipeline HF dengan quantization dinamis int8 (torch) untuk node CPU-only."""
+
+    name = "hf_int8"
+
+    def __init__(self):
+        if torch is None:
+            raise RuntimeError("backend hf_int8 butuh torch")
+        super().__init__(device="cpu")  # quantized kernels hanya CPU
+        self.pipe.model = torch.quantization.quantize_dynamic(
+            self.pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+class ONNXBackend(HFPipelineBackend):
+    """Whisper di-export ke ONNX Runtime (optimum[onnxruntime])."""
+
+    name = "onnx"
+
+    def __init__(self):
+        try:
+            from optimum.onnxruntime import ORTModelForSpeechSeq2Seq  # type: ignore
+            from transformers import AutoProcessor
+        except Exception as e:
+            raise RuntimeError("backend onnx butuh paket optimum[onnxruntime]") from e
+        _log.info(f"loading model {settings.STT_MODEL} (backend={self.name}, export ONNX)")
+        processor = AutoProcessor.from_pretrained(settings.STT_MODEL)
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(settings.STT_MODEL, export=True)
+        self.pipe = hf_pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            chunk_length_s=None,
+            return_timestamps=True,
+        )
+
+
+_BACKENDS: Dict[str, Type[STTBackend]] = {
+    HFPipelineBackend.name: HFPipelineBackend,
+    HFInt8Backend.name: HFInt8Backend,
+    ONNXBackend.name: ONNXBackend,
+}
+_INSTANCES: Dict[str, STTBackend] = {}  # cache per proses: model di-load sekali per backend
+_lock = threading.Lock()
+
+
+def register_backend(name: str, cls: Type[STTBackend]) -> None:
+    _BACKENDS[name] = cls
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def release_backends() -> None:
+    """Teardown: lepas semua model STT yang sudah di-load di proses ini."""
+    with _lock:
+        _INSTANCES.clear()
+
+
+def get_backend(name: str | None = None) -> STTBackend:
+    name = name or settings.STT_BACKEND
+    if name not in _INSTANCES:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unsupported STT backend: {name} (available: {available_backends()})")
+        with _lock:
+            if name not in _INSTANCES:
+                _INSTANCES[name] = _BACKENDS[name]()
+    return _INSTANCES[name]
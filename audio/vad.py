@@ -0,0 +1,253 @@
+"""Voice activity detection (energi, NumPy) sebelum STT.
+
+Window STT tidak lagi dipotong buta tiap 30s: region bicara dideteksi dulu,
+digabung menjadi window <= WINDOW_SECONDS yang batasnya jatuh di jeda/diam,
+dan bagian diam / dead air tidak dikirim ke Whisper sama sekali.
+
+Mode streaming (`stream_detect_windows`) menghitung energi frame di decode yang
+sama dengan STT: window di-yield begitu tidak bisa berubah lagi, jadi file hanya
+di-decode sekali dan STT mulai setelah VAD_WARMUP_SECONDS, bukan setelah satu pass penuh.
+"""
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Tuple, Dict, Any
+import numpy as np
+
+from settings import settings
+
+Span = Tuple[int, int]  # (start_sample, end_sample)
+
+
+def _frame_samples() -> int:
+    return max(1, settings.SAMPLE_RATE * settings.VAD_FRAME_MS // 1000)
+
+
+def _iter_frame_db(blocks: Iterable[np.ndarray]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(block, dB frame yang lengkap s/d block ini); frame parsial terakhir di-yield dengan block kosong."""
+    frame = _frame_samples()
+    carry = np.zeros(0, dtype=np.float32)
+    empty = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        buf = np.concatenate([carry, block]) if len(carry) else block
+        n = len(buf) // frame
+        yield block, (_rms_db(buf[:n * frame].reshape(n, frame)) if n else empty)
+        carry = buf[n * frame:]
+    if len(carry):
+        yield empty, _rms_db(carry.reshape(1, -1))
+
+
+def frame_db(blocks: Iterable[np.ndarray]) -> Tuple[np.ndarray, int]:
+    """Energi RMS (dBFS) per frame VAD_FRAME_MS atas stream block.
+
+    Return (db per frame, total sample). Memori O(block + jumlah frame).
+    """
+    dbs: List[np.ndarray] = []
+    total = 0
+    for block, db in _iter_frame_db(blocks):
+        total += len(block)
+        dbs.append(db)
+    return (np.concatenate(dbs) if dbs else np.zeros(0, dtype=np.float32)), total
+
+
+def _rms_db(frames: np.ndarray) -> np.ndarray:
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Index [start, end) untuk setiap run True di mask."""
+    if not mask.any():
+        return []
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return [(int(a), int(b)) for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+
+
+def _noise_floor(dbs: np.ndarray) -> float:
+    return float(np.percentile(dbs, 10))
+
+
+def _threshold(floor: float) -> float:
+    """Threshold adaptif: noise floor + VAD_MARGIN_DB, minimal VAD_MIN_DB."""
+    return max(settings.VAD_MIN_DB, floor + settings.VAD_MARGIN_DB)
+
+
+def speech_regions(dbs: np.ndarray, total_samples: int) -> List[Span]:
+    """Region bicara (sample) dari energi per frame (noise floor = persentil 10 semua frame)."""
+    if not len(dbs):
+        return []
+    return mask_regions(dbs > _threshold(_noise_floor(dbs)), total_samples)
+
+
+def mask_regions(mask: np.ndarray, total_samples: int) -> List[Span]:
+    """Region bicara (sample) dari mask bicara per frame.
+
+    Jeda < VAD_MIN_SILENCE_MS digabung, bicara < VAD_MIN_SPEECH_MS dibuang,
+    lalu tiap region diberi padding VAD_PAD_MS.
+    """
+    frame = _frame_samples()
+    runs = _runs(mask)
+
+    min_gap = settings.VAD_MIN_SILENCE_MS // settings.VAD_FRAME_MS
+    merged: List[List[int]] = []
+    for a, b in runs:
+        if merged and a - merged[-1][1] < min_gap:
+            merged[-1][1] = b
+        else:
+            merged.append([a, b])
+
+    min_len = settings.VAD_MIN_SPEECH_MS // settings.VAD_FRAME_MS
+    pad = settings.SAMPLE_RATE * settings.VAD_PAD_MS // 1000
+    out: List[Span] = []
+    for a, b in merged:
+        if b - a < min_len:
+            continue
+        s, e = max(0, a * frame - pad), min(total_samples, b * frame + pad)
+        if out and s <= out[-1][1]:
+            out[-1] = (out[-1][0], e)
+        else:
+            out.append((s, e))
+    return out
+
+
+def window_step(win: int, ov: int) -> int:
+    """Jarak antar awal window fixed (win - overlap); overlap >= window -> tanpa overlap."""
+    return win - ov if win > ov else win
+
+
+def plan_windows(regions: List[Span]) -> List[Span]:
+    """Gabung region bicara berurutan jadi window <= WINDOW_SECONDS mengikuti batas bicara.
+
+    Region yang lebih panjang dari satu window dipecah fixed dengan overlap
+    AUDIO_OVERLAP_SECONDS (di-stitch seperti biasa).
+    """
+    sr = settings.SAMPLE_RATE
+    win = settings.WINDOW_SECONDS * sr
+    ov = settings.AUDIO_OVERLAP_SECONDS * sr
+    step = window_step(win, ov)
+    windows: List[Span] = []
+    cur: List[int] | None = None
+    for s, e in regions:
+        if cur is not None and e - cur[0] <= win:
+            cur[1] = e
+            continue
+        if cur is not None:
+            windows.append((cur[0], cur[1]))
+            cur = None
+        if e - s <= win:
+            cur = [s, e]
+            continue
+        start = s
+        while start + win < e:
+            windows.append((start, start + win))
+            start += step
+        cur = [start, e]
+    if cur is not None:
+        windows.append((cur[0], cur[1]))
+    return windows
+
+
+def detect_windows(blocks: Iterable[np.ndarray]) -> Tuple[List[Span], int]:
+    """VAD satu pass atas stream block -> (window span, total sample)."""
+    dbs, total = frame_db(blocks)
+    return plan_windows(speech_regions(dbs, total)), total
+
+
+def stream_detect_windows(blocks: Iterable[np.ndarray],
+                          report: Dict[str, Any] | None = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """VAD + potong window dalam satu pass stream -> (start_sample, window), urut.
+
+    Mask bicara per frame diputuskan sekali saat frame terlihat. Noise floor = minimum
+    persentil 10 frame sejauh ini (bagian yang penuh bicara tidak menaikkannya);
+    VAD_WARMUP_SECONDS pertama ditahan agar estimasi awal stabil. Region &
+    window direncanakan ulang atas mask prefix (satu nilai per frame, murah); window
+    yang tidak bisa berubah lagi langsung di-yield: semua kecuali window terakhir, dan
+    window terakhir begitu frontier cukup jauh darinya. Buffer sample O(window + margin).
+    File <= VAD_WARMUP_SECONDS memberi hasil sama persis dengan `detect_windows`.
+    `report` diisi {"spans", "total"} setelah stream habis.
+    """
+    sr = settings.SAMPLE_RATE
+    frame = _frame_samples()
+    win = settings.WINDOW_SECONDS * sr
+    warmup = int(settings.VAD_WARMUP_SECONDS * sr)
+    # sample terakhir yang masih bisa disentuh region/window baru (run terbuka + jeda + padding)
+    margin = (settings.VAD_MIN_SILENCE_MS + settings.VAD_MIN_SPEECH_MS) * sr // 1000 + frame \
+        + 2 * (sr * settings.VAD_PAD_MS // 1000)
+    dbs = np.zeros(0, dtype=np.float32)
+    mask = np.zeros(0, dtype=bool)
+    buf = np.zeros(0, dtype=np.float32)
+    buf_start = total = emitted = 0
+    floor = float("inf")
+    windows: List[Span] = []
+    done = False
+    it = _iter_frame_db(blocks)
+    while not done:
+        try:
+            block, db = next(it)
+        except StopIteration:
+            done = True
+        else:
+            total += len(block)
+            buf = np.concatenate([buf, block]) if len(buf) else block
+            dbs = np.concatenate([dbs, db])
+            if total < warmup or not len(db):
+                continue
+        if len(dbs) > len(mask):
+            floor = min(floor, _noise_floor(dbs))
+            mask = np.concatenate([mask, dbs[len(mask):] > _threshold(floor)])
+        windows = plan_windows(mask_regions(mask, total))
+        final = len(windows)
+        if not done and windows:
+            s, e = windows[-1]
+            final -= max(s + win, e) >= total - margin
+        for s, e in windows[emitted:final]:
+            yield s, buf[s - buf_start:e - buf_start]
+        emitted = max(emitted, final)
+        keep_from = windows[emitted][0] if emitted < len(windows) else max(0, total - margin)
+        drop = min(len(buf), max(0, keep_from - buf_start))
+        if drop:
+            buf = buf[drop:]
+            buf_start += drop
+    if report is not None:
+        report.update(spans=windows, total=total)
+
+
+def iter_span_windows(blocks: Iterable[np.ndarray], spans: List[Span]) -> Iterator[Tuple[int, np.ndarray]]:
+    """Potong stream block sesuai span (urut start) -> (start_sample, window).
+
+    Buffer hanya menahan sample dari span aktif (O(window)).
+    """
+    pending = list(spans)
+    buf = np.zeros(0, dtype=np.float32)
+    buf_start = 0
+    for block in blocks:
+        buf = np.concatenate([buf, block])
+        while pending and pending[0][1] <= buf_start + len(buf):
+            s, e = pending.pop(0)
+            yield s, buf[s - buf_start:e - buf_start]
+        # buang sample sebelum span berikutnya
+        keep_from = pending[0][0] if pending else buf_start + len(buf)
+        drop = min(len(buf), max(0, keep_from - buf_start))
+        if drop:
+            buf = buf[drop:]
+            buf_start += drop
+        if not pending:
+            return
+    for s, e in pending:  # stream lebih pendek dari perkiraan
+        if s - buf_start < len(buf):
+            yield s, buf[s - buf_start:e - buf_start]
+
+
+def vad_report(spans: List[Span], total_samples: int) -> Dict[str, Any]:
+    sr = settings.SAMPLE_RATE
+    # union span (window hasil split region panjang saling overlap)
+    kept, covered_to = 0, 0
+    for s, e in spans:
+        s = max(s, covered_to)
+        if e > s:
+            kept += e - s
+            covered_to = e
+    return {
+        "total_seconds": round(total_samples / sr, 2),
+        "speech_seconds": round(kept / sr, 2),
+        "skipped_seconds": round(max(0, total_samples - kept) / sr, 2),
+        "windows": len(spans),
+    }
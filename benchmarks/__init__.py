@@ -0,0 +1,6 @@
+"""Harness benchmark end-to-end (lihat scripts/bench_pipeline.py).
+
+- `fixtures`: audio sintetis deterministik (burst "bicara" + jeda) dengan durasi bebas.
+- `fakes`: pengganti lokal untuk semua backend (STT, embedding, LLM, Neo4j)
+  supaya graph bisa diukur tanpa GPU, server DB, maupun API key.
+"""
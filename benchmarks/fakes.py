@@ -0,0 +1,195 @@
+"""Pengganti lokal backend untuk benchmark.
+
+Biaya komputasi/jaringan bisa disimulasikan (`rtf`, `latency`) supaya efek
+optimasi scheduling (batching, konkurensi, overlap stage) tetap terlihat.
+
+Pakai `install_fakes(...)` SETELAH settings diarahkan ke resource lokal
+(QDRANT_URL=":memory:", PG_URL=sqlite, lihat scripts/bench_pipeline.py).
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import asyncio, hashlib, re, time
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from audio.stt_backends import STTBackend, register_backend
+from models.schemas import ExtractionResult, Triple
+from settings import settings
+
+_VOCAB = ("the data pipeline stores audio chunks in qdrant while neo4j keeps entity relations "
+          "and postgres tracks every document so retrieval stays fast and grounded um uh").split()
+_FILLER_RE = re.compile(r"\b(um|uh)\b\s*", re.IGNORECASE)
+
+
+# ---------- STT ----------
+class FakeSTTBackend(STTBackend):
+    """Teks deterministik ~2.5 kata/detik + timestamp per kalimat; `rtf` = detik compute per detik audio."""
+
+    name = "fake"
+    rtf = 0.0
+
+    def transcribe(self, inputs: List[Any], language: str | None = None) -> List[Dict[str, Any]]:
+        outs = []
+        for x in inputs:
+            dur = len(x["raw"]) / x["sampling_rate"] if isinstance(x, dict) else 30.0
+            n_words = max(1, int(dur * 2.5))
+            seed = int(hashlib.md5(np.asarray(x["raw"][:4096]).tobytes()).hexdigest()[:8], 16) if isinstance(x, dict) else 0
+            words = [_VOCAB[(seed + i * 7) % len(_VOCAB)] for i in range(n_words)]
+            chunks, step = [], 8
+            for i in range(0, n_words, step):
+                part = words[i:i + step]
+                start = dur * i / n_words
+                end = dur * min(n_words, i + step) / n_words
+                chunks.append({"text": " " + " ".join(part) + ".", "timestamp": (round(start, 2), round(end, 2))})
+            if self.rtf:
+                time.sleep(dur * self.rtf)
+            outs.append({"text": "".join(c["text"] for c in chunks), "chunks": chunks})
+        return outs
+
+
+# ---------- Embedding ----------
+class FakeEmbeddingEngine:
+    """Vektor unit deterministik dari hash teks (interface sama dengan EmbeddingEngine)."""
+
+    def __init__(self, dim: int | None = None, seconds_per_text: float = 0.0):
+        self.dim = dim or settings.EMBED_DIM
+        self.seconds_per_text = seconds_per_text
+
+    def embed(self, texts) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            rng = np.random.default_rng(int(hashlib.sha1(t.encode("utf-8")).hexdigest()[:8], 16))
+            v = rng.standard_normal(self.dim).astype(np.float32)
+            out[i] = v / np.linalg.norm(v)
+        if self.seconds_per_text:
+            time.sleep(len(texts) * self.seconds_per_text)
+        return out
+
+
+# ---------- LLM ----------
+def _fake_clean(payload: Dict[str, Any]) -> str:
+    text = _FILLER_RE.sub("", payload["raw"]).strip()
+    return ". ".join(s.strip().capitalize() for s in text.split(".") if s.strip()) + "."
+
+
+def _fake_extract(payload: Dict[str, Any]) -> ExtractionResult:
+    words = [w.strip(".,").lower() for w in payload["chunk"].split() if len(w.strip(".,")) > 5]
+    uniq = list(dict.fromkeys(words))
+    triples = [Triple(s=a, p="related_to", o=b, confidence=0.9) for a, b in zip(uniq, uniq[1:4])]
+    return ExtractionResult(triples=triples)
+
+
+def fake_chain(fn, latency: float = 0.0):
+    """Runnable sync+async; `latency` = detik per request (simulasi round-trip API)."""
+    def _sync(p):
+        if latency:
+            time.sleep(latency)
+        return fn(p)
+
+    async def _async(p):
+        if latency:
+            await asyncio.sleep(latency)
+        return fn(p)
+
+    return RunnableLambda(_sync, afunc=_async)
+
+
+# ---------- Neo4j ----------
+class FakeGraph:
+    def __init__(self):
+        self.nodes: set = set()
+        self.rels: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def merge(self, row: Dict[str, Any]) -> None:
+        self.nodes.update((row["s"], row["o"]))
+        rel = self.rels.setdefault((row["s"], row["p"], row["o"]),
+                                   {"doc_ids": [], "chunk_ids": [], "confidence": 0.0})
+        if row["doc_id"] not in rel["doc_ids"]:
+            rel["doc_ids"].append(row["doc_id"])
+        if row["chunk_id"] not in rel["chunk_ids"]:
+            rel["chunk_ids"].append(row["chunk_id"])
+        rel["confidence"] = max(rel["confidence"], row["confidence"])
+
+    def drop_chunks(self, doc_id: str, stale_ids, live_ids) -> None:
+        stale, live = set(stale_ids), set(live_ids)
+        for key, rel in list(self.rels.items()):
+            if not stale.intersection(rel["chunk_ids"]):
+                continue
+            rel["chunk_ids"] = [c for c in rel["chunk_ids"] if c not in stale]
+            if not live.intersection(rel["chunk_ids"]):
+                rel["doc_ids"] = [d for d in rel["doc_ids"] if d != doc_id]
+            if not rel["chunk_ids"]:
+                del self.rels[key]
+
+
+class _Result:
+    def consume(self):
+        return None
+
+
+class _Tx:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def run(self, query: str, **params):
+        if "stale_ids" in params:
+            self.graph.drop_chunks(params["doc_id"], params["stale_ids"], params["live_ids"])
+            return _Result()
+        for row in params.get("rows") or ([params] if "s" in params else []):
+            self.graph.merge(row)
+        return _Result()
+
+
+class _Session:
+    def __init__(self, graph: FakeGraph):
+        self.tx = _Tx(graph)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query: str, **params):
+        return self.tx.run(query, **params)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self.tx, *args, **kwargs)
+
+
+class FakeNeo4jDriver:
+    """Driver in-process: cukup untuk NEO4J_MERGE_BATCH, NEO4J_DROP_CHUNKS + constraint."""
+
+    def __init__(self):
+        self.graph = FakeGraph()
+
+    def session(self, **kwargs):
+        return _Session(self.graph)
+
+    def close(self):
+        pass
+
+
+# ---------- install ----------
+def install_fakes(*, stt: bool = True, embed: bool = True, llm: bool = True, neo4j: bool = True,
+                  stt_rtf: float = 0.0, embed_seconds_per_text: float = 0.0, llm_latency: float = 0.0) -> Dict[str, Any]:
+    """Pasang fake ke registry proses; return handle (mis. graph Neo4j untuk verifikasi)."""
+    handles: Dict[str, Any] = {}
+    if stt:
+        FakeSTTBackend.rtf = stt_rtf
+        register_backend(FakeSTTBackend.name, FakeSTTBackend)
+        settings.STT_BACKEND = FakeSTTBackend.name
+    if embed:
+        from embeddings import text_embed
+        text_embed._engine = FakeEmbeddingEngine(settings.EMBED_DIM, embed_seconds_per_text)
+    if llm:
+        from llm import cache as llm_cache
+        clean = fake_chain(_fake_clean, llm_latency)
+        for name, chain in (("clean", clean), ("clean_window", clean),
+                            ("extract", fake_chain(_fake_extract, llm_latency))):
+            llm_cache.pin_chain(name, chain)
+    if neo4j:
+        from db import neo4j_store
+        neo4j_store._driver = handles["neo4j"] = FakeNeo4jDriver()
+    return handles
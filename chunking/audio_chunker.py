@@ -1,42 +1,25 @@
 from __future__ import annotations
 from typing import List
-from datetime import datetime, timezone
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-DEFAULT_AUDIO_CHUNK_SIZE = 1200  # chars
+from .engine import AUDIO_SEPARATORS, TokenSpec, base_meta, resolve_spec, to_documents
+
+DEFAULT_AUDIO_CHUNK_SIZE = 1200  # chars (mode karakter: default, atau chunk_size eksplisit)
 DEFAULT_AUDIO_CHUNK_OVERLAP = 180
 
 
 def chunk_audio(transcript: str, *, doc_id: str, file_name: str, language: str = "auto",
-                chunk_size: int = DEFAULT_AUDIO_CHUNK_SIZE,
-                chunk_overlap: int = DEFAULT_AUDIO_CHUNK_OVERLAP) -> List[Document]:
+                chunk_size: int | None = None,
+                chunk_overlap: int | None = None,
+                max_tokens: int | None = None, overlap_tokens: int | None = None) -> List[Document]:
     """Chunk ASR transcript.
 
-    Strategy: character recursive splitter tuned for conversational text.
+    Strategy: recursive splitter tuned for conversational text, ukuran dalam karakter
+    (default / `chunk_size`) atau token tokenizer EMBED_MODEL (`max_tokens` / CHUNK_MAX_TOKENS > 0),
+    lihat chunking/engine.py.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-    parts = splitter.split_text(transcript)
-    now = datetime.now(timezone.utc).isoformat()
-    docs: List[Document] = []
-    for i, txt in enumerate(parts):
-        docs.append(
-            Document(
-                page_content=txt,
-                metadata={
-                    "chunk_id": f"ch_{doc_id}_a_{i+1:03d}",
-                    "doc_id": doc_id,
-                    "file": file_name,
-                    "source": "audio_ingestion",
-                    "language": language,
-                    "role_restriction": ["public_read"],
-                    "created_at": now,
-                    "strategy": "audio_recursive_char",
-                },
-            )
-        )
-    return docs
+    spec = resolve_spec(chunk_size, chunk_overlap, AUDIO_SEPARATORS, max_tokens, overlap_tokens,
+                        default_size=DEFAULT_AUDIO_CHUNK_SIZE, default_overlap=DEFAULT_AUDIO_CHUNK_OVERLAP)
+    meta = base_meta(doc_id=doc_id, file_name=file_name, source="audio_ingestion", language=language,
+                     strategy="audio_recursive_token" if isinstance(spec, TokenSpec) else "audio_recursive_char")
+    return to_documents(transcript, spec, meta, id_prefix=f"ch_{doc_id}_a_")
@@ -2,7 +2,8 @@ from __future__ import annotations
 """Chunking strategy dispatcher for different modalities.
 
 Provides a single function `dispatch_chunk` that selects the correct
-chunking implementation based on modality.
+chunking implementation based on modality (strategy "recursive"), or the
+modality-agnostic topic-boundary chunker (strategy "semantic").
 
 This decouples graph node logic from concrete strategy modules.
 """
@@ -13,11 +14,19 @@ from .audio_chunker import chunk_audio
 from .document_chunker import chunk_document
 from .image_chunker import chunk_image
 from .video_chunker import chunk_video
+from .semantic_chunker import chunk_semantic
 
 Modality = Literal["audio", "document", "image", "video"]
+Strategy = Literal["recursive", "semantic"]
 
 
-def dispatch_chunk(*, modality: Modality, raw_text: str, doc_id: str, file_name: str, language: str = "auto") -> List[Document]:
+def dispatch_chunk(*, modality: Modality, raw_text: str, doc_id: str, file_name: str, language: str = "auto",
+                   strategy: Strategy = "recursive") -> List[Document]:
+    if strategy == "semantic":
+        return chunk_semantic(raw_text, doc_id=doc_id, file_name=file_name, language=language,
+                              source=f"{modality}_ingestion")
+    if strategy != "recursive":
+        raise ValueError(f"Unsupported chunk strategy: {strategy}")
     if modality == "audio":
         return chunk_audio(raw_text, doc_id=doc_id, file_name=file_name, language=language)
     if modality == "document":
@@ -1,40 +1,22 @@
 from __future__ import annotations
 from typing import List
-from datetime import datetime, timezone
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-DEFAULT_DOC_CHUNK_SIZE = 1600
+from .engine import DOCUMENT_SEPARATORS, TokenSpec, base_meta, resolve_spec, to_documents
+
+DEFAULT_DOC_CHUNK_SIZE = 1600  # chars (mode karakter: default, atau chunk_size eksplisit)
 DEFAULT_DOC_CHUNK_OVERLAP = 200
 
 # For documents we often want to bias toward paragraph & sentence boundaries first.
+# `text` boleh juga file teks terbuka / iterable str -> mode karakter diproses streaming (memori terbatas).
 
 
-def chunk_document(text: str, *, doc_id: str, file_name: str, language: str = "auto",
-                   chunk_size: int = DEFAULT_DOC_CHUNK_SIZE,
-                   chunk_overlap: int = DEFAULT_DOC_CHUNK_OVERLAP) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""],
-    )
-    parts = splitter.split_text(text)
-    now = datetime.now(timezone.utc).isoformat()
-    docs: List[Document] = []
-    for i, p in enumerate(parts):
-        docs.append(
-            Document(
-                page_content=p,
-                metadata={
-                    "chunk_id": f"ch_{doc_id}_d_{i+1:03d}",
-                    "doc_id": doc_id,
-                    "file": file_name,
-                    "source": "document_ingestion",
-                    "language": language,
-                    "role_restriction": ["public_read"],
-                    "created_at": now,
-                    "strategy": "document_recursive_char",
-                },
-            )
-        )
-    return docs
+def chunk_document(text, *, doc_id: str, file_name: str, language: str = "auto",
+                   chunk_size: int | None = None,
+                   chunk_overlap: int | None = None,
+                   max_tokens: int | None = None, overlap_tokens: int | None = None) -> List[Document]:
+    spec = resolve_spec(chunk_size, chunk_overlap, DOCUMENT_SEPARATORS, max_tokens, overlap_tokens,
+                        default_size=DEFAULT_DOC_CHUNK_SIZE, default_overlap=DEFAULT_DOC_CHUNK_OVERLAP)
+    meta = base_meta(doc_id=doc_id, file_name=file_name, source="document_ingestion", language=language,
+                     strategy="document_recursive_token" if isinstance(spec, TokenSpec) else "document_recursive_char")
+    return to_documents(text, spec, meta, id_prefix=f"ch_{doc_id}_d_")
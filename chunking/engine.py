@@ -0,0 +1,335 @@
+"""Engine chunking berbasis offset (pengganti RecursiveCharacterTextSplitter per panggilan).
+
+- `splitter_spec(...)` dikompilasi sekali dan di-cache per kombinasi
+  (chunk_size, chunk_overlap, separators).
+- `iter_spans` menghasilkan (start, end) ke buffer sumber, tanpa menyalin substring;
+  teks baru diambil saat Document dibuat.
+- `iter_chunks` / `iter_file_chunks` memproses stream per blok -> memori terbatas
+  (~blok + chunk_size) dan waktu linear untuk file teks besar.
+- Nilai metadata bersama satu dokumen dihitung sekali (`base_meta`: timestamp,
+  id, ...); tiap chunk mendapat dict sendiri (`chunk_meta`) dengan nilai mutable
+  (list/dict) disalin, sehingga mengubah metadata satu chunk tidak bocor ke chunk lain.
+
+Aturan potong mengikuti splitter rekursif: chunk <= chunk_size karakter, potong
+di separator prioritas tertinggi yang ada di jendela (separator ikut chunk kiri),
+fallback potong keras; overlap dimulai di batas separator dalam `chunk_overlap`
+karakter terakhir. Whitespace di tepi chunk dibuang.
+
+Mode token (`token_spec`, default via CHUNK_MAX_TOKENS): teks dipecah ke unit
+paragraf/kalimat, panjang unit dihitung batch dengan tokenizer EMBED_MODEL
+(`chunking/tokens.py`, memoized), unit > budget dipecah ke kata, lalu unit
+di-pack sampai `max_tokens` dengan overlap unit terakhir <= `overlap_tokens`.
+Untuk stream, unit dihitung per blok: hanya unit yang sudah ditutup separator
+yang di-pack, chunk terakhir (yang masih bisa bertambah) dibawa ke blok
+berikutnya -> memori ~ blok + satu chunk (+ unit terpanjang).
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Sequence, TextIO, Tuple, Union
+from datetime import datetime, timezone
+from functools import lru_cache
+import re
+
+from langchain_core.documents import Document
+
+from settings import settings
+from .tokens import count_tokens
+
+AUDIO_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+DOCUMENT_SEPARATORS = ("\n\n", "\n", ". ", "? ", "! ", " ", "")
+SENTENCE_SEPARATORS = ("\n\n", "\n", ". ", "? ", "! ")
+
+_NON_WS = re.compile(r"\S")
+_WORD = re.compile(r"\S+\s*")
+
+
+class SplitterSpec(NamedTuple):
+    chunk_size: int
+    chunk_overlap: int
+    separators: Tuple[str, ...]  # tanpa "" (potong keras selalu jadi fallback)
+    min_fill: int                # separator di bawah ini diabaikan -> chunk tidak terlalu kecil
+
+
+@lru_cache(maxsize=64)
+def splitter_spec(chunk_size: int, chunk_overlap: int, separators: Tuple[str, ...] = AUDIO_SEPARATORS) -> SplitterSpec:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size harus > 0")
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap harus di [0, chunk_size)")
+    return SplitterSpec(chunk_size, chunk_overlap, tuple(s for s in separators if s), max(1, chunk_size // 2))
+
+
+class TokenSpec(NamedTuple):
+    max_tokens: int
+    overlap_tokens: int
+    unit_re: "re.Pattern[str]"   # batas unit: separator selain spasi (paragraf, baris, kalimat)
+
+
+@lru_cache(maxsize=64)
+def token_spec(max_tokens: int, overlap_tokens: int, separators: Tuple[str, ...] = AUDIO_SEPARATORS) -> TokenSpec:
+    if max_tokens <= 0:
+        raise ValueError("max_tokens harus > 0")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens harus di [0, max_tokens)")
+    coarse = [re.escape(s) for s in separators if s and s != " "]
+    return TokenSpec(max_tokens, overlap_tokens, re.compile("|".join(coarse) or r"\n"))
+
+
+def resolve_spec(chunk_size: int | None, chunk_overlap: int | None, separators: Tuple[str, ...],
+                 max_tokens: int | None = None, overlap_tokens: int | None = None, *,
+                 default_size: int = 1200, default_overlap: int = 180) -> Union[SplitterSpec, TokenSpec]:
+    """Spec chunker: mode token jika `max_tokens` > 0, selain itu karakter.
+
+    `max_tokens` None -> CHUNK_MAX_TOKENS (default 0 = karakter), kecuali `chunk_size`
+    diberikan eksplisit: ukuran karakter dari pemanggil selalu memilih mode karakter.
+    """
+    if max_tokens is None:
+        max_tokens = 0 if chunk_size is not None else settings.CHUNK_MAX_TOKENS
+    if max_tokens > 0:
+        overlap = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        return token_spec(max_tokens, min(overlap, max_tokens - 1), separators)
+    return splitter_spec(default_size if chunk_size is None else chunk_size,
+                         default_overlap if chunk_overlap is None else chunk_overlap, separators)
+
+
+def _rstrip(buf: str, lo: int, hi: int) -> int:
+    while hi > lo and buf[hi - 1].isspace():
+        hi -= 1
+    return hi
+
+
+def _next_span(buf: str, pos: int, spec: SplitterSpec, final: bool) -> Tuple[int, int, int]:
+    """(start, end, next_pos) chunk berikutnya dari `pos`; start = -1 bila butuh data lagi / habis."""
+    m = _NON_WS.search(buf, pos)
+    if m is None:
+        return -1, -1, len(buf)
+    s = m.start()
+    limit = s + spec.chunk_size
+    if limit >= len(buf):
+        if not final:
+            return -1, -1, s
+        return s, _rstrip(buf, s, len(buf)), len(buf)
+
+    cut = limit
+    for sep in spec.separators:
+        i = buf.rfind(sep, s + spec.min_fill, limit - len(sep) + 1)
+        if i >= 0:
+            cut = i + len(sep)
+            break
+    e = _rstrip(buf, s, cut)
+    if e <= s:
+        e = cut
+
+    nxt = cut
+    if spec.chunk_overlap:
+        # overlap maksimal setengah chunk supaya tiap langkah maju >= chunk/2 (linear)
+        lo = max(cut - spec.chunk_overlap, s + (cut - s) // 2)
+        for sep in spec.separators:
+            i = buf.find(sep, lo, cut)
+            if i >= 0 and i + len(sep) < cut:
+                nxt = i + len(sep)
+                break
+    return s, e, nxt
+
+
+def iter_spans(text: str, spec: SplitterSpec) -> Iterator[Tuple[int, int]]:
+    """Offset (start, end) chunk di `text`."""
+    pos = 0
+    while True:
+        s, e, pos = _next_span(text, pos, spec, final=True)
+        if s < 0:
+            return
+        yield s, e
+
+
+def token_units(text: str, spec: TokenSpec, *, split_oversize: bool = True,
+                final: bool = True) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Unit (start, end) + jumlah token; unit > max_tokens dipecah ke kata (lalu karakter).
+
+    `final=False` (blok stream): sisa teks setelah separator terakhir belum jadi unit.
+    """
+    units, pos = [], 0
+    for m in spec.unit_re.finditer(text):
+        if not final and m.end() >= len(text):
+            break  # separator di ujung blok bisa berlanjut di blok berikutnya ("\n" -> "\n\n")
+        if _NON_WS.search(text, pos, m.end()):
+            units.append((pos, m.end()))
+        pos = m.end()
+    if final and _NON_WS.search(text, pos):
+        units.append((pos, len(text)))
+    counts = count_tokens([text[s:e] for s, e in units])
+    if not split_oversize or all(c <= spec.max_tokens for c in counts):
+        return units, counts
+
+    out: List[Tuple[int, int]] = []
+    for (s, e), c in zip(units, counts):
+        if c <= spec.max_tokens:
+            out.append((s, e))
+            continue
+        for m in _WORD.finditer(text, s, e):
+            out.append((m.start(), m.end()))
+    counts = count_tokens([text[s:e] for s, e in out])
+    if any(c > spec.max_tokens for c in counts):  # "kata" sangat panjang (URL, base64, ...)
+        fine: List[Tuple[int, int]] = []
+        for (s, e), c in zip(out, counts):
+            step = max(1, (e - s) * spec.max_tokens // max(c, 1) // 2) if c > spec.max_tokens else e - s
+            fine.extend((i, min(e, i + step)) for i in range(s, e, step))
+        out = fine
+        counts = count_tokens([text[s:e] for s, e in out])
+    return out, counts
+
+
+def _pack(counts: Sequence[int], spec: TokenSpec, final: bool) -> Tuple[List[Tuple[int, int]], int]:
+    """Rentang unit [i, j) per chunk (total <= max_tokens, overlap unit <= overlap_tokens).
+
+    Jika tidak `final`, chunk yang mentok di unit terakhir (masih bisa bertambah) ditahan;
+    return juga indeks unit awal chunk berikutnya.
+    """
+    out: List[Tuple[int, int]] = []
+    i, n = 0, len(counts)
+    while i < n:
+        j, total = i, 0
+        while j < n and (j == i or total + counts[j] <= spec.max_tokens):
+            total += counts[j]
+            j += 1
+        if j >= n and not final:
+            return out, i
+        out.append((i, j))
+        if j >= n:
+            break
+        k, overlap = j, 0
+        while k - 1 > i and overlap + counts[k - 1] <= spec.overlap_tokens:
+            k -= 1
+            overlap += counts[k]
+        i = k
+    return out, n
+
+
+def iter_token_spans(text: str, spec: TokenSpec) -> Iterator[Tuple[int, int]]:
+    """Offset chunk dengan total token unit <= max_tokens (overlap unit <= overlap_tokens)."""
+    units, counts = token_units(text, spec)
+    for i, j in _pack(counts, spec, final=True)[0]:
+        s = _NON_WS.search(text, units[i][0]).start()
+        yield s, _rstrip(text, s, units[j - 1][1])
+
+
+def _iter_token_blocks(blocks: Iterable[str], spec: TokenSpec, block_chars: int) -> Iterator[Tuple[int, int, str]]:
+    """Mode token untuk stream: unit dihitung per blok, chunk yang belum penuh dibawa ke blok berikutnya."""
+    buf, base, pending, size = "", 0, [], 0
+
+    def flush(final: bool) -> Iterator[Tuple[int, int, str]]:
+        units, counts = token_units(buf, spec, final=final)
+        ranges, nxt = _pack(counts, spec, final)
+        for i, j in ranges:
+            s = _NON_WS.search(buf, units[i][0]).start()
+            e = _rstrip(buf, s, units[j - 1][1])
+            yield base + s, base + e, buf[s:e]
+        return units[nxt][0] if nxt < len(units) else (units[-1][1] if units else 0)
+
+    for block in blocks:
+        pending.append(block)
+        size += len(block)
+        if size < block_chars:
+            continue
+        buf = buf + "".join(pending)
+        pending, size = [], 0
+        cut = yield from flush(final=False)
+        base += cut
+        buf = buf[cut:]
+    buf = buf + "".join(pending)
+    yield from flush(final=True)
+
+
+def iter_chunks(source: Union[str, TextIO, Iterable[str]], spec: Union[SplitterSpec, TokenSpec], *,
+                block_chars: int = 1 << 20) -> Iterator[Tuple[int, int, str]]:
+    """(start, end, teks) per chunk; `source` = str, file teks, atau iterable potongan str.
+
+    Offset relatif ke awal stream. Untuk stream hanya blok aktif + sisa chunk yang ditahan
+    (juga di mode token).
+    """
+    if isinstance(source, str):
+        spans = iter_token_spans(source, spec) if isinstance(spec, TokenSpec) else iter_spans(source, spec)
+        for s, e in spans:
+            yield s, e, source[s:e]
+        return
+    blocks = iter(lambda: source.read(block_chars), "") if hasattr(source, "read") else iter(source)
+    if isinstance(spec, TokenSpec):
+        yield from _iter_token_blocks(blocks, spec, block_chars)
+        return
+    buf, base, pending, size = "", 0, [], 0
+    for block in blocks:
+        pending.append(block)
+        size += len(block)
+        if size < block_chars:
+            continue
+        buf = buf + "".join(pending)
+        pending, size = [], 0
+        pos = 0
+        while True:
+            s, e, pos = _next_span(buf, pos, spec, final=False)
+            if s < 0:
+                break
+            yield base + s, base + e, buf[s:e]
+        base += pos
+        buf = buf[pos:]
+    buf = buf + "".join(pending)
+    for s, e in iter_spans(buf, spec):
+        yield base + s, base + e, buf[s:e]
+
+
+def iter_file_chunks(path: str, spec: Union[SplitterSpec, TokenSpec], *, encoding: str = "utf-8",
+                     block_chars: int = 1 << 20) -> Iterator[Tuple[int, int, str]]:
+    with open(path, "r", encoding=encoding) as f:
+        yield from iter_chunks(f, spec, block_chars=block_chars)
+
+
+def base_meta(*, doc_id: str, file_name: str, source: str, language: str, strategy: str | None = None) -> Dict[str, Any]:
+    """Nilai metadata bersama satu dokumen, dihitung sekali; semua nilai immutable (str/tuple)
+    sehingga tiap chunk mereferensikan objek yang sama tanpa risiko alias."""
+    meta: Dict[str, Any] = {
+        "doc_id": doc_id,
+        "file": file_name,
+        "source": source,
+        "language": language,
+        "role_restriction": ("public_read",),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if strategy:
+        meta["strategy"] = strategy
+    return meta
+
+
+def freeze_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """list/set -> tuple/frozenset (sekali per dokumen) agar aman dibagi semua chunk."""
+    return {k: tuple(v) if isinstance(v, list) else frozenset(v) if isinstance(v, set) else v
+            for k, v in meta.items()}
+
+
+def chunk_meta(meta: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+    """Metadata satu chunk: dict baru berisi referensi nilai bersama `meta` (immutable) + field per chunk."""
+    md = dict(meta)
+    md.update(fields)
+    return md
+
+
+def iter_documents(source: Union[str, TextIO, Iterable[str]], spec: Union[SplitterSpec, TokenSpec],
+                   meta: Dict[str, Any], *, id_prefix: str, id_width: int = 3) -> Iterator[Document]:
+    """Generator Document per chunk (lazy, untuk stream/file besar).
+
+    chunk_id `{id_prefix}{i:0{id_width}d}` (mulai 1) + span; nilai `meta` dibekukan sekali
+    dan direferensikan (bukan disalin) oleh semua chunk.
+    """
+    shared = freeze_meta(meta)
+    for i, (s, e, txt) in enumerate(iter_chunks(source, spec), start=1):
+        yield Document(page_content=txt, metadata=chunk_meta(shared, chunk_id=f"{id_prefix}{i:0{id_width}d}", span=[s, e]))
+
+
+def to_documents(source: Union[str, TextIO, Iterable[str]], spec: Union[SplitterSpec, TokenSpec], meta: Dict[str, Any], *,
+                 id_prefix: str, id_width: int = 3) -> List[Document]:
+    """Seperti `iter_documents`, tapi list."""
+    return list(iter_documents(source, spec, meta, id_prefix=id_prefix, id_width=id_width))
+
+
+def split_text(text: str, spec: SplitterSpec) -> List[str]:
+    """Setara `splitter.split_text(text)` (list string) untuk pemanggil lama."""
+    return [text[s:e] for s, e in iter_spans(text, spec)]
+
@@ -0,0 +1,134 @@
+from __future__ import annotations
+"""Semantic (topic-boundary) chunking.
+
+1. Teks dipecah ke kalimat (offset), kalimat > budget dipecah per kata.
+2. Semua kalimat di-embed dalam SATU panggilan engine, langsung tanpa cache
+   embedding persisten (vektor per kalimat tidak dipakai ulang, hanya memenuhi cache).
+3. Jarak kosinus antar kalimat bertetangga (vektor dihaluskan dengan
+   SEMANTIC_CONTEXT_SENTENCES kalimat di kiri/kanan) dihitung vektorisasi NumPy;
+   jarak di atas persentil SEMANTIC_BREAKPOINT_PERCENTILE = batas topik.
+4. Batas diambil dari yang terkuat (topik minimal max_tokens/4); topik yang
+   melebihi max_tokens dipotong di jarak terbesar di dalamnya.
+
+Vektor chunk = rata-rata ternormalisasi vektor kalimatnya, dikembalikan
+`chunk_semantic_with_vectors` sebagai array terpisah (bukan di metadata) supaya
+upsert Qdrant tidak meng-embed ulang. Default mati (SEMANTIC_REUSE_VECTORS=False):
+rata-rata vektor kalimat bukan vektor embedding teks chunk, jadi geometri
+retrieval berbeda dari query yang di-embed utuh.
+"""
+from typing import List, Tuple
+import bisect
+
+import numpy as np
+from langchain_core.documents import Document
+
+from settings import settings
+from embeddings.text_embed import get_engine
+from .engine import SENTENCE_SEPARATORS, base_meta, chunk_meta, iter_token_spans, token_spec, token_units
+from .tokens import count_tokens
+
+DEFAULT_SEMANTIC_MAX_TOKENS = 384
+
+
+def sentence_spans(text: str, max_tokens: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Offset kalimat + jumlah token; kalimat > max_tokens dipotong (per kata) jadi potongan <= max_tokens."""
+    spec = token_spec(max_tokens, 0, SENTENCE_SEPARATORS)
+    units, counts = token_units(text, spec, split_oversize=False)
+    if all(c <= max_tokens for c in counts):
+        return units, counts
+    out: List[Tuple[int, int]] = []
+    for (s, e), c in zip(units, counts):
+        if c <= max_tokens:
+            out.append((s, e))
+        else:
+            out.extend((s + a, s + b) for a, b in iter_token_spans(text[s:e], spec))
+    return out, count_tokens([text[s:e] for s, e in out])
+
+
+def breakpoint_distances(vecs: np.ndarray, context: int = 1) -> np.ndarray:
+    """Jarak kosinus (1 - sim) antara kalimat i dan i+1, vektor dihaluskan +-`context` kalimat."""
+    if context > 0:
+        csum = np.vstack([np.zeros((1, vecs.shape[1]), dtype=vecs.dtype), np.cumsum(vecs, axis=0)])
+        idx = np.arange(len(vecs))
+        lo = np.maximum(idx - context, 0)
+        hi = np.minimum(idx + context + 1, len(vecs))
+        vecs = csum[hi] - csum[lo]
+    vecs = vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+    return 1.0 - np.einsum("ij,ij->i", vecs[:-1], vecs[1:])
+
+
+def topic_breaks(dist: np.ndarray, counts: np.ndarray, percentile: float, min_tokens: int) -> List[int]:
+    """Indeks kalimat awal tiap topik (+ n di akhir).
+
+    Kandidat = jarak di atas persentil; diambil dari yang terkuat, dilewati jika
+    membuat topik < min_tokens di salah satu sisi.
+    """
+    n = len(counts)
+    csum = np.concatenate([[0], np.cumsum(counts)])
+    if n < 2:
+        return [0, n]
+    cand = np.flatnonzero(dist > np.percentile(dist, percentile)) + 1  # batas sebelum kalimat c
+    chosen = [0, n]
+    for c in cand[np.argsort(-dist[cand - 1], kind="stable")]:
+        k = bisect.bisect(chosen, c)
+        if csum[c] - csum[chosen[k - 1]] >= min_tokens and csum[chosen[k]] - csum[c] >= min_tokens:
+            chosen.insert(k, int(c))
+    return chosen
+
+
+def _split_capped(a: int, b: int, dist: np.ndarray, csum: np.ndarray, max_tokens: int) -> List[Tuple[int, int]]:
+    """Pecah kalimat [a, b) yang > max_tokens di jarak terbesar (potongan tidak terlalu timpang)."""
+    total = csum[b] - csum[a]
+    if total <= max_tokens or b - a < 2:
+        return [(a, b)]
+    cs = np.arange(a + 1, b)
+    left = csum[cs] - csum[a]
+    ok = (left >= total / 4) & (total - left >= total / 4)
+    if ok.any():
+        cs = cs[ok]
+    c = int(cs[np.argmax(dist[cs - 1])])
+    return _split_capped(a, c, dist, csum, max_tokens) + _split_capped(c, b, dist, csum, max_tokens)
+
+
+def group_sentences(dist: np.ndarray, counts: List[int], max_tokens: int, percentile: float,
+                    min_tokens: int) -> List[Tuple[int, int, int]]:
+    """(start, end, topic) indeks kalimat per chunk; chunk satu topik berbagi nomor topik."""
+    counts = np.asarray(counts, dtype=np.int64)
+    csum = np.concatenate([[0], np.cumsum(counts)])
+    bounds = topic_breaks(dist, counts, percentile, min_tokens)
+    return [(a, b, topic) for topic, (s, e) in enumerate(zip(bounds, bounds[1:]))
+            for a, b in _split_capped(s, e, dist, csum, max_tokens)]
+
+
+def chunk_semantic(text: str, *, doc_id: str, file_name: str, language: str = "auto",
+                   source: str = "audio_ingestion", max_tokens: int | None = None) -> List[Document]:
+    return chunk_semantic_with_vectors(text, doc_id=doc_id, file_name=file_name, language=language,
+                                       source=source, max_tokens=max_tokens)[0]
+
+
+def chunk_semantic_with_vectors(text: str, *, doc_id: str, file_name: str, language: str = "auto",
+                                source: str = "audio_ingestion",
+                                max_tokens: int | None = None) -> Tuple[List[Document], np.ndarray]:
+    """(chunk, vektor chunk (n, dim)); vektor sejajar urutan chunk."""
+    max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS or DEFAULT_SEMANTIC_MAX_TOKENS
+    spans, counts = sentence_spans(text, max_tokens)
+    if not spans:
+        return [], np.empty((0, settings.EMBED_DIM), dtype=np.float32)
+    vecs = np.asarray(get_engine().embed([text[s:e] for s, e in spans]), dtype=np.float32)
+    dist = breakpoint_distances(vecs, settings.SEMANTIC_CONTEXT_SENTENCES)
+    groups = group_sentences(dist, counts, max_tokens, settings.SEMANTIC_BREAKPOINT_PERCENTILE,
+                             min_tokens=max_tokens // 4)
+
+    chunk_vecs = np.add.reduceat(vecs, [g[0] for g in groups], axis=0)
+    chunk_vecs /= np.maximum(np.linalg.norm(chunk_vecs, axis=1, keepdims=True), 1e-12)
+    meta = base_meta(doc_id=doc_id, file_name=file_name, source=source, language=language, strategy="semantic")
+    docs: List[Document] = []
+    for i, (a, b, topic) in enumerate(groups, start=1):
+        s, e = spans[a][0], spans[b - 1][1]
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        md = chunk_meta(meta, chunk_id=f"ch_{doc_id}_s_{i:03d}", span=[s, e], topic=topic)
+        docs.append(Document(page_content=text[s:e], metadata=md))
+    return docs, chunk_vecs.astype(np.float32, copy=False)
@@ -0,0 +1,82 @@
+"""Hitung token dengan tokenizer EMBED_MODEL (fast tokenizer, batch, memoized).
+
+`count_tokens(texts)` men-tokenize hanya teks yang belum pernah dihitung, dalam
+satu panggilan batch; panjang per segmen disimpan di LRU in-process kecil
+(key = digest blake2b 16 byte, bukan teks utuh) sehingga packing chunk (yang
+menghitung segmen yang sama berulang) tetap murah tanpa menahan salinan teks.
+Jika tokenizer gagal di-load, fallback ke estimasi ~4 karakter per token.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, List, Sequence
+import hashlib, threading
+
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("tokens")
+
+_MAX_ENTRIES = 20_000
+_tokenizer: Any = None
+_loaded_for: str | None = None
+_lengths: "OrderedDict[bytes, int]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Tokenizer EMBED_MODEL shared per proses (None = fallback estimasi)."""
+    global _tokenizer, _loaded_for
+    if _loaded_for != settings.EMBED_MODEL:
+        with _lock:
+            if _loaded_for != settings.EMBED_MODEL:
+                try:
+                    from transformers import AutoTokenizer
+                    _tokenizer = AutoTokenizer.from_pretrained(settings.EMBED_MODEL, use_fast=True)
+                except Exception as e:
+                    _log.warning(f"tokenizer {settings.EMBED_MODEL} tidak tersedia -> estimasi chars/4: {e}")
+                    _tokenizer = None
+                _lengths.clear()
+                _loaded_for = settings.EMBED_MODEL
+    return _tokenizer
+
+
+def _estimate(text: str) -> int:
+    return max(1, len(text) // 4) if text.strip() else 0
+
+
+def _key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def count_tokens(texts: Sequence[str]) -> List[int]:
+    """Jumlah token (tanpa special token) per teks, urutan sama dengan input."""
+    tok = get_tokenizer()
+    keys = [_key(t) for t in texts]
+    with _lock:
+        out = [_lengths.get(k) for k in keys]
+        for k, n in zip(keys, out):
+            if n is not None:
+                _lengths.move_to_end(k)
+    missing = dict((k, t) for k, t, n in zip(keys, texts, out) if n is None)
+    if missing:
+        todo = list(missing.values())
+        if tok is None:
+            lens = [_estimate(t) for t in todo]
+        else:
+            ids = tok(todo, add_special_tokens=False, return_attention_mask=False,
+                      return_token_type_ids=False)["input_ids"]
+            lens = [len(x) for x in ids]
+        fresh = dict(zip(missing, lens))
+        with _lock:
+            _lengths.update(fresh)
+            while len(_lengths) > _MAX_ENTRIES:
+                _lengths.popitem(last=False)
+        out = [fresh[k] if n is None else n for k, n in zip(keys, out)]
+    return out
+
+
+def release_tokenizer() -> None:
+    global _tokenizer, _loaded_for
+    with _lock:
+        _tokenizer = _loaded_for = None
+        _lengths.clear()
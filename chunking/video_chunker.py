@@ -1,39 +1,20 @@
 from __future__ import annotations
 from typing import List
-from datetime import datetime, timezone
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-DEFAULT_VIDEO_CHUNK_SIZE = 1400
+from .engine import AUDIO_SEPARATORS, TokenSpec, base_meta, resolve_spec, to_documents
+
+DEFAULT_VIDEO_CHUNK_SIZE = 1400  # chars (mode karakter: default, atau chunk_size eksplisit)
 DEFAULT_VIDEO_CHUNK_OVERLAP = 180
 
 # Video transcripts may have scene transitions; future: inject scene boundaries.
 
 def chunk_video(transcript: str, *, doc_id: str, file_name: str, language: str = "auto",
-                chunk_size: int = DEFAULT_VIDEO_CHUNK_SIZE,
-                chunk_overlap: int = DEFAULT_VIDEO_CHUNK_OVERLAP) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-    parts = splitter.split_text(transcript)
-    now = datetime.now(timezone.utc).isoformat()
-    docs: List[Document] = []
-    for i, t in enumerate(parts):
-        docs.append(
-            Document(
-                page_content=t,
-                metadata={
-                    "chunk_id": f"ch_{doc_id}_v_{i+1:03d}",
-                    "doc_id": doc_id,
-                    "file": file_name,
-                    "source": "video_ingestion",
-                    "language": language,
-                    "role_restriction": ["public_read"],
-                    "created_at": now,
-                    "strategy": "video_recursive_char",
-                },
-            )
-        )
-    return docs
+                chunk_size: int | None = None,
+                chunk_overlap: int | None = None,
+                max_tokens: int | None = None, overlap_tokens: int | None = None) -> List[Document]:
+    spec = resolve_spec(chunk_size, chunk_overlap, AUDIO_SEPARATORS, max_tokens, overlap_tokens,
+                        default_size=DEFAULT_VIDEO_CHUNK_SIZE, default_overlap=DEFAULT_VIDEO_CHUNK_OVERLAP)
+    meta = base_meta(doc_id=doc_id, file_name=file_name, source="video_ingestion", language=language,
+                     strategy="video_recursive_token" if isinstance(spec, TokenSpec) else "video_recursive_char")
+    return to_documents(transcript, spec, meta, id_prefix=f"ch_{doc_id}_v_")
@@ -0,0 +1,144 @@
+"""Manifest ingestion incremental (SQLite lokal).
+
+- `doc_id` deterministik dari path file (stabil antar run, walau isi berubah).
+- File dilewati jika hash isi + fingerprint konfigurasi pipeline (model STT /
+  embedding / LLM, lihat `pipeline_lineage`) sama dengan run sukses terakhir.
+- Per chunk disimpan hash teks + fingerprint: chunk yang tidak berubah tidak
+  di-embed / di-extract ulang.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Tuple
+import hashlib, json, os, sqlite3, threading, time
+
+from settings import settings
+
+_manifest: "Manifest | None" = None
+_lock = threading.Lock()
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def path_key(path: str) -> str:
+    """Path absolut ternormalisasi (symlink di-resolve, separator '/'); tidak bergantung working dir."""
+    return os.path.normcase(os.path.realpath(path)).replace(os.sep, "/")
+
+
+def doc_id_for(path: str) -> str:
+    """doc_id stabil dari path file (re-ingest file yang sama -> doc_id yang sama)."""
+    return f"doc_{hashlib.sha1(path_key(path).encode('utf-8')).hexdigest()[:12]}"
+
+
+def pipeline_lineage() -> Dict[str, Any]:
+    """Versi model/konfigurasi yang menentukan isi hasil ingestion (disimpan di documents.lineage)."""
+    return {
+        "stt_model": settings.STT_MODEL,
+        "stt_backend": settings.STT_BACKEND,
+        "vad": settings.ENABLE_VAD,
+        "embed_model": settings.EMBED_MODEL,
+        "embed_dim": settings.EMBED_DIM,
+        "clean_llm_model": settings.CLEAN_LLM_MODEL,
+        "extract_llm_model": settings.EXTRACT_LLM_MODEL if settings.ENABLE_EXTRACTION else None,
+    }
+
+
+def fingerprint(lineage: Dict[str, Any] | None = None) -> str:
+    data = json.dumps(lineage or pipeline_lineage(), sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class Manifest:
+    def __init__(self, path: str | None = None):
+        self.path = path or settings.MANIFEST_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, doc_id TEXT, content_hash TEXT, fingerprint TEXT, updated_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY, doc_id TEXT, text_hash TEXT, fingerprint TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_doc ON chunks(doc_id)")
+        self._conn.commit()
+
+    def is_unchanged(self, path: str, content_hash: str, fp: str | None = None) -> bool:
+        """True jika file ini sudah sukses di-ingest dengan isi & konfigurasi yang sama."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, fingerprint FROM files WHERE path=?", (path_key(path),)
+            ).fetchone()
+        return row is not None and row == (content_hash, fp or fingerprint())
+
+    def changed_chunks(self, doc_id: str, chunks: Sequence[Tuple[str, str]], fp: str | None = None) -> List[str]:
+        """`chunks`: [(chunk_id, text)] -> chunk_id yang baru / berubah sejak run terakhir."""
+        fp = fp or fingerprint()
+        with self._lock:
+            known = dict(
+                ((cid, (h, f)) for cid, h, f in
+                 self._conn.execute("SELECT chunk_id, text_hash, fingerprint FROM chunks WHERE doc_id=?", (doc_id,)))
+            )
+        return [cid for cid, text in chunks if known.get(cid) != (text_hash(text), fp)]
+
+    def known_chunks(self, doc_id: str) -> set:
+        """chunk_id yang tercatat di run sukses terakhir doc ini."""
+        with self._lock:
+            return {r[0] for r in self._conn.execute("SELECT chunk_id FROM chunks WHERE doc_id=?", (doc_id,))}
+
+    def stale_chunks(self, doc_id: str, chunk_ids: Sequence[str]) -> List[str]:
+        """chunk_id run sukses terakhir yang tidak ada lagi di `chunk_ids`."""
+        return sorted(self.known_chunks(doc_id) - set(chunk_ids))
+
+    def mark_done(self, path: str, doc_id: str, content_hash: str, chunks: Sequence[Tuple[str, str]],
+                  fp: str | None = None) -> List[str]:
+        """Catat file + chunk sukses; return chunk_id lama yang sudah tidak ada (stale)."""
+        fp = fp or fingerprint()
+        ids = [cid for cid, _ in chunks]
+        with self._lock:
+            old = {r[0] for r in self._conn.execute("SELECT chunk_id FROM chunks WHERE doc_id=?", (doc_id,))}
+            stale = sorted(old - set(ids))
+            self._conn.executemany("DELETE FROM chunks WHERE chunk_id=?", [(c,) for c in stale])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks(chunk_id, doc_id, text_hash, fingerprint) VALUES (?,?,?,?)",
+                [(cid, doc_id, text_hash(text), fp) for cid, text in chunks],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files(path, doc_id, content_hash, fingerprint, updated_at) VALUES (?,?,?,?,?)",
+                (path_key(path), doc_id, content_hash, fp, time.time()),
+            )
+            self._conn.commit()
+        return stale
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_manifest() -> Manifest | None:
+    global _manifest
+    if _manifest is None and settings.MANIFEST_ENABLED:
+        with _lock:
+            if _manifest is None:
+                _manifest = Manifest()
+    return _manifest
+
+
+def close_manifest() -> None:
+    global _manifest
+    with _lock:
+        if _manifest is not None:
+            _manifest.close()
+        _manifest = None
@@ -1,25 +1,53 @@
 from __future__ import annotations
-from typing import Sequence
+from typing import Any, Dict, List, Sequence
+import threading, weakref
 
 from neo4j import GraphDatabase, Driver
 from settings import settings
+from telemetry import get_logger, span
 
-# Simple, generic triple upsert with provenance and confidence
-NEO4J_MERGE = """
-MERGE (s:Entity {name: $s})
-MERGE (o:Entity {name: $o})
-MERGE (s)-[r:REL {predicate: $p}]->(o)
+# Upsert triple dengan provenance & confidence: semua triple satu dokumen dalam satu query
+# (satu round-trip per batch)
+NEO4J_MERGE_BATCH = """
+UNWIND $rows AS row
+MERGE (s:Entity {name: row.s})
+MERGE (o:Entity {name: row.o})
+MERGE (s)-[r:REL {predicate: row.p}]->(o)
 ON CREATE SET
-  r.doc_ids = [$doc_id],
-  r.chunk_ids = [$chunk_id],
-  r.confidence = $confidence,
+  r.doc_ids = [row.doc_id],
+  r.chunk_ids = [row.chunk_id],
+  r.confidence = row.confidence,
   r.created_at = datetime()
 ON MATCH SET
-  r.doc_ids = CASE WHEN NOT $doc_id IN r.doc_ids THEN r.doc_ids + $doc_id ELSE r.doc_ids END,
-  r.chunk_ids = CASE WHEN NOT $chunk_id IN r.chunk_ids THEN r.chunk_ids + $chunk_id ELSE r.chunk_ids END,
-  r.confidence = CASE WHEN r.confidence < $confidence THEN $confidence ELSE r.confidence END
+  r.doc_ids = CASE WHEN NOT row.doc_id IN r.doc_ids THEN r.doc_ids + row.doc_id ELSE r.doc_ids END,
+  r.chunk_ids = CASE WHEN NOT row.chunk_id IN r.chunk_ids THEN r.chunk_ids + row.chunk_id ELSE r.chunk_ids END,
+  r.confidence = CASE WHEN r.confidence < row.confidence THEN row.confidence ELSE r.confidence END
 """
 
+# Provenance chunk yang sudah tidak ada (file berubah): buang chunk_id dari relasi,
+# doc_id ikut dibuang jika tidak ada chunk hidup doc itu lagi; relasi tanpa chunk dihapus.
+# Scan relasi penuh, tapi hanya jalan saat ada chunk stale.
+NEO4J_DROP_CHUNKS = """
+MATCH ()-[r:REL]->()
+WHERE any(c IN r.chunk_ids WHERE c IN $stale_ids)
+SET r.chunk_ids = [c IN r.chunk_ids WHERE NOT c IN $stale_ids]
+SET r.doc_ids = CASE WHEN any(c IN r.chunk_ids WHERE c IN $live_ids) THEN r.doc_ids
+                     ELSE [d IN r.doc_ids WHERE d <> $doc_id] END
+WITH r WHERE size(r.chunk_ids) = 0
+DELETE r
+"""
+
+# Uniqueness constraint = index di Entity.name -> MERGE jadi index lookup, bukan label scan
+NEO4J_CONSTRAINTS = [
+    "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+]
+
+_log = get_logger("neo4j")
+
+_driver: Driver | None = None
+_constraints_ready: "weakref.WeakSet[Driver]" = weakref.WeakSet()
+_lock = threading.Lock()
+
 
 def init_neo4j_driver() -> Driver:
     """
@@ -31,6 +59,88 @@ def init_neo4j_driver() -> Driver:
     )
 
 
+def get_driver() -> Driver:
+    """Driver shared per proses (connection pool dipakai ulang antar chunk/dokumen)."""
+    global _driver
+    if _driver is None:
+        with _lock:
+            if _driver is None:
+                _driver = init_neo4j_driver()
+    return _driver
+
+
+def close_neo4j() -> None:
+    """Teardown: tutup driver shared."""
+    global _driver
+    with _lock:
+        if _driver is not None:
+            _constraints_ready.discard(_driver)
+            _driver.close()
+        _driver = None
+
+
+def ensure_constraints(driver: Driver | None = None) -> None:
+    """Buat constraint/index yang dibutuhkan MERGE. Idempotent (IF NOT EXISTS), sekali per driver."""
+    driver = driver or get_driver()
+    if driver in _constraints_ready:
+        return
+    with driver.session() as session:
+        for q in NEO4J_CONSTRAINTS:
+            session.run(q).consume()
+    _constraints_ready.add(driver)
+
+
+def triple_rows(triples: Sequence, doc_id: str, chunk_id: str) -> List[Dict[str, Any]]:
+    """Konversi objek triple (.s, .p, .o, .confidence) -> row untuk NEO4J_MERGE_BATCH."""
+    return [
+        {"s": t.s, "p": t.p, "o": t.o, "doc_id": doc_id, "chunk_id": chunk_id,
+         "confidence": float(getattr(t, "confidence", 0.0))}
+        for t in triples
+    ]
+
+
+def upsert_triples_bulk(
+    rows: Sequence[Dict[str, Any]],
+    min_conf: float = 0.8,
+    driver: Driver | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """
+    Upsert banyak triple (lintas chunk) via UNWIND dalam execute_write.
+    Returns number of triples written.
+    """
+    keep = [r for r in rows if r.get("confidence", 0.0) >= min_conf]
+    if not keep:
+        return 0
+    driver = driver or get_driver()
+    ensure_constraints(driver)
+    bs = max(1, batch_size or settings.NEO4J_BATCH_SIZE)
+    with span("neo4j.upsert", triples=len(keep)), driver.session() as session:
+        for start in range(0, len(keep), bs):
+            batch = keep[start:start + bs]
+            session.execute_write(lambda tx, b=batch: tx.run(NEO4J_MERGE_BATCH, rows=b).consume())
+    _log.info(f"✓ Upserted {len(keep)} triples (filtered {len(rows) - len(keep)} low-confidence)")
+    return len(keep)
+
+
+def delete_chunk_provenance(
+    doc_id: str,
+    stale_ids: Sequence[str],
+    live_ids: Sequence[str] = (),
+    driver: Driver | None = None,
+) -> int:
+    """Hapus provenance chunk stale satu dokumen (lihat NEO4J_DROP_CHUNKS). Return jumlah chunk."""
+    if not stale_ids:
+        return 0
+    driver = driver or get_driver()
+    with span("neo4j.delete", chunks=len(stale_ids)), driver.session() as session:
+        session.execute_write(lambda tx: tx.run(
+            NEO4J_DROP_CHUNKS, doc_id=doc_id, stale_ids=list(stale_ids), live_ids=list(live_ids),
+        ).consume())
+    _log.info(f"✓ Dropped provenance of {len(stale_ids)} stale chunks (doc_id={doc_id})")
+    return len(stale_ids)
+
+
 def upsert_triples(
     triples: Sequence,  # expects objects with .s, .p, .o, .confidence
     doc_id: str,
@@ -42,41 +152,8 @@ def upsert_triples(
     Upsert triples with a minimum confidence threshold.
     Returns number of triples written.
     """
-    wrote = 0
-    filtered = 0
-    own_driver = False
-    if driver is None:
-        driver = init_neo4j_driver()
-        own_driver = True
-
-    print(f"[neo4j] Processing {len(triples)} triples for doc_id={doc_id}, chunk_id={chunk_id}")
-    
     try:
-        with driver.session() as session:
-            for t in triples:
-                if getattr(t, "confidence", 0.0) < min_conf:
-                    filtered += 1
-                    continue
-                session.run(
-                    NEO4J_MERGE,
-                    s=t.s,
-                    p=t.p,
-                    o=t.o,
-                    doc_id=doc_id,
-                    chunk_id=chunk_id,
-                    confidence=float(t.confidence),
-                )
-                wrote += 1
-        
-        print(f"[neo4j] ✓ Successfully inserted {wrote} triples to Neo4j (filtered {filtered} low-confidence)")
-        if wrote > 0:
-            print(f"[neo4j] Sample triple: {triples[0].s} --[{triples[0].p}]--> {triples[0].o}")
-            
+        return upsert_triples_bulk(triple_rows(triples, doc_id, chunk_id), min_conf=min_conf, driver=driver)
     except Exception as e:
-        print(f"[neo4j] ✗ Error inserting triples: {e}")
+        _log.error(f"✗ Error inserting triples: {e}")
         raise
-    finally:
-        if own_driver:
-            driver.close()
-
-    return wrote
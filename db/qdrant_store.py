@@ -1,26 +1,58 @@
 from __future__ import annotations
 from typing import Sequence, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+import threading, time, uuid
+
+import numpy as np
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_qdrant import QdrantVectorStore
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from settings import settings
+from telemetry import get_logger, span
+from embeddings.text_embed import get_embedder, get_cache, embed_texts
 
+_log = get_logger("qdrant")
 
-def init_qdrant() -> QdrantClient:
-    """
-    Ensure Qdrant collection exists (text vectors only, 1024-d, cosine).
-    """
-    client = QdrantClient(
+# Registry per proses: client (+ cek koleksi) dan vector store dibuat sekali lalu dipakai ulang
+_client: QdrantClient | None = None
+_vectorstore: QdrantVectorStore | None = None
+_lock = threading.Lock()
+
+
+def _connect(prefer_grpc: bool) -> QdrantClient:
+    return QdrantClient(
         url=settings.QDRANT_URL, 
         api_key=settings.QDRANT_API_KEY,
+        prefer_grpc=prefer_grpc,
+        grpc_port=settings.QDRANT_GRPC_PORT,
         verify=False,  # Skip SSL verification if needed
         check_compatibility=False  # Skip version compatibility check
     )
 
+
+def init_qdrant() -> QdrantClient:
+    """
+    Ensure Qdrant collection exists (text vectors only, 1024-d, cosine).
+    QDRANT_URL=":memory:" -> mode lokal in-process (benchmark / dev tanpa server).
+    QDRANT_PREFER_GRPC -> gRPC (QDRANT_GRPC_PORT) bila bisa dihubungi, fallback REST.
+    """
+    if settings.QDRANT_URL == ":memory:":
+        client = QdrantClient(location=":memory:")
+    elif settings.QDRANT_PREFER_GRPC:
+        client = _connect(prefer_grpc=True)
+        try:
+            client.get_collections()
+        except Exception as e:
+            _log.warning(f"gRPC port {settings.QDRANT_GRPC_PORT} tidak tersedia -> REST: {e}")
+            client.close()
+            client = _connect(prefer_grpc=False)
+    else:
+        client = _connect(prefer_grpc=False)
+
     try:
         client.get_collection(settings.QDRANT_COLLECTION)
     except Exception:
@@ -34,10 +66,42 @@ def init_qdrant() -> QdrantClient:
     return client
 
 
-def get_vectorstore(client: Optional[QdrantClient] = None, embeddings: Optional[HuggingFaceEmbeddings] = None):
-    """Return a LangChain Qdrant vectorstore (updated API)."""
-    client = client or init_qdrant()
-    embeddings = embeddings or HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
+def get_client() -> QdrantClient:
+    """Shared QdrantClient (collection dipastikan ada sekali per proses)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = init_qdrant()
+    return _client
+
+
+def get_vectorstore(client: Optional[QdrantClient] = None, embeddings: Optional[Embeddings] = None):
+    """Return a LangChain Qdrant vectorstore (updated API).
+
+    Tanpa argumen: instance shared (client + embedder dari registry proses).
+    """
+    global _vectorstore
+    if client is None and embeddings is None:
+        if _vectorstore is None:
+            vs = _build_vectorstore(get_client(), get_embedder())
+            with _lock:
+                _vectorstore = _vectorstore or vs
+        return _vectorstore
+    return _build_vectorstore(client or get_client(), embeddings or get_embedder())
+
+
+def close_qdrant() -> None:
+    """Teardown: tutup client shared (dibuat ulang lazily jika dipakai lagi)."""
+    global _client, _vectorstore
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _vectorstore = None
+
+
+def _build_vectorstore(client: QdrantClient, embeddings: Embeddings) -> QdrantVectorStore:
     # Use modern QdrantVectorStore API with 'embedding' (singular)
     return QdrantVectorStore(
         client=client, 
@@ -46,17 +110,79 @@ def get_vectorstore(client: Optional[QdrantClient] = None, embeddings: Optional[
     )
 
 
-def upsert_documents(docs: Sequence[Document]) -> None:
+def point_id(chunk_id: str) -> str:
+    """ID point deterministik per chunk: upsert ulang chunk yang sama menimpa, bukan duplikat."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, chunk_id))
+
+
+def _payload(doc: Document) -> dict:
+    """Payload format LangChain (page_content + metadata)."""
+    return {QdrantVectorStore.CONTENT_KEY: doc.page_content, QdrantVectorStore.METADATA_KEY: doc.metadata}
+
+
+def _upsert_batch(points: List[qmodels.PointStruct], wait: bool | None = None) -> bool:
+    """Upsert satu batch dengan retry + backoff; False jika tetap gagal."""
+    wait = settings.QDRANT_UPSERT_WAIT if wait is None else wait
+    for attempt in range(settings.QDRANT_MAX_RETRIES + 1):
+        try:
+            get_client().upsert(collection_name=settings.QDRANT_COLLECTION, points=points, wait=wait)
+            return True
+        except Exception as e:
+            if attempt == settings.QDRANT_MAX_RETRIES:
+                _log.error(f"batch {len(points)} point gagal setelah {attempt + 1}x: {e}")
+                return False
+            time.sleep(min(2 ** attempt, 10) * (0.5 + np.random.random()))
+    return False
+
+
+def upsert_documents(docs: Sequence[Document], vectors: np.ndarray | None = None) -> List[str]:
     """
-    Embed & upsert LangChain Documents into Qdrant using the configured collection.
+    Tulis chunk ke Qdrant dengan vektor eksplisit (tanpa add_documents LangChain).
+
+    - vektor: `vectors` (n, EMBED_DIM) jika diberikan (mis. vektor chunk semantic),
+      selain itu di-embed satu batch lewat `embed_texts` (cache embedding dicek dulu);
+    - ID point deterministik dari chunk_id (`point_id`) -> re-ingest menimpa, bukan duplikat;
+    - payload format LangChain (page_content + metadata) -> tetap bisa dibaca QdrantVectorStore;
+    - batch QDRANT_UPSERT_BATCH, QDRANT_UPSERT_PARALLEL request paralel, wait=QDRANT_UPSERT_WAIT;
+      batch terakhir dikirim setelah semua batch lain di-ack dengan wait=True -> WAL diterapkan
+      berurutan, jadi saat fungsi return semua point sudah ter-apply (aman untuk mark_done / delete).
+    Returns chunk_id yang tertulis (batch gagal tidak ikut) -> dipakai untuk baris vdb_refs.
     """
     if not docs:
+        return []
+    docs = list(docs)
+    reused = 0 if vectors is None else len(docs)
+    vecs = np.asarray(vectors if vectors is not None else embed_texts([d.page_content for d in docs]), dtype=np.float32)
+    if vecs.shape != (len(docs), settings.EMBED_DIM):
+        raise ValueError(f"shape vektor {vecs.shape} != ({len(docs)}, {settings.EMBED_DIM})")
+    ids = [d.metadata["chunk_id"] for d in docs]
+    points = [qmodels.PointStruct(id=point_id(cid), vector=v.tolist(), payload=_payload(d))
+              for cid, v, d in zip(ids, vecs, docs)]
+    size = max(1, settings.QDRANT_UPSERT_BATCH)
+    batches = [(ids[i:i + size], points[i:i + size]) for i in range(0, len(points), size)]
+    with span("qdrant.upsert", chunks=len(docs), reused_vectors=reused, batches=len(batches)) as sp:
+        head = [pts for _, pts in batches[:-1]]
+        workers = max(1, min(settings.QDRANT_UPSERT_PARALLEL, len(head)))
+        if workers == 1:
+            results = [_upsert_batch(pts) for pts in head]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrant-upsert") as ex:
+                results = list(ex.map(_upsert_batch, head))
+        results.append(_upsert_batch(batches[-1][1], wait=True))  # barrier
+        written = [cid for (bids, _), ok in zip(batches, results) if ok for cid in bids]
+        sp.add(written=len(written))
+    cache = get_cache()
+    cache_info = f" (embed cache hit_rate={cache.stats()['hit_rate']})" if cache is not None else ""
+    _log.info(f"upserted {len(written)}/{len(docs)} points into {settings.QDRANT_COLLECTION}{cache_info}")
+    return written
+
+
+def delete_chunks(chunk_ids: Sequence[str]) -> None:
+    """Hapus point chunk yang sudah tidak ada di dokumen (hasil re-ingest)."""
+    if not chunk_ids:
         return
-    vs = get_vectorstore()
-    # (LangChain QdrantVectorStore akan embed internal; jika ingin validasi dimensi,
-    # bisa embed manual, tapi di sini kita manfaatkan add_documents langsung.)
-    try:
-        vs.add_documents(list(docs))
-        print(f"[qdrant] inserted {len(docs)} docs into {settings.QDRANT_COLLECTION}")
-    except Exception as e:
-        print(f"[qdrant][error] upsert failed: {e}")
+    get_client().delete(
+        collection_name=settings.QDRANT_COLLECTION,
+        points_selector=qmodels.PointIdsList(points=[point_id(c) for c in chunk_ids]),
+        wait=True,
+    )
@@ -1,84 +1,139 @@
 # db/sql.py
 from __future__ import annotations
-from typing import Dict, Any, Iterable
+from typing import Dict, Any, Iterable, List, Sequence, Tuple
 from contextlib import contextmanager
 from datetime import datetime, timezone
+import hashlib, threading
 
 from sqlalchemy import (
-    create_engine, Table, Column, Text, Integer, TIMESTAMP, MetaData, ARRAY
+    create_engine, Table, Column, Text, Integer, TIMESTAMP, MetaData, ARRAY, JSON
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.engine import Engine, Connection
 from sqlalchemy.exc import OperationalError, ProgrammingError
 
 from settings import settings
+from telemetry import get_logger, span
+
+_log = get_logger("sql")
+
+
+# =========================
+# Schema (didefinisikan sekali per proses)
+# =========================
+metadata = MetaData()
+# Tipe Postgres; di SQLite (benchmark / dev lokal) jatuh ke JSON
+_TEXT_ARRAY = ARRAY(Text).with_variant(JSON(), "sqlite")
+_JSONB = JSONB().with_variant(JSON(), "sqlite")
+
+documents = Table(
+    "documents", metadata,
+    Column("doc_id", Text, primary_key=True),
+    Column("title", Text),
+    Column("language", Text),
+    Column("source", Text),
+    Column("file", Text),
+    Column("author", Text),
+    Column("created_at", TIMESTAMP(timezone=True)),
+    Column("knowledge_tags", _TEXT_ARRAY),
+    Column("role_restriction", _TEXT_ARRAY),
+    Column("lineage", _JSONB),
+)
+
+chunks = Table(
+    "chunks", metadata,
+    Column("chunk_id", Text, primary_key=True),
+    Column("doc_id", Text),
+    Column("segments", _JSONB),
+    Column("token_estimate", Integer),
+    Column("created_at", TIMESTAMP(timezone=True)),
+    Column("text", Text),
+)
+
+vdb_refs = Table(
+    "vdb_refs", metadata,
+    Column("chunk_id", Text, primary_key=True),
+    Column("collection", Text),
+    Column("vector_dim", Integer),
+    Column("inserted_at", TIMESTAMP(timezone=True)),
+)
+
+gdb_triples = Table(
+    "gdb_triples", metadata,
+    Column("triple_id", Text, primary_key=True),
+    Column("s", Text), Column("p", Text), Column("o", Text),
+    Column("doc_id", Text), Column("chunk_id", Text),
+    Column("confidence", Integer),
+    Column("created_at", TIMESTAMP(timezone=True)),
+)
+
+TABLES: Dict[str, Table] = {
+    "documents": documents,
+    "chunks": chunks,
+    "vdb_refs": vdb_refs,
+    "gdb_triples": gdb_triples,
+}
+
+# Context persistence per proses (engine + pool), lihat get_sql_context()
+_engine: Engine | None = None
+_schema_ready = False
+_lock = threading.Lock()
 
 
 def init_sql_engine() -> Engine:
     """
     Create SQLAlchemy engine using PG_URL from settings.
+    Pool & statement cache diatur lewat SQL_POOL_SIZE / SQL_MAX_OVERFLOW / SQL_QUERY_CACHE_SIZE.
     """
-    return create_engine(settings.PG_URL, future=True, pool_pre_ping=True)
+    kwargs: Dict[str, Any] = {"query_cache_size": settings.SQL_QUERY_CACHE_SIZE}
+    if not settings.PG_URL.startswith("sqlite"):
+        kwargs.update(
+            pool_size=settings.SQL_POOL_SIZE,
+            max_overflow=settings.SQL_MAX_OVERFLOW,
+            pool_recycle=settings.SQL_POOL_RECYCLE_SECONDS,
+        )
+    return create_engine(settings.PG_URL, future=True, pool_pre_ping=True, **kwargs)
 
 
 def init_sql_schema(engine: Engine) -> Dict[str, Table]:
     """
     Create tables if not exist. Idempotent.
     """
-    metadata = MetaData()
-
-    documents = Table(
-        "documents", metadata,
-        Column("doc_id", Text, primary_key=True),
-        Column("title", Text),
-        Column("language", Text),
-        Column("source", Text),
-        Column("file", Text),
-        Column("author", Text),
-        Column("created_at", TIMESTAMP(timezone=True)),
-        Column("knowledge_tags", ARRAY(Text)),
-        Column("role_restriction", ARRAY(Text)),
-        Column("lineage", JSONB),
-    )
-
-    chunks = Table(
-        "chunks", metadata,
-        Column("chunk_id", Text, primary_key=True),
-        Column("doc_id", Text),
-        Column("segments", JSONB),
-        Column("token_estimate", Integer),
-        Column("created_at", TIMESTAMP(timezone=True)),
-        Column("text", Text),
-    )
-
-    vdb_refs = Table(
-        "vdb_refs", metadata,
-        Column("chunk_id", Text, primary_key=True),
-        Column("collection", Text),
-        Column("vector_dim", Integer),
-        Column("inserted_at", TIMESTAMP(timezone=True)),
-    )
-
-    gdb_triples = Table(
-        "gdb_triples", metadata,
-        Column("triple_id", Text, primary_key=True),
-        Column("s", Text), Column("p", Text), Column("o", Text),
-        Column("doc_id", Text), Column("chunk_id", Text),
-        Column("confidence", Integer),
-        Column("created_at", TIMESTAMP(timezone=True)),
-    )
-
     try:
         metadata.create_all(engine, checkfirst=True)
     except (OperationalError, ProgrammingError) as e:
         raise RuntimeError(f"Failed to create schema: {e}") from e
 
-    return {
-        "documents": documents,
-        "chunks": chunks,
-        "vdb_refs": vdb_refs,
-        "gdb_triples": gdb_triples,
-    }
+    return TABLES
+
+
+def get_sql_context() -> Tuple[Engine, Dict[str, Table]]:
+    """Engine + tabel shared per proses.
+
+    Engine (dan pool koneksinya) dibuat sekali; cek/buat schema hanya sekali saat
+    start jika SQL_AUTO_CREATE_SCHEMA=true (selain itu jalankan scripts/init_db.py).
+    """
+    global _engine, _schema_ready
+    if _engine is None or not _schema_ready:
+        with _lock:
+            if _engine is None:
+                _engine = init_sql_engine()
+            if not _schema_ready:
+                if settings.SQL_AUTO_CREATE_SCHEMA:
+                    init_sql_schema(_engine)
+                _schema_ready = True
+    return _engine, TABLES
+
+
+def dispose_sql() -> None:
+    """Teardown: tutup semua koneksi pool (dibuat ulang lazily jika dipakai lagi)."""
+    global _engine, _schema_ready
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _schema_ready = False
 
 
 @contextmanager
@@ -91,24 +146,24 @@ def tx(engine: Engine) -> Iterable[Connection]:
 
 
 def insert_document(engine: Engine, documents_tbl: Table, doc: Dict[str, Any]) -> None:
-    print(f"[sql] Inserting document: doc_id={doc.get('doc_id', 'unknown')}, title={doc.get('title', 'N/A')[:50]}...")
+    _log.debug(f"Inserting document: doc_id={doc.get('doc_id', 'unknown')}, title={doc.get('title', 'N/A')[:50]}...")
     try:
         with tx(engine) as conn:
             conn.execute(documents_tbl.insert().values(**doc))
-        print(f"[sql] ✓ Successfully inserted document: {doc.get('doc_id', 'unknown')}")
+        _log.debug(f"✓ Successfully inserted document: {doc.get('doc_id', 'unknown')}")
     except Exception as e:
-        print(f"[sql] ✗ Error inserting document {doc.get('doc_id', 'unknown')}: {e}")
+        _log.error(f"✗ Error inserting document {doc.get('doc_id', 'unknown')}: {e}")
         raise
 
 
 def insert_chunk(engine: Engine, chunks_tbl: Table, row: Dict[str, Any]) -> None:
-    print(f"[sql] Inserting chunk: chunk_id={row.get('chunk_id', 'unknown')}, doc_id={row.get('doc_id', 'unknown')}")
+    _log.debug(f"Inserting chunk: chunk_id={row.get('chunk_id', 'unknown')}, doc_id={row.get('doc_id', 'unknown')}")
     try:
         with tx(engine) as conn:
             conn.execute(chunks_tbl.insert().values(**row))
-        print(f"[sql] ✓ Successfully inserted chunk: {row.get('chunk_id', 'unknown')}")
+        _log.debug(f"✓ Successfully inserted chunk: {row.get('chunk_id', 'unknown')}")
     except Exception as e:
-        print(f"[sql] ✗ Error inserting chunk {row.get('chunk_id', 'unknown')}: {e}")
+        _log.error(f"✗ Error inserting chunk {row.get('chunk_id', 'unknown')}: {e}")
         raise
 
 
@@ -119,7 +174,7 @@ def insert_vdb_ref(
     dim: int,
     collection: str,
 ) -> None:
-    print(f"[sql] Inserting VDB reference: chunk_id={chunk_id}, collection={collection}, dim={dim}")
+    _log.debug(f"Inserting VDB reference: chunk_id={chunk_id}, collection={collection}, dim={dim}")
     try:
         with tx(engine) as conn:
             conn.execute(
@@ -130,9 +185,9 @@ def insert_vdb_ref(
                     inserted_at=datetime.now(timezone.utc),
                 )
             )
-        print(f"[sql] ✓ Successfully inserted VDB reference for chunk: {chunk_id}")
+        _log.debug(f"✓ Successfully inserted VDB reference for chunk: {chunk_id}")
     except Exception as e:
-        print(f"[sql] ✗ Error inserting VDB reference for chunk {chunk_id}: {e}")
+        _log.error(f"✗ Error inserting VDB reference for chunk {chunk_id}: {e}")
         raise
 
 
@@ -144,7 +199,7 @@ def insert_triple(
     chunk_id: str,
 ) -> None:
     from uuid import uuid4
-    print(f"[sql] Inserting triple: {tri.s} --[{tri.p}]--> {tri.o} (confidence: {tri.confidence:.2f})")
+    _log.debug(f"Inserting triple: {tri.s} --[{tri.p}]--> {tri.o} (confidence: {tri.confidence:.2f})")
     try:
         with tx(engine) as conn:
             conn.execute(
@@ -159,7 +214,113 @@ def insert_triple(
                     created_at=datetime.now(timezone.utc),
                 )
             )
-        print(f"[sql] ✓ Successfully inserted triple for doc_id={doc_id}, chunk_id={chunk_id}")
+        _log.debug(f"✓ Successfully inserted triple for doc_id={doc_id}, chunk_id={chunk_id}")
     except Exception as e:
-        print(f"[sql] ✗ Error inserting triple for chunk {chunk_id}: {e}")
+        _log.error(f"✗ Error inserting triple for chunk {chunk_id}: {e}")
         raise
+
+
+# =========================
+# Bulk API (satu transaksi per dokumen, idempotent)
+# =========================
+def _upsert_rows(conn: Connection, tbl: Table, rows: Sequence[Dict[str, Any]]) -> int:
+    """INSERT ... ON CONFLICT (pk) DO UPDATE untuk banyak baris sekaligus (executemany).
+
+    Baris dengan pk sama di-dedupe (yang terakhir menang) karena Postgres menolak
+    satu statement yang meng-update baris yang sama dua kali.
+    """
+    if not rows:
+        return 0
+    pk = [c.name for c in tbl.primary_key.columns]
+    uniq = list({tuple(r[k] for k in pk): r for r in rows}.values())
+    insert = sqlite_insert if conn.dialect.name == "sqlite" else pg_insert
+    stmt = insert(tbl)
+    update_cols = {c.name: stmt.excluded[c.name] for c in tbl.columns if c.name not in pk and c.name in uniq[0]}
+    stmt = stmt.on_conflict_do_update(index_elements=pk, set_=update_cols) if update_cols else stmt.on_conflict_do_nothing(index_elements=pk)
+    conn.execute(stmt, uniq)
+    return len(uniq)
+
+
+def triple_row(tri: Any, doc_id: str, chunk_id: str) -> Dict[str, Any]:
+    """Row gdb_triples dengan triple_id deterministik (re-ingest tidak menggandakan audit)."""
+    key = "\x00".join([doc_id, chunk_id, tri.s, tri.p, tri.o])
+    return {
+        "triple_id": hashlib.sha1(key.encode("utf-8")).hexdigest(),
+        "s": tri.s,
+        "p": tri.p,
+        "o": tri.o,
+        "doc_id": doc_id,
+        "chunk_id": chunk_id,
+        "confidence": int(tri.confidence * 100),
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def upsert_document(conn: Connection, documents_tbl: Table, doc: Dict[str, Any]) -> int:
+    return _upsert_rows(conn, documents_tbl, [doc])
+
+
+def insert_chunks_bulk(conn: Connection, chunks_tbl: Table, rows: Sequence[Dict[str, Any]]) -> int:
+    return _upsert_rows(conn, chunks_tbl, rows)
+
+
+def insert_vdb_refs_bulk(conn: Connection, vdb_tbl: Table, chunk_ids: Iterable[str], dim: int, collection: str) -> int:
+    now = datetime.now(timezone.utc)
+    rows = [{"chunk_id": cid, "collection": collection, "vector_dim": dim, "inserted_at": now} for cid in chunk_ids]
+    return _upsert_rows(conn, vdb_tbl, rows)
+
+
+def insert_triples_bulk(conn: Connection, gdb_tbl: Table, rows: Sequence[Dict[str, Any]]) -> int:
+    return _upsert_rows(conn, gdb_tbl, rows)
+
+
+def delete_chunks_bulk(conn: Connection, tables: Dict[str, Table], chunk_ids: Sequence[str]) -> int:
+    """Hapus baris chunk yang sudah tidak ada (chunks, vdb_refs, gdb_triples). Return jumlah chunk."""
+    if not chunk_ids:
+        return 0
+    ids = list(chunk_ids)
+    for name in ("vdb_refs", "gdb_triples"):
+        tbl = tables[name]
+        conn.execute(tbl.delete().where(tbl.c.chunk_id.in_(ids)))
+    tbl = tables["chunks"]
+    return conn.execute(tbl.delete().where(tbl.c.chunk_id.in_(ids))).rowcount
+
+
+def persist_document_bulk(
+    engine: Engine,
+    tables: Dict[str, Table],
+    *,
+    document: Dict[str, Any] | None = None,
+    chunks: Sequence[Dict[str, Any]] = (),
+    vdb_chunk_ids: Sequence[str] = (),
+    vector_dim: int | None = None,
+    collection: str | None = None,
+    triples: Sequence[Dict[str, Any]] = (),
+    stale_chunk_ids: Sequence[str] = (),
+    reextracted_chunk_ids: Sequence[str] = (),
+) -> Dict[str, int]:
+    """Tulis semua baris satu dokumen dalam SATU transaksi (rollback bersama jika gagal).
+
+    Semua tulisan idempotent (ON CONFLICT DO UPDATE), jadi re-ingest doc yang sama aman.
+    `stale_chunk_ids` (chunk run sebelumnya yang sudah tidak ada) dihapus di transaksi yang sama;
+    triple lama `reextracted_chunk_ids` (chunk yang teksnya berubah) dihapus sebelum triple baru ditulis.
+    Return jumlah baris per tabel.
+    """
+    counts: Dict[str, int] = {}
+    with span("sql.persist", rows=len(chunks) + len(vdb_chunk_ids) + len(triples) + (document is not None)), \
+            tx(engine) as conn:
+        if stale_chunk_ids:
+            counts["stale_chunks"] = delete_chunks_bulk(conn, tables, stale_chunk_ids)
+        if document is not None:
+            counts["documents"] = upsert_document(conn, tables["documents"], document)
+        counts["chunks"] = insert_chunks_bulk(conn, tables["chunks"], chunks)
+        counts["vdb_refs"] = insert_vdb_refs_bulk(
+            conn, tables["vdb_refs"], vdb_chunk_ids,
+            vector_dim or settings.EMBED_DIM, collection or settings.QDRANT_COLLECTION,
+        )
+        if reextracted_chunk_ids:
+            gdb = tables["gdb_triples"]
+            conn.execute(gdb.delete().where(gdb.c.chunk_id.in_(list(reextracted_chunk_ids))))
+        counts["gdb_triples"] = insert_triples_bulk(conn, tables["gdb_triples"], triples)
+    _log.info(f"✓ Persisted doc_id={(document or {}).get('doc_id', '-')} in one transaction: {counts}")
+    return counts
@@ -0,0 +1,117 @@
+"""Cache embedding persisten (SQLite), content-addressed.
+
+Key = sha256(EMBED_MODEL, EMBED_DIM, teks ternormalisasi) sehingga chunk yang
+sama (re-ingest file, chunk berulang antar dokumen, rebuild koleksi Qdrant)
+tidak di-embed ulang. Vektor disimpan sebagai blob float32.
+
+Eviction LRU berbasis ukuran: jika total blob > EMBED_CACHE_MAX_MB, entry
+dengan akses terlama dihapus sampai ~90% batas.
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence
+import hashlib, os, re, sqlite3, threading, time, unicodedata
+
+import numpy as np
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("embed-cache")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(text: str, model: str | None = None, dim: int | None = None) -> str:
+    model = model or settings.EMBED_MODEL
+    dim = dim or settings.EMBED_DIM
+    h = hashlib.sha256(f"{model}\x00{dim}\x00".encode("utf-8"))
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str | None = None, max_mb: int | None = None):
+        self.path = path or settings.EMBED_CACHE_PATH
+        self.max_bytes = (max_mb if max_mb is not None else settings.EMBED_CACHE_MAX_MB) * 1024 * 1024
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, dim INTEGER, vec BLOB, nbytes INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_access ON embeddings(last_access)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Lookup batch; entry yang ditemukan ditandai baru diakses (LRU)."""
+        found: Dict[str, np.ndarray] = {}
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(uniq), 500):  # batas parameter SQLite
+                part = uniq[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for k, blob in rows:
+                    found[k] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_access=? WHERE key=?", [(now, k) for k in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(uniq) - len(found)
+        return found
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        if not len(keys):
+            return
+        now = time.time()
+        vecs = np.ascontiguousarray(vectors, dtype=np.float32)
+        rows = [(k, int(v.shape[0]), v.tobytes(), int(v.nbytes), now) for k, v in zip(keys, vecs)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(key, dim, vec, nbytes, last_access) VALUES (?,?,?,?,?)", rows
+            )
+            self._conn.commit()
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed: List[str] = []
+        for k, nbytes in self._conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_access ASC"):
+            doomed.append(k)
+            freed += nbytes
+            if total - freed <= target:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key=?", [(k,) for k in doomed])
+        self._conn.commit()
+        _log.info(f"evicted {len(doomed)} entries ({freed / 1e6:.1f} MB)")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,74 @@
+"""Engine embedding batch untuk EMBED_MODEL (sentence-transformers).
+
+Dibanding `HuggingFaceEmbeddings.embed_documents` (list float Python, setting default):
+- teks diurutkan berdasarkan panjang lalu dipotong per EMBED_BATCH_SIZE
+  (length bucketing) -> padding per batch minimal (dynamic padding);
+- forward di bawah `torch.inference_mode()`;
+- opsional quantization dinamis int8 di CPU (EMBED_INT8);
+- output langsung `np.ndarray` float32 (n, dim) pada urutan input.
+
+Vektor identik dengan jalur lama karena memakai modul sentence-transformers
+yang sama (pooling + normalisasi dari konfigurasi model).
+"""
+from __future__ import annotations
+from typing import Sequence
+import os
+
+import numpy as np
+from settings import settings
+from telemetry import get_logger
+try:
+    import torch
+except Exception:  # torch may not be installed with GPU support
+    torch = None  # type: ignore
+
+_log = get_logger("embed")
+
+
+def _select_device() -> str:
+    # Allow override via env EMBED_DEVICE (e.g., "cuda:0" or "cpu")
+    override = os.getenv("EMBED_DEVICE")
+    if override:
+        return override
+    if torch is not None and torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+class EmbeddingEngine:
+    def __init__(self, model_name: str | None = None, *, batch_size: int | None = None,
+                 device: str | None = None, int8: bool | None = None):
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.util import batch_to_device
+
+        self.model_name = model_name or settings.EMBED_MODEL
+        self.batch_size = max(1, batch_size or settings.EMBED_BATCH_SIZE)
+        self.device = device or _select_device()
+        int8 = settings.EMBED_INT8 if int8 is None else int8
+        _log.info(f"loading model {self.model_name} on device={self.device} int8={int8 and self.device == 'cpu'}")
+        self.model = SentenceTransformer(self.model_name, device=self.device)
+        if int8 and self.device == "cpu":
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.eval()
+        self._to_device = batch_to_device
+        self.dim = int(self.model.get_sentence_embedding_dimension() or settings.EMBED_DIM)
+        if self.dim != settings.EMBED_DIM:
+            _log.warning(f"dimensi model {self.dim} != EMBED_DIM {settings.EMBED_DIM}")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts` -> float32 (len(texts), dim), urutan sama dengan input."""
+        n = len(texts)
+        out = np.empty((n, self.dim), dtype=np.float32)
+        if n == 0:
+            return out
+        # Bucketing: terpanjang dulu, sehingga tiap batch berisi teks dengan panjang mirip
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        with torch.inference_mode():
+            for start in range(0, n, self.batch_size):
+                idx = order[start:start + self.batch_size]
+                # tokenize() pad ke teks terpanjang di batch ini saja (dynamic padding)
+                features = self.model.tokenize([texts[i] for i in idx])
+                features = self._to_device(features, self.device)
+                emb = self.model(features)["sentence_embedding"]
+                out[idx] = emb.float().cpu().numpy()
+        return out
@@ -1,18 +1,81 @@
 from __future__ import annotations
 from typing import Sequence, List
-from langchain_huggingface import HuggingFaceEmbeddings
+import threading
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from embeddings.engine import EmbeddingEngine
+from embeddings.cache import EmbeddingCache, cache_key
 from settings import settings
+from telemetry import span
 
-_embedder: HuggingFaceEmbeddings | None = None
+_engine: EmbeddingEngine | None = None
+_embedder: "EngineEmbeddings | None" = None
+_cache: EmbeddingCache | None = None
+_lock = threading.Lock()  # load model sekali walau dipanggil paralel
 
-def get_embedder() -> HuggingFaceEmbeddings:
+def get_engine() -> EmbeddingEngine:
+    """Engine embedding shared per proses (satu salinan model)."""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = EmbeddingEngine()
+    return _engine
+
+def get_cache() -> EmbeddingCache | None:
+    global _cache
+    if _cache is None and settings.EMBED_CACHE_ENABLED:
+        with _lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+def release_embedder() -> None:
+    """Teardown: lepas model + tutup cache (di-load ulang lazily jika dipakai lagi)."""
+    global _engine, _embedder, _cache
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+        _engine = _embedder = _cache = None
+
+class EngineEmbeddings(Embeddings):
+    """Adapter LangChain `Embeddings` di atas `EmbeddingEngine` (untuk vector store).
+
+    Dokumen lewat `embed_texts`, jadi cache embedding dicek sebelum model dipanggil.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return embed_texts(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_engine().embed([text])[0].tolist()
+
+def get_embedder() -> EngineEmbeddings:
     global _embedder
     if _embedder is None:
-        _embedder = HuggingFaceEmbeddings(model_name=settings.EMBED_MODEL)
+        _embedder = EngineEmbeddings()
     return _embedder
 
-def embed_texts(texts: Sequence[str]) -> List[List[float]]:
-    return get_embedder().embed_documents(list(texts))
+def embed_texts(texts: Sequence[str]) -> np.ndarray:
+    """Embed batch -> np.ndarray float32 (n, EMBED_DIM).
+
+    Cache (EMBED_CACHE_ENABLED) dicek dulu; hanya teks unik yang miss dikirim ke model.
+    """
+    texts = list(texts)
+    cache = get_cache()
+    with span("embed", texts=len(texts)) as sp:
+        if cache is None or not texts:
+            sp.add(embedded=len(texts))
+            return get_engine().embed(texts)
+        keys = [cache_key(t) for t in texts]
+        found = cache.get_many(keys)
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        sp.add(embedded=len(missing))
+        if missing:
+            vecs = get_engine().embed(list(missing.values()))
+            cache.put_many(list(missing), vecs)
+            found.update(zip(missing, vecs))
+        return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
 
 def embed_query(text: str) -> List[float]:
     return get_embedder().embed_query(text)
@@ -0,0 +1,237 @@
+"""Cache respons LLM persisten (SQLite) untuk chain cleaning & extraction.
+
+Key = sha256(namespace, model, hash template prompt, input JSON ter-sort) sehingga
+re-ingest / backfill dengan prompt & teks yang sama tidak memanggil API lagi.
+Value disimpan sebagai JSON hasil *parsed* (str hasil cleaning, atau dump
+pydantic `ExtractionResult`) dan di-decode kembali saat hit.
+
+TTL (LLM_CACHE_TTL_HOURS, 0 = tanpa kadaluarsa) + eviction LRU berbasis ukuran
+(LLM_CACHE_MAX_MB), sama seperti cache embedding.
+
+Chain ter-memo per event loop (`memo_chain`): client async ChatOpenAI (httpx)
+terikat ke loop tempat ia pertama dipakai, jadi tiap loop mendapat chain sendiri;
+SQLite cache-nya tetap satu per proses.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Tuple
+import asyncio, hashlib, json, os, sqlite3, threading, time, weakref
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("llm-cache")
+
+_MISS = object()
+
+
+def template_hash(prompt: Any) -> str:
+    """Hash isi template prompt: ubah prompt -> key baru (entry lama otomatis tidak terpakai)."""
+    return hashlib.sha256(repr(prompt).encode("utf-8")).hexdigest()[:16]
+
+
+def _encode(value: Any) -> str:
+    if isinstance(value, BaseModel):
+        return json.dumps(value.model_dump(mode="json"), ensure_ascii=False)
+    return json.dumps(value, ensure_ascii=False)
+
+
+class LLMCache:
+    def __init__(self, path: str | None = None, max_mb: int | None = None, ttl_hours: float | None = None):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.max_bytes = (max_mb if max_mb is not None else settings.LLM_CACHE_MAX_MB) * 1024 * 1024
+        ttl = settings.LLM_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+        self.ttl = ttl * 3600 if ttl and ttl > 0 else None
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, namespace TEXT, value TEXT, nbytes INTEGER, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_access ON responses(last_access)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(namespace: str, model: str, tmpl_hash: str, payload: Dict[str, Any]) -> str:
+        h = hashlib.sha256(f"{namespace}\x00{model}\x00{tmpl_hash}\x00".encode("utf-8"))
+        h.update(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return JSON ter-decode, atau `_MISS`. Entry kadaluarsa dihapus saat dibaca."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key=?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and time.time() - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return _MISS
+            self._conn.execute("UPDATE responses SET last_access=? WHERE key=?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, namespace: str, value: Any) -> None:
+        data = _encode(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, namespace, value, nbytes, created_at, last_access)"
+                " VALUES (?,?,?,?,?,?)",
+                (key, namespace, data, len(data.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            self._conn.commit()
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed: List[str] = []
+        for k, nbytes in self._conn.execute("SELECT key, nbytes FROM responses ORDER BY last_access ASC"):
+            doomed.append(k)
+            freed += nbytes
+            if total - freed <= target:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key=?", [(k,) for k in doomed])
+        self._conn.commit()
+        _log.info(f"evicted {len(doomed)} entries ({freed / 1e6:.1f} MB)")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedChain(Runnable):
+    """Bungkus chain: cek cache dulu, panggil `chain` hanya saat miss.
+
+    Error dari chain diteruskan apa adanya (scheduler yang memutuskan retry);
+    `lookup` dipakai scheduler agar cache hit tidak memakan kuota rate limit.
+    """
+
+    def __init__(self, chain: Runnable, cache: LLMCache, *, namespace: str, model: str, prompt: Any,
+                 decode: Callable[[Any], Any] = lambda v: v):
+        self.chain = chain
+        self.cache = cache
+        self.namespace = namespace
+        self.model = model
+        self.tmpl_hash = template_hash(prompt)
+        self.decode = decode
+
+    def _key(self, payload: Dict[str, Any]) -> str:
+        return LLMCache.make_key(self.namespace, self.model, self.tmpl_hash, payload)
+
+    def lookup(self, payload: Dict[str, Any]) -> Tuple[bool, Any]:
+        value = self.cache.get(self._key(payload))
+        return (False, None) if value is _MISS else (True, self.decode(value))
+
+    def invoke(self, input: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> Any:
+        hit, value = self.lookup(input)
+        if hit:
+            return value
+        out = self.chain.invoke(input, config, **kwargs)
+        self.cache.put(self._key(input), self.namespace, out)
+        return out
+
+    async def ainvoke(self, input: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> Any:
+        hit, value = self.lookup(input)
+        if hit:
+            return value
+        return await self.afill(input, config, **kwargs)
+
+    async def afill(self, input: Dict[str, Any], config: RunnableConfig | None = None, **kwargs) -> Any:
+        """Panggil chain tanpa lookup (miss sudah diketahui) lalu simpan hasilnya."""
+        out = await self.chain.ainvoke(input, config, **kwargs)
+        self.cache.put(self._key(input), self.namespace, out)
+        return out
+
+
+_cache: LLMCache | None = None
+_chains: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Runnable]]" = weakref.WeakKeyDictionary()
+_pinned: Dict[str, Runnable] = {}  # chain tetap (fake benchmark/test), tidak terikat loop
+_lock = threading.RLock()  # memo_chain -> build -> get_llm_cache (re-entrant)
+
+
+def get_llm_cache() -> LLMCache | None:
+    global _cache
+    if _cache is None and settings.LLM_CACHE_ENABLED:
+        with _lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def with_cache(chain: Runnable, *, namespace: str, model: str, prompt: Any,
+               decode: Callable[[Any], Any] = lambda v: v) -> Runnable:
+    """Return `chain` terbungkus cache, atau `chain` apa adanya jika LLM_CACHE_ENABLED=false."""
+    cache = get_llm_cache()
+    if cache is None:
+        return chain
+    return CachedChain(chain, cache, namespace=namespace, model=model, prompt=prompt, decode=decode)
+
+
+def _target_loop() -> asyncio.AbstractEventLoop:
+    """Loop tempat chain akan dipakai: loop yang sedang jalan, atau loop scheduler untuk pemanggil sync."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        from llm.scheduler import get_loop
+        return get_loop()
+
+
+def memo_chain(name: str, build: Callable[[], Runnable]) -> Runnable:
+    """Chain (client ChatOpenAI + cache) dibangun sekali per event loop per `name`."""
+    pinned = _pinned.get(name)
+    if pinned is not None:
+        return pinned
+    loop = _target_loop()
+    with _lock:
+        chains = _chains.get(loop)
+        if chains is None:
+            chains = _chains[loop] = {}
+        if name not in chains:
+            chains[name] = build()
+        return chains[name]
+
+
+def pin_chain(name: str, chain: Runnable) -> None:
+    """Pakai `chain` untuk `name` di semua loop (fake benchmark / test); dilepas `release_llm`."""
+    with _lock:
+        _pinned[name] = chain
+
+
+def release_llm() -> None:
+    """Teardown: buang chain ter-memo + tutup cache."""
+    global _cache
+    with _lock:
+        _chains.clear()
+        _pinned.clear()
+        if _cache is not None:
+            _cache.close()
+        _cache = None
@@ -1,12 +1,200 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Tuple
+import re
+
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from settings import settings
+from telemetry import get_logger, span
+from llm.scheduler import run_ordered, estimate_tokens
+from llm.cache import memo_chain, with_cache
+
+_log = get_logger("clean")
+
+_SYSTEM = "You clean ASR text. Remove fillers, fix casing/punctuation, keep meaning; no hallucinations."
 
 _PROMPT = ChatPromptTemplate.from_messages([
-    ("system","You clean ASR text. Remove fillers, fix casing/punctuation, keep meaning; no hallucinations."),
+    ("system", _SYSTEM),
     ("user","Raw transcript:\n\n{raw}\n\nReturn the cleaned transcript.")
 ])
 
+# Mode windowed: konteks (overlap window sebelumnya) hanya untuk dibaca, tidak ikut dikembalikan
+_WINDOW_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM + " You receive one window of a longer transcript."),
+    ("user","Previous context (do NOT include in output):\n{context}\n\n"
+            "Raw transcript window:\n\n{raw}\n\nReturn only the cleaned window; keep its line and paragraph breaks.")
+])
+
+_SENT_RE = re.compile(r"(?<=[.!?…])\s+")
+_FILLER_RE = re.compile(r"\b(um+|uh+|hmm+|e+m+|ee+|eh+|anu|apa namanya|you know|i mean)\b", re.IGNORECASE)
+_REPEAT_RE = re.compile(r"\b(\w+)(\s+\1\b)+", re.IGNORECASE)
+_WORD_RE = re.compile(r"\S+")
+
+Span = Tuple[int, int]
+
+
+def _llm() -> ChatOpenAI:
+    # retry hanya di scheduler (LLM_MAX_RETRIES), bukan bertingkat dengan retry internal client
+    return ChatOpenAI(model=settings.CLEAN_LLM_MODEL, temperature=0, api_key=settings.OPENAI_API_KEY, max_retries=0)
+
+
 def get_clean_chain():
-    llm = ChatOpenAI(model=settings.CLEAN_LLM_MODEL, temperature=0, api_key=settings.OPENAI_API_KEY)
-    return _PROMPT | llm
+    """Chain single-shot (seluruh transcript satu prompt) -> str. Ter-memo + cache respons."""
+    return memo_chain("clean", lambda: with_cache(
+        _PROMPT | _llm() | StrOutputParser(),
+        namespace="clean", model=settings.CLEAN_LLM_MODEL, prompt=_PROMPT,
+    ))
+
+
+def get_window_clean_chain():
+    """Chain per window ({context}, {raw}) -> str. Ter-memo; cache respons = cache per window."""
+    return memo_chain("clean_window", lambda: with_cache(
+        _WINDOW_PROMPT | _llm() | StrOutputParser(),
+        namespace="clean_window", model=settings.CLEAN_LLM_MODEL, prompt=_WINDOW_PROMPT,
+    ))
+
+
+def _est_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _strip(raw: str, s: int, e: int) -> Span:
+    while s < e and raw[s].isspace():
+        s += 1
+    while e > s and raw[e - 1].isspace():
+        e -= 1
+    return s, e
+
+
+def _unit_spans(raw: str, sentences: Sequence[Dict[str, Any]] | None) -> List[Span]:
+    """Offset segmen bertimestamp di `raw` (dicari berurutan); kalimat jika ada yang tidak ketemu."""
+    spans: List[Span] = []
+    pos = 0
+    for seg in sentences or []:
+        t = seg.get("text", "").strip()
+        if not t:
+            continue
+        i = raw.find(t, pos)
+        if i < 0:
+            spans = []
+            break
+        spans.append((i, i + len(t)))
+        pos = i + len(t)
+    if spans:
+        return spans
+    pos = 0
+    for m in _SENT_RE.finditer(raw):
+        spans.append(_strip(raw, pos, m.start()))
+        pos = m.end()
+    spans.append(_strip(raw, pos, len(raw)))
+    return [(s, e) for s, e in spans if e > s]
+
+
+def split_units(raw: str, sentences: Sequence[Dict[str, Any]] | None = None) -> List[Span]:
+    """Unit terkecil window (offset ke `raw`): segmen bertimestamp dari STT jika ada, kalau tidak kalimat.
+
+    Unit yang sendirian melebihi budget (ASR tanpa tanda baca) dipotong per kata.
+    """
+    budget = settings.CLEAN_WINDOW_TOKENS
+    out: List[Span] = []
+    for s, e in _unit_spans(raw, sentences):
+        if _est_tokens(raw[s:e]) <= budget:
+            out.append((s, e))
+            continue
+        start = -1
+        for m in _WORD_RE.finditer(raw, s, e):
+            if start < 0:
+                start = m.start()
+            if _est_tokens(raw[start:m.end()]) >= budget:
+                out.append((start, m.end())); start = -1
+        if start >= 0:
+            out.append((start, e))
+    return out
+
+
+def plan_clean_windows(raw: str, units: Sequence[Span]) -> List[Tuple[str, int, int]]:
+    """Kelompokkan unit ke window <= CLEAN_WINDOW_TOKENS.
+
+    Return [(context, start, end)]: window = raw[start:end] (separator di dalamnya
+    utuh), context = CLEAN_OVERLAP_UNITS unit terakhir window sebelumnya (read-only),
+    sehingga stitching cukup konkatenasi berurutan dengan separator aslinya.
+    """
+    budget, overlap = settings.CLEAN_WINDOW_TOKENS, settings.CLEAN_OVERLAP_UNITS
+    windows: List[List[Span]] = []
+    cur: List[Span] = []
+    size = 0
+    for s, e in units:
+        t = _est_tokens(raw[s:e])
+        if cur and size + t > budget:
+            windows.append(cur); cur, size = [], 0
+        cur.append((s, e)); size += t
+    if cur:
+        windows.append(cur)
+    plan = []
+    for i, w in enumerate(windows):
+        prev = windows[i - 1][-overlap:] if i and overlap > 0 else []
+        ctx = raw[prev[0][0]:prev[-1][1]] if prev else ""
+        plan.append((ctx, w[0][0], w[-1][1]))
+    return plan
+
+
+def looks_clean(text: str) -> bool:
+    """Heuristik murah: tanpa filler/pengulangan kata, kapitalisasi & tanda baca wajar."""
+    if _FILLER_RE.search(text) or _REPEAT_RE.search(text):
+        return False
+    sents = [s for s in _SENT_RE.split(text.strip()) if s]
+    if not sents or not text.rstrip()[-1:] in ".!?…\"'":
+        return False
+    return all(s[:1].isupper() or not s[:1].isalpha() for s in sents)
+
+
+def _clean_single(raw: str, chain: Any = None) -> str:
+    """CLEAN_WINDOWED=false: seluruh transcript satu prompt (fail-soft ke teks mentah)."""
+    text = raw.strip()
+    if not text or (settings.CLEAN_SKIP_HEURISTIC and looks_clean(text)):
+        return text
+    payload = {"raw": text}
+    with span("llm.clean", windows=1, tokens_est=estimate_tokens(payload)):
+        res = run_ordered(chain or get_clean_chain(), [payload])[0]
+    if isinstance(res, Exception):
+        _log.warning(f"cleaning gagal -> pakai teks mentah: {res}")
+        return text
+    return str(res).strip()
+
+
+def clean_transcript(raw: str, sentences: Sequence[Dict[str, Any]] | None = None, chain: Any = None) -> str:
+    """Cleaning map-reduce: window ber-budget token dibersihkan konkuren lalu disambung urut.
+
+    Window yang sudah bersih (heuristik, jika CLEAN_SKIP_HEURISTIC) tidak dikirim ke LLM, window yang sudah
+    pernah dibersihkan diambil dari cache respons (llm/cache.py); window yang
+    gagal fail-soft ke teks mentahnya. Antar window disambung dengan separator
+    asli di `raw` (baris / paragraf tetap).
+    """
+    if not settings.CLEAN_WINDOWED:
+        return _clean_single(raw, chain)
+    plan = plan_clean_windows(raw, split_units(raw, sentences))
+    if not plan:
+        return ""
+    out: List[str] = [raw[s:e] for _, s, e in plan]
+    todo: List[int] = []
+    for i, text in enumerate(out):
+        if not (settings.CLEAN_SKIP_HEURISTIC and looks_clean(text)):
+            todo.append(i)
+    if todo:
+        chain = chain or get_window_clean_chain()
+        payloads = [{"context": plan[i][0] or "-", "raw": out[i]} for i in todo]
+        with span("llm.clean", windows=len(payloads), tokens_est=sum(estimate_tokens(p) for p in payloads)):
+            results = run_ordered(chain, payloads)
+        for i, res in zip(todo, results):
+            if isinstance(res, Exception):
+                _log.warning(f"window {i} gagal -> pakai teks mentah: {res}")
+                continue
+            out[i] = str(res).strip()
+    _log.info(f"windows={len(plan)} to_llm={len(todo)} skip_clean={len(plan) - len(todo)}")
+    parts: List[str] = []
+    for i, text in enumerate(out):
+        if i:
+            parts.append(raw[plan[i - 1][2]:plan[i][1]])  # separator asli antar window
+        parts.append(text)
+    return "".join(parts)
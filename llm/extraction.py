@@ -2,12 +2,38 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from settings import settings
 from models.schemas import ExtractionResult
+from llm.scheduler import run_ordered, estimate_tokens
+from llm.cache import memo_chain, with_cache
+from telemetry import span
+from typing import Any, List, Sequence
 
 _PROMPT = ChatPromptTemplate.from_messages([
     ("system","Extract entities (canonical+aliases) and relation triples (s,p,o) from text. Confidence 0-1. Only grounded facts."),
     ("user","Text:\n\n{chunk}\n\nReturn structured JSON.")
 ])
 
+def _build_extract_chain():
+    # retry hanya di scheduler (LLM_MAX_RETRIES), bukan bertingkat dengan retry internal client
+    llm = ChatOpenAI(model=settings.EXTRACT_LLM_MODEL, temperature=0, api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return with_cache(
+        _PROMPT | llm.with_structured_output(ExtractionResult),
+        namespace="extract", model=settings.EXTRACT_LLM_MODEL, prompt=_PROMPT,
+        decode=ExtractionResult.model_validate,
+    )
+
 def get_extract_chain():
-    llm = ChatOpenAI(model=settings.EXTRACT_LLM_MODEL, temperature=0, api_key=settings.OPENAI_API_KEY)
-    return _PROMPT | llm.with_structured_output(ExtractionResult)
+    """Chain extraction (+ cache respons) ter-memo per proses."""
+    return memo_chain("extract", _build_extract_chain)
+
+def extract_chunks(texts: Sequence[str], chain: Any = None) -> List[Any]:
+    """Extraction konkuren (LLM_CONCURRENCY, limit RPM/TPM, retry 429/5xx).
+
+    Return list urut input: ExtractionResult, atau Exception untuk chunk yang gagal.
+    """
+    chain = chain or get_extract_chain()
+    payloads = [{"chunk": t} for t in texts]
+    with span("llm.extract", chunks=len(payloads), tokens_est=sum(estimate_tokens(p) for p in payloads)) as sp:
+        results = run_ordered(chain, payloads)
+        sp.add(failed=sum(isinstance(r, Exception) for r in results),
+               triples=sum(len(getattr(r, "triples", None) or []) for r in results))
+    return results
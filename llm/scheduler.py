@@ -0,0 +1,171 @@
+"""Scheduler async untuk memanggil chain LLM secara konkuren tapi sopan terhadap rate limit.
+
+- Konkurensi dibatasi semaphore (`concurrency`).
+- Dua token bucket: request/menit (LLM_RPM) dan token/menit (LLM_TPM, estimasi).
+  Bucket process-wide (`get_bucket`): kuota dipakai bersama semua panggilan,
+  thread, dan event loop, tidak reset tiap dokumen.
+- Retry dengan exponential backoff + jitter untuk 429 / 5xx / error koneksi
+  (satu-satunya lapisan retry: client ChatOpenAI dibuat dengan max_retries=0).
+- Hasil dikembalikan urut input; item yang tetap gagal berisi Exception-nya.
+- `run_ordered` (sync) menjalankan semua batch di SATU event loop long-lived
+  di thread daemon, sehingga client async ter-memo tetap terikat ke loop yang sama.
+
+Chain apa pun yang punya `ainvoke` bisa dipakai (mis. fake chat model untuk test).
+Jika chain punya `lookup(payload)` (lihat `llm.cache.CachedChain`), cache hit
+dikembalikan langsung tanpa memakan kuota rate limit.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import asyncio, os, random, threading, time
+
+from settings import settings
+
+_RETRYABLE_NAMES = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailableError"}
+
+
+class TokenBucket:
+    """Token bucket: `rate_per_minute` token diisi ulang kontinu, kapasitas = 1 menit.
+
+    State dijaga `threading.Lock` (bukan asyncio.Lock) sehingga satu bucket aman
+    dipakai dari beberapa thread / event loop; menunggu tetap via `asyncio.sleep`.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = max(1e-6, rate_per_minute) / 60.0
+        self.capacity = max(1.0, float(rate_per_minute))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Ambil `amount` token jika cukup (return 0), selain itu return detik tunggu."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[Tuple[str, float], TokenBucket] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_thread: threading.Thread | None = None
+_loop_pid: int | None = None
+_lock = threading.Lock()
+
+
+def get_bucket(kind: str, rate_per_minute: float) -> TokenBucket:
+    """Bucket process-wide per (jenis, rate), mis. ("rpm", 500)."""
+    key = (kind, float(rate_per_minute))
+    with _lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate_per_minute)
+    return bucket
+
+
+def _status_code(e: BaseException) -> int | None:
+    code = getattr(e, "status_code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(e: BaseException) -> bool:
+    code = _status_code(e)
+    if code is not None:
+        return code == 429 or 500 <= code < 600
+    return type(e).__name__ in _RETRYABLE_NAMES or isinstance(e, (asyncio.TimeoutError, ConnectionError))
+
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    """Estimasi kasar token request (input ~4 char/token + overhead prompt & output)."""
+    chars = sum(len(v) for v in payload.values() if isinstance(v, str))
+    return chars // 4 + settings.LLM_TOKEN_OVERHEAD
+
+
+async def arun_ordered(
+    chain: Any,
+    inputs: Sequence[Dict[str, Any]],
+    *,
+    concurrency: int | None = None,
+    rpm: float | None = None,
+    tpm: float | None = None,
+    max_retries: int | None = None,
+    token_estimator: Callable[[Dict[str, Any]], int] = estimate_tokens,
+) -> List[Any]:
+    """Jalankan `chain.ainvoke` untuk tiap input; return list hasil/Exception urut input."""
+    sem = asyncio.Semaphore(max(1, concurrency or settings.LLM_CONCURRENCY))
+    req_bucket = get_bucket("rpm", rpm or settings.LLM_RPM)
+    tok_bucket = get_bucket("tpm", tpm or settings.LLM_TPM)
+    retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+
+    lookup = getattr(chain, "lookup", None)
+    call = getattr(chain, "afill", chain.ainvoke) if lookup is not None else chain.ainvoke
+
+    async def _one(payload: Dict[str, Any]) -> Any:
+        if lookup is not None:
+            hit, value = lookup(payload)
+            if hit:
+                return value
+        async with sem:
+            for attempt in range(retries + 1):
+                await req_bucket.acquire(1)
+                await tok_bucket.acquire(token_estimator(payload))
+                try:
+                    return await call(payload)
+                except Exception as e:
+                    if attempt >= retries or not is_retryable(e):
+                        return e
+                    # full jitter: sleep acak di [0, base * 2^attempt], dibatasi LLM_BACKOFF_MAX
+                    delay = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * (2 ** attempt))
+                    await asyncio.sleep(random.uniform(0, delay))
+
+    return list(await asyncio.gather(*(_one(p) for p in inputs)))
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Event loop scheduler (thread daemon, dibuat sekali per proses; dibuat ulang setelah fork)."""
+    global _loop, _loop_thread, _loop_pid
+    with _lock:
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-scheduler", daemon=True)
+            thread.start()
+            _loop, _loop_thread, _loop_pid = loop, thread, os.getpid()
+    return _loop
+
+
+def run_ordered(chain: Any, inputs: Sequence[Dict[str, Any]], **kwargs) -> List[Any]:
+    """Versi sync `arun_ordered` (aman dipanggil dari node LangGraph / thread mana pun)."""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_ordered dipanggil dari loop scheduler; pakai `await arun_ordered(...)`")
+    return asyncio.run_coroutine_threadsafe(arun_ordered(chain, inputs, **kwargs), loop).result()
+
+
+def shutdown_scheduler() -> None:
+    """Teardown: hentikan loop scheduler + reset bucket (dipanggil `pipelines.resources.teardown`)."""
+    global _loop, _loop_thread, _loop_pid
+    with _lock:
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = _loop_pid = None
+        _buckets.clear()
+    if loop is not None and not loop.is_closed() and thread is not None and thread.is_alive():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
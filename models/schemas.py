@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Dict, Any, TypedDict
+from typing import List, Dict, Any, Optional, Tuple, TypedDict
 from enum import Enum
 from pydantic import BaseModel, Field
 from langchain_core.documents import Document
@@ -47,10 +47,21 @@ class PipeState(TypedDict, total=False):
     language: str
     file_path: str
     file_name: str
+    source_path: str  # path file asli (file_path bisa diganti file interim _16k.wav)
+    content_hash: str  # sha256 isi file asli (manifest incremental)
+    force: bool  # abaikan manifest: embed/extract ulang semua chunk
+    _resume: Optional[str]  # stage checkpoint terakhir yang dimuat ("" = tidak ada)
+    persist_ok: bool  # semua subsystem persist sukses (checkpoint dihapus)
 
     # audio/video
+    _audio_16k: Any  # np.ndarray float32 16k mono (mode in-memory), dilepas setelah STT
+    _tmp_chunk_files: List[str]  # segmen di disk (mode AUDIO_SEGMENT_TO_DISK)
+    speech_windows: Optional[List[Tuple[int, int]]]  # span sample hasil VAD (None = window fixed)
+    vad_stats: Dict[str, Any]  # ringkasan VAD (total/speech/skipped seconds)
+    stt_workers: Dict[int, Dict[str, float]]  # timing per worker (mode STT_PROCESSES)
     transcript_raw_segments: List[Dict[str, Any]]
     transcript_full: str
+    transcript_sentences: List[Dict[str, Any]]  # [{"start","end","text"}] offset detik global
     transcript_clean: str
 
     # image/document
@@ -59,4 +70,5 @@ class PipeState(TypedDict, total=False):
 
     # hasil umum
     chunks: List[Document]
+    chunk_vectors: Any  # np.ndarray (len(chunks), EMBED_DIM) dari chunker semantic (SEMANTIC_REUSE_VECTORS) / None
     extraction: Dict[str, Any]
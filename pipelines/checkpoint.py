@@ -0,0 +1,117 @@
+"""Checkpoint per stage untuk graph audio (resume setelah gagal di stage belakang).
+
+Setelah stage `stt`, `clean`, dan `chunk` selesai, artefak state (segmen,
+transcript, teks bersih, chunk) di-pickle ke CHECKPOINT_DIR dengan key
+doc_id + hash isi file + stage + hash konfigurasi stage itu (kumulatif: ganti model STT
+membatalkan checkpoint clean/chunk juga). Saat file yang sama diproses lagi,
+node pertama yang jalan memuat checkpoint paling akhir yang valid dan semua
+stage sampai titik itu dilewati. Checkpoint dihapus setelah persist sukses.
+doc_id ikut di key: salinan rekaman yang sama di path lain punya doc_id lain,
+jadi tidak memuat chunk (metadata doc_id) atau menghapus checkpoint file lain.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List
+import glob, hashlib, json, os, pickle
+
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("checkpoint")
+
+# Stage yang hasilnya disimpan + setting yang memengaruhi hasilnya (kumulatif ke bawah)
+STAGE_CONFIG: Dict[str, List[str]] = {
+    # windowing, overlap & mode load audio menentukan batas segmen -> hasil stitching
+    "stt": ["STT_MODEL", "STT_BACKEND", "STT_BATCH_SIZE", "SAMPLE_RATE", "WINDOW_SECONDS", "AUDIO_OVERLAP_SECONDS",
+            "AUDIO_STREAMING", "AUDIO_STREAM_BLOCK_SECONDS", "ENABLE_VAD", "VAD_FRAME_MS", "VAD_MIN_DB",
+            "VAD_MARGIN_DB", "VAD_MIN_SPEECH_MS", "VAD_MIN_SILENCE_MS", "VAD_PAD_MS", "VAD_WARMUP_SECONDS"],
+    "clean": ["CLEAN_LLM_MODEL", "CLEAN_WINDOWED", "CLEAN_WINDOW_TOKENS", "CLEAN_OVERLAP_UNITS", "CLEAN_SKIP_HEURISTIC"],
+    "chunk": ["CHUNK_MAX_TOKENS", "CHUNK_OVERLAP_TOKENS", "EMBED_MODEL", "CHUNK_STRATEGY",
+              "SEMANTIC_BREAKPOINT_PERCENTILE", "SEMANTIC_CONTEXT_SENTENCES", "SEMANTIC_REUSE_VECTORS"],
+}
+CHECKPOINT_STAGES = list(STAGE_CONFIG)
+
+# Key state yang dibawa checkpoint (snapshot kumulatif, cukup untuk melanjutkan graph)
+ARTIFACT_KEYS = [
+    "language", "speech_windows", "vad_stats", "stt_workers", "transcript_raw_segments", "transcript_full",
+    "transcript_sentences", "transcript_clean", "chunks", "chunk_vectors",
+]
+
+
+def _enabled(state: Dict[str, Any]) -> bool:
+    return settings.CHECKPOINT_ENABLED and bool(state.get("content_hash"))
+
+
+def stage_config_hash(stage: str, state: Dict[str, Any]) -> str:
+    upto = CHECKPOINT_STAGES[: CHECKPOINT_STAGES.index(stage) + 1]
+    cfg = {name: getattr(settings, name, None) for st in upto for name in STAGE_CONFIG[st]}
+    cfg["language"] = state.get("language")
+    return hashlib.sha256(json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def _prefix(state: Dict[str, Any]) -> str:
+    return f"{state.get('doc_id') or 'nodoc'}.{state['content_hash'][:32]}"
+
+
+def _path(state: Dict[str, Any], stage: str) -> str:
+    return os.path.join(settings.CHECKPOINT_DIR, f"{_prefix(state)}.{stage}.{stage_config_hash(stage, state)}.pkl")
+
+
+def save(state: Dict[str, Any], stage: str) -> None:
+    os.makedirs(settings.CHECKPOINT_DIR, exist_ok=True)
+    path = _path(state, stage)
+    snap = {k: state[k] for k in ARTIFACT_KEYS if k in state}
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)  # atomic: checkpoint setengah tertulis tidak pernah terbaca
+
+
+def latest(state: Dict[str, Any]) -> tuple[str | None, Dict[str, Any]]:
+    """(stage, snapshot) checkpoint valid paling akhir untuk file ini, atau (None, {})."""
+    for stage in reversed(CHECKPOINT_STAGES):
+        path = _path(state, stage)
+        if os.path.isfile(path):
+            try:
+                with open(path, "rb") as f:
+                    return stage, pickle.load(f)
+            except Exception as e:
+                _log.warning(f"{path} tidak terbaca, diabaikan: {e}")
+    return None, {}
+
+
+def clear(state: Dict[str, Any]) -> None:
+    for path in glob.glob(os.path.join(settings.CHECKPOINT_DIR, glob.escape(_prefix(state)) + ".*.pkl")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def wrap(stages: List[str], name: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]]):
+    """Bungkus node graph: resume dari checkpoint, simpan artefak, bersihkan setelah persist."""
+    order = list(stages)
+
+    def node(state):
+        if not _enabled(state):
+            return fn(state)
+        if state.get("_resume") is None:
+            stage, snap = latest(state)
+            state["_resume"] = stage or ""
+            if stage:
+                state.update(snap)
+                _log.info(f"{state.get('file_name')}: lanjut setelah stage '{stage}'")
+        resume = state["_resume"]
+        if resume and order.index(name) <= order.index(resume):
+            return state  # hasil stage ini sudah ada di snapshot
+        out = fn(state)
+        if name in STAGE_CONFIG:
+            try:
+                save(out, name)
+            except Exception as e:
+                _log.warning(f"gagal simpan stage {name}: {e}")
+        if out.get("persist_ok"):
+            clear(out)
+        return out
+
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
@@ -0,0 +1,144 @@
+"""Driver ingestion paralel level dokumen.
+
+File dialirkan lewat dua stage yang berjalan bersamaan:
+- front (`FRONT_STAGES`: decode + VAD + STT, CPU-bound) di process pool
+  (`processes` > 0) atau satu thread di proses utama (`processes` = 0);
+- back (`BACK_STAGES`: cleaning, chunking, extraction, persist; network/IO-bound)
+  di thread pool `workers`.
+
+Jadi STT file N+1 overlap dengan LLM/DB file N. Backpressure: hasil front yang
+menunggu back + front yang sedang jalan dibatasi `queue_size`, sehingga
+transcript tidak menumpuk di memori saat back lebih lambat.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import multiprocessing as mp
+import os, time
+
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("driver")
+
+_front_graph = None
+_back_graph = None
+
+
+def _front_init() -> None:
+    """Initializer worker proses front: STT single-process di dalam worker + warm-up model."""
+    global _front_graph
+    settings.STT_PROCESSES = 0  # tidak membuat pool STT bersarang
+    from pipelines.graph_audio import build_graph, FRONT_STAGES
+    from pipelines.resources import warmup
+    _front_graph = build_graph(FRONT_STAGES)
+    warmup(stt=True, embed=False, qdrant=False, sql=False, neo4j=False)
+
+
+def _run_front(state: Dict[str, Any]) -> Tuple[Dict[str, Any], float, int]:
+    global _front_graph
+    if _front_graph is None:
+        from pipelines.graph_audio import build_graph, FRONT_STAGES
+        _front_graph = build_graph(FRONT_STAGES)
+    t0 = time.perf_counter()
+    out = _front_graph.invoke(state)
+    out.pop("_audio_16k", None)  # jangan kirim array audio balik lewat pickle
+    return dict(out), time.perf_counter() - t0, os.getpid()
+
+
+def _run_back(state: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    global _back_graph
+    if _back_graph is None:
+        from pipelines.graph_audio import build_graph, BACK_STAGES
+        _back_graph = build_graph(BACK_STAGES)
+    t0 = time.perf_counter()
+    out = _back_graph.invoke(state)
+    return dict(out), time.perf_counter() - t0
+
+
+def run_pipelined(
+    paths: Iterable[str],
+    make_state: Callable[[str], Dict[str, Any]],
+    *,
+    workers: int = 2,
+    processes: int = 0,
+    queue_size: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Proses semua `paths`; return laporan per file (urut selesai).
+
+    Laporan: {"file", "doc_id", "status", "stt_s", "text_s", "total_s", "stt_pid", "error"};
+    status = ok | partial (persist_ok=False: sebagian store gagal, diulang run berikutnya) | failed.
+    """
+    pending = deque(paths)
+    workers = max(1, workers)
+    if processes > 0:
+        front_pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=mp.get_context("spawn"), initializer=_front_init
+        )
+    else:
+        front_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="front")
+    back_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="back")
+    limit = queue_size or max(1, processes) * 2
+
+    front: Dict[Future, Tuple[str, float]] = {}
+    back: Dict[Future, Dict[str, Any]] = {}
+    ready: deque = deque()  # (state, report) menunggu slot back
+    reports: List[Dict[str, Any]] = []
+    t_run = time.perf_counter()
+
+    def _finish(rep: Dict[str, Any]) -> None:
+        rep["total_s"] = round(time.perf_counter() - rep.pop("_t0"), 2)
+        reports.append(rep)
+        _log.info(f"{len(reports)} selesai | {rep['status']} {rep['file']} "
+                  f"stt={rep['stt_s'] or '-'}s text={rep['text_s'] or '-'}s total={rep['total_s']}s"
+                  + (f" error={rep['error']}" if rep["error"] else ""))
+
+    try:
+        while pending or front or back or ready:
+            while pending and len(front) + len(ready) < limit:
+                path = pending.popleft()
+                front[front_pool.submit(_run_front, make_state(path))] = (path, time.perf_counter())
+            while ready and len(back) < workers:
+                state, rep = ready.popleft()
+                back[back_pool.submit(_run_back, state)] = rep
+            done, _ = wait(list(front) + list(back), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in front:
+                    path, t0 = front.pop(fut)
+                    rep = {"file": os.path.basename(path), "doc_id": None, "status": "ok",
+                           "stt_s": None, "text_s": None, "stt_pid": None, "error": None, "_t0": t0}
+                    try:
+                        state, dt, pid = fut.result()
+                    except Exception as e:
+                        rep.update(status="failed", error=f"stt: {e}")
+                        _finish(rep)
+                        continue
+                    rep.update(doc_id=state.get("doc_id"), stt_s=round(dt, 2), stt_pid=pid)
+                    ready.append((state, rep))
+                else:
+                    rep = back.pop(fut)
+                    try:
+                        out, dt = fut.result()
+                        rep["text_s"] = round(dt, 2)
+                        if out.get("persist_ok") is False:
+                            rep.update(status="partial", error="persist: sebagian store gagal")
+                    except Exception as e:
+                        rep.update(status="failed", error=f"text: {e}")
+                    _finish(rep)
+    finally:
+        front_pool.shutdown(wait=True, cancel_futures=True)
+        back_pool.shutdown(wait=True, cancel_futures=True)
+    wall = time.perf_counter() - t_run
+    _log.info(f"{len(reports)} file dalam {wall:.1f}s (workers={workers}, processes={processes})")
+    return reports
+
+
+def format_summary(reports: List[Dict[str, Any]]) -> str:
+    """Tabel ringkas per file untuk log akhir run."""
+    rows = [("file", "status", "stt_s", "text_s", "total_s", "doc_id / error")]
+    for r in reports:
+        rows.append((r["file"], r["status"], str(r["stt_s"] or "-"), str(r["text_s"] or "-"),
+                     str(r["total_s"]), str(r["error"] or r["doc_id"] or "-")))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(c.ljust(w) for c, w in zip(row, widths)) for row in rows)
@@ -3,19 +3,41 @@ from datetime import datetime, timezone
 from langgraph.graph import StateGraph, END
 from models.schemas import PipeState, Language, SourceType
 from models.metadata import build_document_meta, build_chunk_meta
-from audio.preprocess import resample_to_16k_mono, split_audio_with_overlap, transcribe_segments_parallel, merge_overlap_text
-from audio.stt import _get_asr
-from llm.cleaning import get_clean_chain
+from audio.preprocess import (
+    can_stream, load_16k_mono, resample_to_16k_mono, split_audio_with_overlap,
+    segment_windows, stream_segment_windows, stream_vad_segment_windows,
+)
+from audio.stitch import stitch_segments
+from audio.vad import detect_windows, vad_report
+from audio.stt import transcribe_segments
+from llm.cleaning import clean_transcript
 from chunking.dispatcher import dispatch_chunk
-from llm.extraction import get_extract_chain
-from db.sql import init_sql_engine, init_sql_schema, insert_document, insert_chunk, insert_vdb_ref, insert_triple
-from db.qdrant_store import upsert_documents
-from db.neo4j_store import upsert_triples
+from chunking.semantic_chunker import chunk_semantic_with_vectors
+from chunking.tokens import count_tokens
+from llm.extraction import get_extract_chain, extract_chunks
+from db.sql import get_sql_context, persist_document_bulk, triple_row
+from db.qdrant_store import upsert_documents, delete_chunks
+from db.manifest import get_manifest, pipeline_lineage
+from db.neo4j_store import upsert_triples_bulk, delete_chunk_provenance, triple_rows as neo4j_triple_rows
+from pipelines import checkpoint
 from settings import settings
+import telemetry
+from telemetry import get_logger
+
+def _use_streaming(state: PipeState) -> bool:
+    return settings.AUDIO_STREAMING and not settings.AUDIO_SEGMENT_TO_DISK and can_stream(state["file_path"])
 
 def node_preprocess(state: PipeState) -> PipeState:
-    # Simpan file resample ke folder interim agar raw tetap bersih
-    base_dir = os.path.dirname(state["file_path"])
+    # Streaming: decode dilakukan incremental di node_stt (tidak ada yang dimuat di sini)
+    if _use_streaming(state):
+        return state
+
+    # Decode + resample sekali ke array in-memory (tanpa file interim)
+    if not settings.AUDIO_SEGMENT_TO_DISK:
+        state["_audio_16k"] = load_16k_mono(state["file_path"])
+        return state
+
+    # Mode debug: simpan file resample ke folder interim agar raw tetap bersih
     interim_dir = "data/interim/audio"
     os.makedirs(interim_dir, exist_ok=True)
     
@@ -27,102 +49,183 @@ def node_preprocess(state: PipeState) -> PipeState:
     state["file_path"] = out16
     return state
 
+def node_vad(state: PipeState) -> PipeState:
+    # Mode debug (segmen di disk) tetap pakai window fixed seperti sebelumnya
+    state["speech_windows"] = None
+    if not settings.ENABLE_VAD or settings.AUDIO_SEGMENT_TO_DISK:
+        return state
+    if state.get("_audio_16k") is None:
+        return state  # streaming: VAD dihitung di decode yang sama dengan STT (node_stt), bukan pass terpisah
+    spans, total = detect_windows([state["_audio_16k"]])
+    _set_vad(state, spans, total)
+    return state
+
+def _set_vad(state: PipeState, spans, total: int) -> None:
+    state["speech_windows"] = spans
+    state["vad_stats"] = vad_report(spans, total)
+    get_logger("vad").info(f"{state['file_name']}: {state['vad_stats']['windows']} window, skip {state['vad_stats']['skipped_seconds']}s "
+                           f"dari {state['vad_stats']['total_seconds']}s")
+
 def node_stt(state: PipeState) -> PipeState:
-    parts = split_audio_with_overlap(state["file_path"])
-    state["_tmp_chunk_files"] = parts
-    asr = _get_asr()
-    def _one(pth, lang):
-        if lang:
-            out = asr(pth, generate_kwargs={"language": lang})
-        else:
-            out = asr(pth)
-        return {"file": pth, "text": out.get("text", ""), "chunks": out.get("chunks")}
+    base_name = os.path.splitext(state["file_name"])[0]
+    spans = state.get("speech_windows")
+    vad_report_: dict | None = None
+    if state.get("_audio_16k") is not None:
+        parts = segment_windows(state["_audio_16k"], base_name, spans)
+    elif not settings.AUDIO_SEGMENT_TO_DISK and settings.ENABLE_VAD and spans is None:
+        vad_report_ = {}
+        parts = stream_vad_segment_windows(state["file_path"], base_name, vad_report_)
+    elif not settings.AUDIO_SEGMENT_TO_DISK:
+        parts = stream_segment_windows(state["file_path"], base_name, spans)
+    else:
+        parts = split_audio_with_overlap(state["file_path"])
+        state["_tmp_chunk_files"] = parts
     language = state["language"] if state["language"] != "auto" else None
-    segs = transcribe_segments_parallel(parts, _one, language)
+    worker_stats: dict = {}
+    segs = transcribe_segments(parts, language, stats=worker_stats)
+    if vad_report_:
+        _set_vad(state, vad_report_["spans"], vad_report_["total"])
+    if worker_stats:
+        state["stt_workers"] = worker_stats
+        for pid, st in worker_stats.items():
+            get_logger("stt").info(f"worker pid={pid}: {st['segments']} segmen / {st['batches']} batch dalam {st['seconds']}s")
+    state["_audio_16k"] = None  # lepas waveform; tidak dibutuhkan node berikutnya
     state["transcript_raw_segments"] = segs
-    state["transcript_full"] = merge_overlap_text(segs)
+    state["transcript_full"], state["transcript_sentences"] = stitch_segments(segs)
     return state
 
 def node_clean(state: PipeState) -> PipeState:
-    cleaned = get_clean_chain().invoke({"raw": state["transcript_full"]})
-    state["transcript_clean"] = cleaned if isinstance(cleaned, str) else str(cleaned)
+    state["transcript_clean"] = clean_transcript(state["transcript_full"], state.get("transcript_sentences"))
     return state
 
 def node_chunk(state: PipeState) -> PipeState:
     # Use modality-specific dispatcher (audio graph => modality fixed to 'audio')
-    docs = dispatch_chunk(modality="audio", raw_text=state["transcript_clean"], doc_id=state["doc_id"], file_name=state["file_name"], language=state["language"])
+    if settings.CHUNK_STRATEGY == "semantic" and settings.SEMANTIC_REUSE_VECTORS:
+        # vektor chunk dibawa terpisah (bukan di metadata) -> upsert Qdrant tanpa embed ulang
+        docs, vecs = chunk_semantic_with_vectors(state["transcript_clean"], doc_id=state["doc_id"], file_name=state["file_name"],
+                                                 language=state["language"], source="audio_ingestion")
+    else:
+        docs = dispatch_chunk(modality="audio", raw_text=state["transcript_clean"], doc_id=state["doc_id"], file_name=state["file_name"], language=state["language"],
+                              strategy=settings.CHUNK_STRATEGY)
+        vecs = None
     state["chunks"] = docs
+    state["chunk_vectors"] = vecs
     return state
 
 def node_persist_vector_graph_sql(state: PipeState) -> PipeState:
     now_iso = datetime.now(timezone.utc).isoformat()
+    language = Language(state["language"]) if state["language"] in ("en","id","auto") else Language.auto
     engine = None; tables = None
     if settings.ENABLE_SQL:
         try:
-            engine = init_sql_engine(); tables = init_sql_schema(engine)
+            engine, tables = get_sql_context()
         except Exception as e:
-            print(f"[sql][error] init failed -> disable SQL: {e}"); engine = None
+            get_logger("sql").error(f"init failed -> disable SQL: {e}"); engine = None
 
-    # Document row
-    if settings.ENABLE_SQL and engine and tables:
+    # Manifest: hanya chunk baru/berubah yang di-embed & di-extract ulang
+    manifest = get_manifest() if state.get("content_hash") else None
+    pairs = [(d.metadata["chunk_id"], d.page_content) for d in state["chunks"]]
+    if manifest and not state.get("force"):
+        changed = set(manifest.changed_chunks(state["doc_id"], pairs))
+    else:
+        changed = {cid for cid, _ in pairs}
+    todo = [d for d in state["chunks"] if d.metadata["chunk_id"] in changed]
+    # chunk run sukses terakhir yang sudah tidak ada -> dihapus dari semua store di langkah ini;
+    # chunk yang masih ada tapi teksnya berubah (`edited`) -> triple lamanya dihapus sebelum extract ulang
+    live_ids = [cid for cid, _ in pairs]
+    known = manifest.known_chunks(state["doc_id"]) if manifest else set()
+    stale = sorted(known - set(live_ids))
+    edited = sorted(changed & known)
+    if manifest:
+        get_logger("manifest").info(f"{state['doc_id']}: {len(todo)}/{len(pairs)} chunk berubah "
+                                    f"({len(edited)} diedit), {len(stale)} stale")
+    ok = True  # semua subsystem sukses -> file dicatat selesai di manifest
+
+    # Vector DB upsert (vektor eksplisit, ID deterministik); `written` = point yang benar-benar tertulis
+    written: set = set()
+    if settings.ENABLE_QDRANT and todo:
         try:
-            doc_meta = build_document_meta(
-                doc_id=state["doc_id"], title=state["title"],
-                language=Language(state["language"]) if state["language"] in ("en","id","auto") else Language.auto,
-                source=SourceType.audio_ingestion, file=state["file_name"], created_at_iso=now_iso,
-                knowledge_tags=["RAG","audio","STT"], lineage={"stt_model": settings.STT_MODEL, "embed_model": settings.EMBED_MODEL}
-            )
-            insert_document(engine, tables["documents"], doc_meta.to_row())
+            vecs = state.get("chunk_vectors")
+            if vecs is not None and len(vecs) == len(state["chunks"]):
+                vecs = vecs[[i for i, d in enumerate(state["chunks"]) if d.metadata["chunk_id"] in changed]]
+            else:
+                vecs = None
+            written = set(upsert_documents(todo, vectors=vecs))
+            ok &= len(written) == len(todo)
+        except Exception as e:
+            get_logger("qdrant").error(f"upsert failed: {e}"); ok = False
+    if settings.ENABLE_QDRANT and stale:
+        try:
+            delete_chunks(stale)
         except Exception as e:
-            print(f"[sql][warn] skip document insert: {e}")
+            get_logger("qdrant").warning(f"gagal hapus chunk stale: {e}"); ok = False
 
-    # Vector DB upsert
-    if settings.ENABLE_QDRANT:
+    # Extraction + Neo4j (triple dikumpulkan per dokumen lalu ditulis batch)
+    audit_rows = []; graph_rows = []
+    if settings.ENABLE_EXTRACTION:
         try:
-            upsert_documents(state["chunks"])
+            extractor = get_extract_chain()
         except Exception as e:
-            print(f"[qdrant][error] upsert failed: {e}")
+            get_logger("extract").error(f"chain init failed -> skip extraction: {e}"); extractor = None; ok = False
+        if extractor and todo:
+            results = extract_chunks([d.page_content for d in todo], chain=extractor)
+            for d, res in zip(todo, results):
+                if isinstance(res, Exception):
+                    get_logger("extract").warning(f"skip chunk {d.metadata.get('chunk_id')} error={res}"); ok = False
+                    continue
+                graph_rows.extend(neo4j_triple_rows(res.triples, d.metadata["doc_id"], d.metadata["chunk_id"]))
+                audit_rows.extend(
+                    triple_row(tri, d.metadata["doc_id"], d.metadata["chunk_id"])
+                    for tri in res.triples if tri.confidence >= 0.8
+                )
+        # provenance lama dihapus dulu, baru triple baru ditulis (relasi yang masih didukung ditambah lagi)
+        if settings.ENABLE_NEO4J and (stale or edited):
+            try:
+                delete_chunk_provenance(state["doc_id"], stale + edited, live_ids)
+            except Exception as e:
+                get_logger("neo4j").warning(f"gagal hapus provenance chunk lama: {e}"); ok = False
+        if settings.ENABLE_NEO4J and graph_rows:
+            try:
+                upsert_triples_bulk(graph_rows)
+            except Exception as e:
+                get_logger("neo4j").warning(f"skip triples doc {state['doc_id']}: {e}"); ok = False
 
-    # Chunks + refs
+    # SQL: document + chunks + vdb_refs + triples dalam satu transaksi (idempotent)
     if settings.ENABLE_SQL and engine and tables:
-        for d in state["chunks"]:
-            try:
+        try:
+            doc_meta = build_document_meta(
+                doc_id=state["doc_id"], title=state["title"], language=language,
+                source=SourceType.audio_ingestion, file=state["file_name"], created_at_iso=now_iso,
+                knowledge_tags=["RAG","audio","STT"], lineage=pipeline_lineage()
+            )
+            chunk_rows = []
+            # token tokenizer EMBED_MODEL (memoized: mode token sudah menghitungnya saat chunking)
+            n_tokens = count_tokens([d.page_content for d in state["chunks"]])
+            for d, n_tok in zip(state["chunks"], n_tokens):
                 ch_meta = build_chunk_meta(
-                    chunk_id=d.metadata["chunk_id"], doc_id=d.metadata["doc_id"],
-                    language=Language(state["language"]) if state["language"] in ("en","id","auto") else Language.auto,
+                    chunk_id=d.metadata["chunk_id"], doc_id=d.metadata["doc_id"], language=language,
                     source=SourceType.audio_ingestion, file=state["file_name"], created_at_iso=now_iso,
-                    segments=["auto_topic"], token_estimate=len(d.page_content.split())
+                    segments=[f"topic_{d.metadata['topic']:03d}"] if "topic" in d.metadata else ["auto_topic"],
+                    token_estimate=n_tok
                 )
-                insert_chunk(engine, tables["chunks"], ch_meta.to_row(text=d.page_content))
-                insert_vdb_ref(engine, tables["vdb_refs"], ch_meta.chunk_id, settings.EMBED_DIM, settings.QDRANT_COLLECTION)
-            except Exception as e:
-                print(f"[sql][warn] skip chunk {d.metadata.get('chunk_id')}: {e}")
-
-    # Extraction + Neo4j
-    if settings.ENABLE_EXTRACTION:
-        try:
-            extractor = get_extract_chain()
+                chunk_rows.append(ch_meta.to_row(text=d.page_content))
+            persist_document_bulk(
+                engine, tables, document=doc_meta.to_row(), chunks=chunk_rows,
+                # vdb_refs: chunk yang tertulis run ini + chunk tak berubah (sudah ada dari run sebelumnya)
+                vdb_chunk_ids=[r["chunk_id"] for r in chunk_rows
+                               if r["chunk_id"] in written or r["chunk_id"] not in changed] if settings.ENABLE_QDRANT else [],
+                triples=audit_rows, stale_chunk_ids=stale, reextracted_chunk_ids=edited,
+            )
         except Exception as e:
-            print(f"[extract][error] chain init failed -> skip extraction: {e}"); extractor = None
-        if extractor:
-            for d in state["chunks"]:
-                try:
-                    res = extractor.invoke({"chunk": d.page_content})
-                except Exception as e:
-                    print(f"[extract][warn] skip chunk {d.metadata.get('chunk_id')} error={e}")
-                    continue
-                if settings.ENABLE_NEO4J:
-                    try:
-                        upsert_triples(res.triples, doc_id=d.metadata["doc_id"], chunk_id=d.metadata["chunk_id"])
-                    except Exception as e:
-                        print(f"[neo4j][warn] skip triples {d.metadata.get('chunk_id')}: {e}")
-                if settings.ENABLE_SQL and engine and tables:
-                    for tri in res.triples:
-                        if tri.confidence >= 0.8:
-                            try:
-                                insert_triple(engine, tables["gdb_triples"], tri, d.metadata["doc_id"], d.metadata["chunk_id"])
-                            except Exception as e:
-                                print(f"[sql][warn] skip triple audit {tri.s}-{tri.p}-{tri.o}: {e}")
+            get_logger("sql").warning(f"persist doc {state['doc_id']} gagal (rollback): {e}"); ok = False
+
+    # stale hanya dilupakan manifest setelah semua store sukses menghapusnya (gagal -> diulang run berikutnya)
+    if manifest and ok:
+        manifest.mark_done(state.get("source_path") or state["file_path"], state["doc_id"],
+                           state["content_hash"], pairs)
+    state["persist_ok"] = ok
+    if manifest and not ok:
+        get_logger("manifest").warning(f"{state['doc_id']} belum dicatat selesai (ada subsystem gagal) -> diproses ulang run berikutnya")
 
     # Optional cleanup file sementara (chunk 30s + file 16k) agar storage tidak penuh
     try:
@@ -137,17 +240,58 @@ def node_persist_vector_graph_sql(state: PipeState) -> PipeState:
             os.remove(state["file_path"])
         state["_cleanup_done"] = True
     except Exception as e:
-        print(f"[cleanup][warn] gagal membersihkan file sementara: {e}")
+        get_logger("cleanup").warning(f"gagal membersihkan file sementara: {e}")
     return state
 
-def build_graph():
+# Urutan stage graph audio; driver paralel (pipelines/driver.py) memecahnya jadi
+# front (CPU: decode + STT) dan back (network/IO: LLM + DB).
+STAGES = [
+    ("preprocess", node_preprocess),
+    ("vad", node_vad),
+    ("stt", node_stt),
+    ("clean", node_clean),
+    ("chunk", node_chunk),
+    ("persist", node_persist_vector_graph_sql),
+]
+def _audio_seconds(state) -> float:
+    # durasi file (dari VAD); tanpa VAD: jumlah durasi window (sedikit lebih karena overlap)
+    total = (state.get("vad_stats") or {}).get("total_seconds")
+    if total:
+        return float(total)
+    return float(sum(s.get("duration") or 0.0 for s in state.get("transcript_raw_segments") or []))
+
+def _vad_items(state) -> dict:
+    vs = state.get("vad_stats")
+    return {"audio_s": vs["total_seconds"], "speech_s": vs["speech_seconds"]} if vs else {}
+
+# Item per node untuk telemetry (detik audio -> RTF STT, chunk, karakter);
+# VAD streaming jalan di dalam node stt, jadi speech_s ikut item stt
+STAGE_ITEMS = {
+    "vad": _vad_items,
+    "stt": lambda s: {"audio_s": _audio_seconds(s), "segments": len(s.get("transcript_raw_segments") or []),
+                      "speech_s": (s.get("vad_stats") or {}).get("speech_seconds", 0.0)},
+    "clean": lambda s: {"chars": len(s.get("transcript_clean") or "")},
+    "chunk": lambda s: {"chunks": len(s.get("chunks") or [])},
+    "persist": lambda s: {"chunks": len(s.get("chunks") or [])},
+}
+FRONT_STAGES = ("preprocess", "vad", "stt")
+BACK_STAGES = ("clean", "chunk", "persist")
+
+def build_graph(stages=None):
+    """Graph linear atas `stages` (default semua); subset harus berurutan sesuai STAGES."""
+    names = [n for n, _ in STAGES]
+    stages = list(stages or names)
+    start = names.index(stages[0]) if stages[0] in names else -1
+    if start < 0 or names[start:start + len(stages)] != stages:
+        raise ValueError(f"stages harus subset berurutan dari {names}: {stages}")
+    fns = dict(STAGES)
     g = StateGraph(PipeState)
-    g.add_node("preprocess", node_preprocess)
-    g.add_node("stt", node_stt)
-    g.add_node("clean", node_clean)
-    g.add_node("chunk", node_chunk)
-    g.add_node("persist", node_persist_vector_graph_sql)
-    g.set_entry_point("preprocess")
-    g.add_edge("preprocess","stt"); g.add_edge("stt","clean"); g.add_edge("clean","chunk")
-    g.add_edge("chunk","persist"); g.add_edge("persist", END)
+    for n in stages:
+        # checkpoint per stage (CHECKPOINT_ENABLED): resume dari stage terakhir yang selesai;
+        # telemetry span node.<stage> di luar checkpoint (stage yang di-resume tercatat ~0s)
+        g.add_node(n, telemetry.node(n, checkpoint.wrap(names, n, fns[n]), STAGE_ITEMS.get(n)))
+    g.set_entry_point(stages[0])
+    for a, b in zip(stages, stages[1:]):
+        g.add_edge(a, b)
+    g.add_edge(stages[-1], END)
     return g.compile()
@@ -0,0 +1,72 @@
+"""Registry resource berat per proses: model STT, embedder, client DB, engine SQL.
+
+Setiap modul menyimpan singleton-nya sendiri (lazy, dipakai ulang antar file);
+modul ini hanya menyediakan warm-up eksplisit (load di awal run, bukan di file
+pertama) dan teardown (lepas model / tutup koneksi di akhir run atau di test).
+"""
+from __future__ import annotations
+import time
+
+from settings import settings
+from telemetry import get_logger
+
+_log = get_logger("resources")
+
+
+def warmup(*, stt: bool = True, embed: bool = True, qdrant: bool = True, sql: bool = True, neo4j: bool = True) -> dict:
+    """Load resource yang dibutuhkan graph; return durasi per resource (detik)."""
+    timings: dict = {}
+
+    def _timed(name, fn):
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - t0, 3)
+
+    if stt and settings.STT_PROCESSES <= 1:
+        from audio.stt_backends import get_backend
+        _timed("stt", get_backend)
+    if embed and settings.ENABLE_QDRANT:
+        from embeddings.text_embed import get_engine, get_cache
+        _timed("embed", lambda: (get_engine(), get_cache()))
+    if qdrant and settings.ENABLE_QDRANT:
+        from db.qdrant_store import get_client
+        _timed("qdrant", get_client)
+    if sql and settings.ENABLE_SQL:
+        from db.sql import get_sql_context
+        _timed("sql", get_sql_context)
+    if neo4j and settings.ENABLE_NEO4J and settings.ENABLE_EXTRACTION:
+        from db.neo4j_store import ensure_constraints
+        _timed("neo4j", ensure_constraints)
+    _log.info(f"warm-up selesai: {timings}")
+    return timings
+
+
+def teardown() -> None:
+    """Lepas semua resource shared; pemanggilan berikutnya akan load ulang lazily."""
+    from audio.stt import shutdown_stt_pool
+    from audio.stt_backends import release_backends
+    from embeddings.text_embed import release_embedder
+    from db.qdrant_store import close_qdrant
+    from db.sql import dispose_sql
+    from db.neo4j_store import close_neo4j
+    from llm.cache import release_llm
+    from llm.scheduler import shutdown_scheduler
+    from db.manifest import close_manifest
+    from chunking.tokens import release_tokenizer
+
+    shutdown_stt_pool()
+    release_backends()
+    release_embedder()
+    close_qdrant()
+    dispose_sql()
+    close_neo4j()
+    release_llm()
+    shutdown_scheduler()
+    close_manifest()
+    release_tokenizer()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
@@ -0,0 +1,216 @@
+"""Benchmark end-to-end graph audio dengan backend lokal (tanpa server / GPU / API key).
+
+Fixture audio sintetis -> build_graph() penuh, dengan:
+- STT fake (opsional `--stt-backend hf` untuk model asli),
+- embedding fake (opsional `--real-embed`), Qdrant ":memory:",
+- SQLite untuk db/sql.py, stub Neo4j in-process, chain LLM fake.
+Laporan per stage (wall/CPU, throughput, RTF, RSS per span) diambil dari telemetry.
+Secara default hasil dibandingkan dengan baseline ter-commit (benchmarks/baseline.json,
+config default) hanya lewat metrik netral-hardware: CPU time per stage dibagi waktu
+run kalibrasi (kerja CPU tetap, diukur di awal run) -> exit 1 jika naik > `--tolerance`.
+Wall time / RTF / RSS hanya ditampilkan (bergantung mesin & latency fake); item per
+stage yang berbeda ditandai. Config berbeda -> perbandingan hanya ditampilkan.
+`--update-baseline` menulis ulang baseline.
+
+Contoh:
+    python scripts/bench_pipeline.py                       # cek regresi vs baseline
+    python scripts/bench_pipeline.py --update-baseline     # setelah optimasi yang disengaja
+    python scripts/bench_pipeline.py --files 3 --seconds 300 --stt-rtf 0.05 --llm-latency 0.2 \
+        --out data/bench/latest.json --baseline data/bench/baseline.json
+"""
+import os, sys, json, time, argparse, hashlib, tempfile
+
+# Ensure project root (parent of this scripts directory) is on sys.path when executed directly
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "bench-no-network")
+DEFAULT_BASELINE = os.path.join(_ROOT, "benchmarks", "baseline.json")
+
+from settings import settings
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--files", type=int, default=2)
+    ap.add_argument("--seconds", type=float, default=120.0, help="durasi tiap fixture audio")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--stt-backend", default="fake", help="fake | hf | hf_int8 | onnx")
+    ap.add_argument("--stt-rtf", type=float, default=0.02, help="fake STT: detik compute per detik audio")
+    ap.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM: detik per request")
+    ap.add_argument("--embed-latency", type=float, default=0.0, help="fake embedding: detik per teks")
+    ap.add_argument("--real-embed", action="store_true", help="pakai model EMBED_MODEL asli")
+    ap.add_argument("--workers", type=int, default=0, help="driver paralel (thread stage text); 0 = sekuensial")
+    ap.add_argument("--workdir", default=None, help="default: direktori temp")
+    ap.add_argument("--out", default=None, help="tulis hasil JSON")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline untuk dibandingkan")
+    ap.add_argument("--no-compare", action="store_true", help="jangan bandingkan dengan baseline")
+    ap.add_argument("--update-baseline", action="store_true", help="tulis hasil run ini ke --baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="batas regresi relatif (0.2 = +20%%)")
+    ap.add_argument("--noise-s", type=float, default=0.05, help="selisih CPU time (detik) di bawah ini diabaikan")
+    return ap.parse_args()
+
+
+def configure(workdir: str, args) -> None:
+    """Arahkan semua backend ke resource lokal di `workdir` (sebelum resource dibuat)."""
+    settings.QDRANT_URL = ":memory:"
+    settings.PG_URL = f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+    settings.ENABLE_SQL = settings.ENABLE_QDRANT = settings.ENABLE_NEO4J = settings.ENABLE_EXTRACTION = True
+    settings.STT_PROCESSES = 0
+    # cache/manifest/checkpoint mati: tiap run mengukur kerja penuh
+    settings.EMBED_CACHE_ENABLED = settings.LLM_CACHE_ENABLED = False
+    settings.MANIFEST_ENABLED = settings.CHECKPOINT_ENABLED = False
+    settings.TELEMETRY_ENABLED = True
+    settings.TELEMETRY_PATH = os.path.join(workdir, f"telemetry_{int(time.time())}.jsonl")
+    settings.LLM_RPM = settings.LLM_TPM = 10 ** 9  # fake LLM: rate limit tidak relevan
+    if not args.real_embed:
+        # tokenizer EMBED_MODEL dari cache lokal saja (fallback estimasi): tidak ada unduhan di waktu terukur
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+
+def calibrate(repeats: int = 5) -> float:
+    """Detik (min dari `repeats`) untuk kerja CPU tetap: teks, hash, numpy -> pembagi CPU time lintas mesin."""
+    import numpy as np
+    text = " ".join(f"kalimat {i} tentang topik {i % 7}." for i in range(60_000))
+    mat = np.random.default_rng(0).random((256, 256))
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.process_time()
+        words = text.split()
+        hashlib.sha1(" ".join(sorted(set(words))).encode("utf-8")).hexdigest()
+        sum(len(w) for w in words if w.isalpha())
+        for _ in range(80):
+            mat = np.tanh(mat @ mat.T / 256.0)
+        best = min(best, time.process_time() - t0)
+    return round(best, 4)
+
+
+def run(args, workdir: str) -> dict:
+    from benchmarks.fixtures import make_fixtures
+    from benchmarks.fakes import install_fakes
+    from pipelines.graph_audio import build_graph
+    from pipelines.driver import run_pipelined
+    from pipelines.resources import teardown
+    from run_audio import new_state
+    import telemetry
+
+    paths = make_fixtures(os.path.join(workdir, "audio"), args.files, args.seconds, args.seed)
+    handles = install_fakes(stt=args.stt_backend == "fake", embed=not args.real_embed,
+                            stt_rtf=args.stt_rtf, embed_seconds_per_text=args.embed_latency,
+                            llm_latency=args.llm_latency)
+    if args.stt_backend != "fake":
+        settings.STT_BACKEND = args.stt_backend
+
+    calib = calibrate()
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        if args.workers > 0:
+            run_pipelined(paths, new_state, workers=args.workers, processes=0)
+        else:
+            graph = build_graph()
+            for p in paths:
+                graph.invoke(new_state(p))
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        rows = telemetry.summarize(telemetry.load_records())
+    finally:
+        teardown()
+
+    audio_s = args.files * args.seconds
+    stages = {}
+    for r in rows:
+        thr = {f"{k}_per_s": round(v / r["wall_s"], 2) for k, v in r["items"].items() if r["wall_s"] > 0}
+        stages[r["name"]] = {"calls": r["calls"], "errors": r["errors"], "wall_s": r["wall_s"], "cpu_s": r["cpu_s"],
+                             "cpu_norm": round(r["cpu_s"] / calib, 2),
+                             "rss_mb": r["rss_mb"], "rss_delta_mb": r["rss_delta_mb"], "rtf": r["rtf"], "items": r["items"], "throughput": thr}
+    graph_stub = handles.get("neo4j")
+    return {
+        "config": {k: getattr(args, k) for k in ("files", "seconds", "seed", "stt_backend", "stt_rtf",
+                                                  "llm_latency", "embed_latency", "real_embed", "workers")},
+        "calibration_s": calib,
+        "total": {"wall_s": round(wall, 2), "audio_s": audio_s, "rtf": round(wall / audio_s, 4),
+                  "cpu_s": round(cpu, 2), "cpu_norm": round(cpu / calib, 2),
+                  "proc_rss_peak_mb": max((r["proc_rss_peak_mb"] or 0.0 for r in rows), default=None),
+                  "graph_relations": len(graph_stub.graph.rels) if graph_stub else None},
+        "stages": stages,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float, noise_s: float = 0.05) -> list:
+    """Daftar regresi: CPU time ternormalisasi kalibrasi (`cpu_norm`) naik > tolerance (dan cpu_s > noise_s).
+
+    Wall time / RSS tidak dibandingkan: bergantung mesin (dan untuk wall, latency fake).
+    """
+    out = []
+    pairs = [("total", result["total"], baseline.get("total", {}))]
+    pairs += [(n, s, baseline.get("stages", {}).get(n)) for n, s in result["stages"].items()]
+    for name, cur, base in pairs:
+        if not base or base.get("cpu_norm") is None or cur.get("cpu_norm") is None:
+            continue
+        if cur["cpu_norm"] > base["cpu_norm"] * (1 + tolerance) and cur["cpu_s"] - base["cpu_s"] > noise_s:
+            out.append(f"{name}: cpu_norm {base['cpu_norm']} -> {cur['cpu_norm']}")
+    return out
+
+
+def item_changes(result: dict, baseline: dict) -> list:
+    """Stage yang jumlah itemnya (chunk, triple, segmen, ...) beda dari baseline: kerjanya berubah."""
+    out = []
+    for name, cur in result["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base and base.get("items") != cur.get("items"):
+            out.append(f"{name}: items {base.get('items')} -> {cur.get('items')}")
+    return out
+
+
+def _write(path: str, result: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+        f.write("\n")
+    print(f"[bench] hasil -> {path}")
+
+
+def check_baseline(result: dict, args) -> None:
+    """Bandingkan dengan baseline; exit 1 jika regresi (hanya bila config sama)."""
+    if not os.path.isfile(args.baseline):
+        print(f"[bench][warn] baseline {args.baseline} tidak ada -> buat dengan --update-baseline")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.tolerance, args.noise_s)
+    changes = item_changes(result, baseline)
+    if changes:
+        print("[bench][warn] jumlah item berbeda dari baseline:\n  " + "\n  ".join(changes))
+    same_config = baseline.get("config") == result["config"]
+    if regressions:
+        print("[bench] REGRESI:\n  " + "\n  ".join(regressions))
+        if same_config:
+            raise SystemExit(1)
+        print("[bench][warn] config baseline berbeda -> perbandingan hanya indikatif (tidak gagal)")
+        return
+    print(f"[bench] tidak ada regresi CPU vs {args.baseline} (toleransi {args.tolerance:.0%}, "
+          f"kalibrasi {result['calibration_s']}s vs {baseline.get('calibration_s')}s)")
+
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_ingest_")
+    os.makedirs(workdir, exist_ok=True)
+    configure(workdir, args)
+    result = run(args, workdir)
+
+    import telemetry
+    print(telemetry.format_summary())
+    t = result["total"]
+    print(f"[bench] {args.files} file x {args.seconds:.0f}s audio: wall={t['wall_s']}s rtf={t['rtf']} "
+          f"cpu={t['cpu_s']}s cpu_norm={t['cpu_norm']} "
+          f"proc_rss_peak={t['proc_rss_peak_mb']}MB workdir={workdir}")
+    if args.out:
+        _write(args.out, result)
+    if args.update_baseline:
+        _write(args.baseline, result)
+    elif not args.no_compare:
+        check_baseline(result, args)
+
+
+if __name__ == "__main__":
+    main()
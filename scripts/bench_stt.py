@@ -0,0 +1,83 @@
+"""Benchmark backend STT: real-time factor (RTF) + WER pada satu clip fixture.
+
+Contoh:
+    python scripts/bench_stt.py --audio data/fixtures/stt_clip.wav --ref data/fixtures/stt_clip.txt \
+        --backends hf,hf_int8 --language en
+"""
+import os, sys, re, time, argparse
+
+# Ensure project root (parent of this scripts directory) is on sys.path when executed directly
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from settings import settings
+from audio.preprocess import load_16k_mono, segment_windows
+from audio.stitch import stitch_segments
+from audio.stt import stt_batch
+from audio.stt_backends import available_backends, get_backend
+
+DEFAULT_AUDIO = "data/fixtures/stt_clip.wav"
+DEFAULT_REF = "data/fixtures/stt_clip.txt"
+
+
+def _words(text: str):
+    return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+
+def wer(ref: str, hyp: str) -> float:
+    """Word error rate = edit distance kata / jumlah kata referensi."""
+    r, h = _words(ref), _words(hyp)
+    if not r:
+        return 0.0 if not h else 1.0
+    prev = list(range(len(h) + 1))
+    for i in range(1, len(r) + 1):
+        cur = [i] + [0] * len(h)
+        for j in range(1, len(h) + 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r[i - 1] != h[j - 1]))
+        prev = cur
+    return prev[-1] / len(r)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--audio", default=DEFAULT_AUDIO)
+    ap.add_argument("--ref", default=DEFAULT_REF, help="transkrip referensi (teks) untuk WER")
+    ap.add_argument("--backends", default="hf,hf_int8", help=f"comma separated, tersedia: {available_backends()}")
+    ap.add_argument("--language", default=None)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    y = load_16k_mono(args.audio)
+    duration = len(y) / settings.SAMPLE_RATE
+    windows = segment_windows(y, os.path.splitext(os.path.basename(args.audio))[0])
+    ref = open(args.ref, encoding="utf-8").read() if os.path.isfile(args.ref) else None
+    print(f"[bench] clip={args.audio} durasi={duration:.1f}s windows={len(windows)} batch={settings.STT_BATCH_SIZE}")
+
+    rows = []
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        t0 = time.perf_counter()
+        try:
+            backend = get_backend(name)
+        except Exception as e:
+            print(f"[bench][warn] skip backend {name}: {e}")
+            continue
+        load_s = time.perf_counter() - t0
+        # stt_batch memakai backend aktif; arahkan ke backend yang sedang diukur
+        settings.STT_BACKEND = backend.name
+        best = float("inf")
+        text = ""
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            segs = stt_batch(windows, args.language)
+            best = min(best, time.perf_counter() - t0)
+            text = stitch_segments(segs)[0]
+        rows.append((name, load_s, best, best / duration, wer(ref, text) if ref is not None else None))
+
+    print(f"{'backend':<10} {'load_s':>8} {'stt_s':>8} {'rtf':>7} {'wer':>7}")
+    for name, load_s, stt_s, rtf, w in rows:
+        print(f"{name:<10} {load_s:>8.2f} {stt_s:>8.2f} {rtf:>7.3f} {('%.3f' % w) if w is not None else '-':>7}")
+
+
+if __name__ == "__main__":
+    main()
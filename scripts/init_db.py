@@ -0,0 +1,17 @@
+"""Buat / cek schema SQL sekali (dipakai saat deploy bila SQL_AUTO_CREATE_SCHEMA=false)."""
+import os, sys
+
+# Ensure project root (parent of this scripts directory) is on sys.path when executed directly
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+from db.sql import init_sql_engine, init_sql_schema
+
+if __name__ == "__main__":
+    engine = init_sql_engine()
+    try:
+        tables = init_sql_schema(engine)
+        print(f"[sql] schema siap: {', '.join(tables)}")
+    finally:
+        engine.dispose()
@@ -1,4 +1,4 @@
-import os, sys, uuid
+import argparse, os, sys
 
 # Ensure project root (parent of this scripts directory) is on sys.path when executed directly
 _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -7,6 +7,10 @@ if _ROOT not in sys.path:
 
 from models.schemas import PipeState
 from pipelines.graph_audio import build_graph
+from pipelines.resources import warmup, teardown
+from pipelines.driver import run_pipelined, format_summary
+from db.manifest import doc_id_for, file_hash, get_manifest
+import telemetry
 
 AUDIO_DIR = "data/raw/audio"
 VALID_EXTENSIONS = (".mp3", ".wav", ".flac", ".m4a", ".ogg")
@@ -25,31 +29,76 @@ def is_raw_audio_file(filename: str) -> bool:
         return False
     return True
 
-def new_state(path: str):
+def new_state(path: str, content_hash: str | None = None, force: bool = False):
     lang = "en" if "_en" in path.lower() else ("id" if "_id" in path.lower() else "auto")
     return PipeState(
         modality="audio",
-        doc_id=f"doc_{uuid.uuid4().hex[:8]}",
+        doc_id=doc_id_for(path),  # deterministik: re-ingest menimpa, bukan duplikat
         title=os.path.splitext(os.path.basename(path))[0],
         language=lang,
         file_path=path,
         file_name=os.path.basename(path),
+        source_path=path,
+        content_hash=content_hash or file_hash(path),
+        force=force,
         transcript_raw_segments=[], transcript_full="", transcript_clean="",
         chunks=[], extraction={}
     )
 
+def parse_args():
+    ap = argparse.ArgumentParser(description="Ingest semua file audio mentah di satu folder")
+    ap.add_argument("--dir", default=AUDIO_DIR)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="thread stage clean/chunk/persist; 0 = sekuensial per file (mode lama)")
+    ap.add_argument("--processes", type=int, default=0,
+                    help="proses stage STT (spawn, model per proses); 0 = satu thread STT di proses utama")
+    ap.add_argument("--force", action="store_true",
+                    help="proses ulang semua file walau tidak berubah sejak run terakhir (abaikan manifest)")
+    ap.add_argument("--queue-size", type=int, default=None,
+                    help="maks file hasil STT yang antre/berjalan (backpressure); default 2x processes")
+    return ap.parse_args()
+
 if __name__ == "__main__":
-    graph = build_graph()
-    all_files = [f for f in os.listdir(AUDIO_DIR) if os.path.isfile(os.path.join(AUDIO_DIR, f))]
+    args = parse_args()
+    all_files = [f for f in os.listdir(args.dir) if os.path.isfile(os.path.join(args.dir, f))]
     raw_files = [f for f in all_files if is_raw_audio_file(f)]
     
     if not raw_files:
-        print(f"Tidak ada file audio mentah di {AUDIO_DIR}")
+        print(f"Tidak ada file audio mentah di {args.dir}")
         print(f"File ditemukan: {all_files}")
         raise SystemExit(1)
-    
-    for filename in raw_files:
-        full_path = os.path.join(AUDIO_DIR, filename)
-        print(f"[AUDIO] Processing: {filename}")
-        out = graph.invoke(new_state(full_path))
-        print("✅ Done:", out["doc_id"])
+    paths = [os.path.join(args.dir, f) for f in raw_files]
+
+    # Manifest: lewati file yang isi + konfigurasi pipeline-nya sama dengan run sukses terakhir
+    manifest = get_manifest()
+    hashes = {p: file_hash(p) for p in paths}
+    if manifest and not args.force:
+        todo = [p for p in paths if not manifest.is_unchanged(p, hashes[p])]
+        print(f"[manifest] {len(paths) - len(todo)} file tidak berubah dilewati, {len(todo)} diproses")
+        paths = todo
+    make_state = lambda p: new_state(p, hashes[p], force=args.force)
+    if not paths:
+        raise SystemExit(0)
+
+    # Model & client di-load sekali untuk seluruh batch file
+    # (mode --processes: model STT di-load di tiap worker, bukan di proses utama)
+    warmup(stt=args.processes <= 0)
+    try:
+        if args.workers > 0:
+            reports = run_pipelined(paths, make_state, workers=args.workers,
+                                    processes=args.processes, queue_size=args.queue_size)
+            print(format_summary(reports))
+            if any(r["status"] != "ok" for r in reports):
+                raise SystemExit(2)
+        else:
+            graph = build_graph()
+            for full_path in paths:
+                print(f"[AUDIO] Processing: {os.path.basename(full_path)}")
+                out = graph.invoke(make_state(full_path))
+                if out.get("persist_ok") is False:
+                    print("⚠️ Partial (persist sebagian gagal):", out["doc_id"])
+                else:
+                    print("✅ Done:", out["doc_id"])
+    finally:
+        teardown()
+        print(telemetry.format_summary())
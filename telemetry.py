@@ -0,0 +1,202 @@
+"""Instrumentasi pipeline: logging berlevel + span timing/resource per stage & panggilan.
+
+- `get_logger(tag)`: logger `ingest.<tag>` dengan format lama `[tag] pesan`
+  (`[tag][warn]` / `[tag][error]` untuk WARNING/ERROR); level dari LOG_LEVEL.
+- `span(name, **items)`: context manager yang mencatat wall time, CPU time
+  proses, RSS saat ini di awal/akhir span (psutil; `rss_delta_mb` = milik span),
+  peak RSS seumur proses (`proc_rss_peak_mb`, bukan per span), dan jumlah item
+  (detik audio, chunk, token, triple, ...).
+  Tiap span ditulis satu baris JSON ke TELEMETRY_PATH (JSON-lines; worker
+  proses lain menulis ke file yang sama dengan run_id yang sama).
+- `node(name, fn, items)`: bungkus node LangGraph jadi span `node.<name>`.
+- `format_summary()`: tabel ringkas per span untuk akhir run (+ RTF STT).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+import json, logging, os, sys, threading, time, uuid
+
+from settings import settings
+
+try:
+    import resource  # tidak tersedia di Windows
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+_LEVEL_TAG = {logging.WARNING: "[warn]", logging.ERROR: "[error]", logging.CRITICAL: "[error]"}
+_configured = False
+_lock = threading.Lock()
+_records: List[Dict[str, Any]] = []
+# run_id diwariskan ke worker spawn lewat env sehingga summary bisa menggabungkan semua proses
+RUN_ID = os.environ.setdefault("TELEMETRY_RUN_ID", uuid.uuid4().hex[:12])
+
+
+class _TagFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        tag = record.name.split(".", 1)[-1]
+        msg = f"[{tag}]{_LEVEL_TAG.get(record.levelno, '')} {record.getMessage()}"
+        if record.exc_info:
+            msg += "\n" + self.formatException(record.exc_info)
+        return msg
+
+
+def get_logger(tag: str) -> logging.Logger:
+    global _configured
+    if not _configured:
+        with _lock:
+            if not _configured:
+                root = logging.getLogger("ingest")
+                handler = logging.StreamHandler(sys.stdout)
+                handler.setFormatter(_TagFormatter())
+                root.addHandler(handler)
+                root.setLevel(settings.LOG_LEVEL.upper())
+                root.propagate = False
+                _configured = True
+    return logging.getLogger(f"ingest.{tag}")
+
+
+def proc_peak_rss_mb() -> float | None:
+    """Peak RSS seumur proses (ru_maxrss): tidak pernah turun, jadi bukan ukuran per span."""
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # macOS: bytes
+
+
+def current_rss_mb() -> float | None:
+    """RSS proses saat ini (psutil; fallback /proc/self/statm di Linux)."""
+    try:
+        import psutil  # type: ignore
+        return round(psutil.Process().memory_info().rss / 2 ** 20, 1)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Span:
+    def __init__(self, name: str, items: Dict[str, float]):
+        self.name = name
+        self.items: Dict[str, float] = dict(items)
+
+    def add(self, **items: float) -> None:
+        for k, v in items.items():
+            self.items[k] = self.items.get(k, 0) + v
+
+
+def _emit(rec: Dict[str, Any]) -> None:
+    with _lock:
+        _records.append(rec)
+        if settings.TELEMETRY_PATH:
+            os.makedirs(os.path.dirname(settings.TELEMETRY_PATH) or ".", exist_ok=True)
+            with open(settings.TELEMETRY_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, default=str) + "\n")
+
+
+@contextmanager
+def span(name: str, labels: Dict[str, Any] | None = None, **items: float) -> Iterator[Span]:
+    """Catat satu unit kerja. CPU = CPU proses (termasuk thread lain yang jalan bersamaan)."""
+    sp = Span(name, items)
+    if not settings.TELEMETRY_ENABLED:
+        yield sp
+        return
+    w0, c0, m0 = time.perf_counter(), time.process_time(), current_rss_mb()
+    status = "ok"
+    try:
+        yield sp
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        m1 = current_rss_mb()
+        _emit({
+            "run_id": RUN_ID, "ts": time.time(), "pid": os.getpid(), "thread": threading.current_thread().name,
+            "name": name, "status": status,
+            "wall_s": round(time.perf_counter() - w0, 4), "cpu_s": round(time.process_time() - c0, 4),
+            "rss_start_mb": m0, "rss_end_mb": m1,
+            "rss_delta_mb": round(m1 - m0, 1) if m0 is not None and m1 is not None else None,
+            "proc_rss_peak_mb": proc_peak_rss_mb(), "items": sp.items, "labels": labels or {},
+        })
+
+
+def node(name: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+         items: Callable[[Dict[str, Any]], Dict[str, float]] | None = None):
+    """Bungkus node graph: span `node.<name>` + item dari state hasil node."""
+    def wrapped(state):
+        with span(f"node.{name}", labels={"doc_id": state.get("doc_id"), "file": state.get("file_name")}) as sp:
+            out = fn(state)
+            if items is not None:
+                try:
+                    sp.add(**items(out))
+                except Exception:
+                    pass
+        return out
+
+    wrapped.__name__ = getattr(fn, "__name__", name)
+    return wrapped
+
+
+def load_records(path: str | None = None, run_id: str | None = None) -> List[Dict[str, Any]]:
+    """Record run ini: dari file JSONL (semua proses) jika ada, kalau tidak dari memori."""
+    path = path if path is not None else settings.TELEMETRY_PATH
+    run_id = run_id or RUN_ID
+    if path and os.path.isfile(path):
+        out = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("run_id") == run_id:
+                    out.append(rec)
+        return out
+    with _lock:
+        return list(_records)
+
+
+def summarize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    agg: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        a = agg.setdefault(r["name"], {"name": r["name"], "calls": 0, "errors": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                       "rss_mb": None, "rss_delta_mb": None, "proc_rss_peak_mb": None, "items": {}})
+        a["calls"] += 1
+        a["errors"] += r.get("status") != "ok"
+        a["wall_s"] += r["wall_s"]
+        a["cpu_s"] += r["cpu_s"]
+        # per span: RSS tertinggi di batas span + pertumbuhan RSS terbesar selama satu panggilan
+        for key, src in (("rss_mb", "rss_end_mb"), ("rss_mb", "rss_start_mb"),
+                         ("rss_delta_mb", "rss_delta_mb"), ("proc_rss_peak_mb", "proc_rss_peak_mb")):
+            if r.get(src) is not None:
+                a[key] = r[src] if a[key] is None else max(a[key], r[src])
+        for k, v in (r.get("items") or {}).items():
+            a["items"][k] = a["items"].get(k, 0) + v
+    rows = sorted(agg.values(), key=lambda a: -a["wall_s"])
+    for a in rows:
+        audio = a["items"].get("audio_s")
+        a["rtf"] = round(a["wall_s"] / audio, 3) if audio else None  # real-time factor (<1 = lebih cepat dari realtime)
+        a["wall_s"] = round(a["wall_s"], 2); a["cpu_s"] = round(a["cpu_s"], 2)
+    return rows
+
+
+def _dash(v: Any) -> str:
+    return "-" if v is None else str(v)
+
+
+def format_summary(records: List[Dict[str, Any]] | None = None) -> str:
+    rows = summarize(load_records() if records is None else records)
+    table = [("span", "calls", "err", "wall_s", "cpu_s", "rss_mb", "d_rss_mb", "rtf", "items")]
+    for a in rows:
+        items = " ".join(f"{k}={round(v, 1)}" for k, v in sorted(a["items"].items()))
+        table.append((a["name"], str(a["calls"]), str(a["errors"]), str(a["wall_s"]), str(a["cpu_s"]),
+                      _dash(a["rss_mb"]), _dash(a["rss_delta_mb"]), _dash(a["rtf"]), items))
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    return "\n".join("  ".join(c.ljust(w) for c, w in zip(row, widths)).rstrip() for row in table)
+
+
+def reset() -> None:
+    with _lock:
+        _records.clear()
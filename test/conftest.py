@@ -0,0 +1,8 @@
+"""Setup pytest: project root di sys.path + env minimum supaya `settings` bisa di-load tanpa .env."""
+import os, sys
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "test-no-network")
+os.environ.setdefault("TELEMETRY_ENABLED", "false")
@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.bench_pipeline import DEFAULT_BASELINE, calibrate, check_baseline, compare, item_changes
+
+
+def _result(stt_cpu, calib=0.1, files=2, wall=5.0, rss=200.0, chunks=10):
+    return {"config": {"files": files}, "calibration_s": calib,
+            "total": {"wall_s": wall, "cpu_s": stt_cpu + 0.5, "cpu_norm": round((stt_cpu + 0.5) / calib, 2),
+                      "proc_rss_peak_mb": rss},
+            "stages": {"node.stt": {"wall_s": wall, "cpu_s": stt_cpu, "cpu_norm": round(stt_cpu / calib, 2),
+                                    "rss_mb": rss, "items": {"chunks": chunks}}}}
+
+
+def _args(path, tolerance=0.2):
+    return SimpleNamespace(baseline=str(path), tolerance=tolerance, noise_s=0.05)
+
+
+def test_committed_baseline_is_valid():
+    with open(DEFAULT_BASELINE, encoding="utf-8") as f:
+        base = json.load(f)
+    assert base["calibration_s"] > 0 and "node.stt" in base["stages"]
+    assert all("cpu_norm" in s for s in base["stages"].values())
+    assert compare(base, base, 0.2) == []
+
+
+def test_calibration_is_positive():
+    assert calibrate(repeats=1) > 0
+
+
+def test_compare_uses_normalized_cpu_only():
+    base = _result(2.0)
+    assert compare(_result(2.3), base, 0.2) == []
+    assert compare(_result(3.0), base, 0.2) == ["total: cpu_norm 25.0 -> 35.0", "node.stt: cpu_norm 20.0 -> 30.0"]
+    # mesin 2x lebih lambat: CPU & kalibrasi sama-sama 2x -> bukan regresi
+    assert compare(_result(4.0, calib=0.2), base, 0.2) == []
+    # wall time / RSS tidak di-gate
+    assert compare(_result(2.0, wall=50.0, rss=900.0), base, 0.2) == []
+    assert compare(_result(0.03), _result(0.01), 0.2) == []  # di bawah noise_s
+
+
+def test_item_changes_reported():
+    assert item_changes(_result(2.0), _result(2.0)) == []
+    assert item_changes(_result(2.0, chunks=12), _result(2.0)) == ["node.stt: items {'chunks': 10} -> {'chunks': 12}"]
+
+
+def test_check_baseline_fails_only_on_same_config(tmp_path):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(_result(2.0)))
+    check_baseline(_result(2.1), _args(path))
+    with pytest.raises(SystemExit):
+        check_baseline(_result(4.0), _args(path))
+    check_baseline(_result(4.0, files=3), _args(path))  # config berbeda -> hanya indikatif
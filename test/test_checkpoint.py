@@ -0,0 +1,78 @@
+import pytest
+
+from settings import settings
+from pipelines import checkpoint
+
+STAGES = ["load", "stt", "clean", "chunk", "persist"]
+
+
+@pytest.fixture(autouse=True)
+def _ckpt_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(settings, "CHECKPOINT_DIR", str(tmp_path / "ckpt"))
+
+
+def _graph(calls, fail_persist=False, doc_id="doc_a"):
+    def stage(name, key=None):
+        def fn(state):
+            calls.append(name)
+            if name == "persist":
+                if fail_persist:
+                    raise RuntimeError("qdrant down")
+                state["persist_ok"] = True
+            elif key:
+                state[key] = f"{name}-out"
+            return state
+        return checkpoint.wrap(STAGES, name, fn)
+    keys = {"stt": "transcript_full", "clean": "transcript_clean", "chunk": "chunks"}
+    nodes = [stage(n, keys.get(n)) for n in STAGES]
+
+    def run():
+        state = {"content_hash": "abc" * 11, "doc_id": doc_id, "language": "id", "file_name": "a.wav"}
+        for node in nodes:
+            state = node(state)
+        return state
+    return run
+
+
+def test_resume_skips_finished_stages():
+    calls = []
+    with pytest.raises(RuntimeError):
+        _graph(calls, fail_persist=True)()
+    assert calls == STAGES
+    calls.clear()
+    state = _graph(calls)()
+    assert calls == ["persist"]  # load..chunk dilewati (snapshot chunk)
+    assert state["transcript_clean"] == "clean-out" and state["chunks"] == "chunk-out"
+    # persist sukses -> checkpoint dihapus, run berikutnya mulai dari awal
+    calls.clear()
+    _graph(calls)()
+    assert calls == STAGES
+
+
+@pytest.mark.parametrize("name, value", [("WINDOW_SECONDS", 20), ("AUDIO_OVERLAP_SECONDS", 5),
+                                         ("AUDIO_STREAMING", False), ("CHUNK_MAX_TOKENS", 128)])
+def test_config_change_invalidates_stage(monkeypatch, name, value):
+    calls = []
+    with pytest.raises(RuntimeError):
+        _graph(calls, fail_persist=True)()
+    monkeypatch.setattr(settings, name, value)
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        _graph(calls, fail_persist=True)()
+    stt_key = name != "CHUNK_MAX_TOKENS"
+    assert calls == (STAGES if stt_key else ["chunk", "persist"])
+
+
+def test_same_audio_at_other_path_has_own_checkpoints():
+    calls = []
+    for doc_id in ("doc_a", "doc_b"):
+        with pytest.raises(RuntimeError):
+            _graph(calls, fail_persist=True, doc_id=doc_id)()
+    assert calls == STAGES * 2  # doc_b tidak memuat snapshot doc_a
+    calls.clear()
+    _graph(calls, doc_id="doc_a")()  # sukses -> hanya checkpoint doc_a yang dihapus
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        _graph(calls, fail_persist=True, doc_id="doc_b")()
+    assert calls == ["persist"]
@@ -0,0 +1,141 @@
+import io
+
+import pytest
+
+from settings import settings
+from chunking import tokens
+from chunking.engine import base_meta, iter_chunks, iter_documents, splitter_spec, to_documents, token_spec
+from chunking.tokens import count_tokens
+
+TEXT = "".join(
+    f"Kalimat nomor {i} membahas topik {i % 7} dengan detail tambahan. " + ("\n\n" if i % 5 == 4 else "")
+    for i in range(400)
+)
+
+
+@pytest.fixture(autouse=True)
+def _estimate_tokens(monkeypatch):
+    """Tanpa download model: count_tokens pakai estimasi chars/4 (deterministik)."""
+    monkeypatch.setattr(tokens, "_tokenizer", None)
+    monkeypatch.setattr(tokens, "_loaded_for", settings.EMBED_MODEL)
+
+
+def test_chunk_metadata_not_aliased():
+    meta = base_meta(doc_id="doc_1", file_name="a.txt", source="document_ingestion", language="id")
+    spec = splitter_spec(20, 0)
+    docs = to_documents("satu dua tiga. empat lima enam. tujuh delapan sembilan.", spec, meta, id_prefix="ch_")
+    assert len(docs) > 1
+    # nilai bersama immutable & direferensikan sekali; dict per chunk tetap terpisah
+    assert docs[0].metadata["role_restriction"] is docs[1].metadata["role_restriction"] == ("public_read",)
+    docs[0].metadata["role_restriction"] = ("admin",)
+    assert docs[1].metadata["role_restriction"] == meta["role_restriction"] == ("public_read",)
+    assert [d.metadata["chunk_id"] for d in docs[:2]] == ["ch_001", "ch_002"]
+    assert docs[0].metadata["created_at"] == docs[1].metadata["created_at"] == meta["created_at"]
+
+
+def test_iter_documents_is_lazy():
+    meta = base_meta(doc_id="doc_1", file_name="a.txt", source="document_ingestion", language="id")
+    meta["tags"] = ["x"]
+    pulled = []
+
+    def blocks():
+        for i in range(4):  # blok 600k karakter, dibaca per ~1 MiB oleh iter_chunks
+            pulled.append(i)
+            yield "satu dua tiga. empat lima enam. " * 20_000
+
+    it = iter_documents(blocks(), splitter_spec(20, 0), meta, id_prefix="ch_")
+    first, second = next(it), next(it)
+    assert first.metadata["chunk_id"] == "ch_001" and len(pulled) < 4
+    assert first.metadata["tags"] is second.metadata["tags"] == ("x",)
+    assert meta["tags"] == ["x"]  # meta pemanggil tidak diubah
+
+
+def test_token_mode_is_opt_in(monkeypatch):
+    from chunking.audio_chunker import chunk_audio
+
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 0)
+    assert chunk_audio(TEXT, doc_id="d", file_name="a")[0].metadata["strategy"] == "audio_recursive_char"
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 64)
+    assert chunk_audio(TEXT, doc_id="d", file_name="a")[0].metadata["strategy"] == "audio_recursive_token"
+    # chunk_size eksplisit tetap mode karakter walau CHUNK_MAX_TOKENS aktif
+    docs = chunk_audio(TEXT, doc_id="d", file_name="a", chunk_size=300, chunk_overlap=0)
+    assert docs[0].metadata["strategy"] == "audio_recursive_char"
+    assert all(len(d.page_content) <= 300 for d in docs)
+
+
+def test_token_chunks_within_budget():
+    spec = token_spec(64, 16)
+    chunks = list(iter_chunks(TEXT, spec))
+    assert len(chunks) > 10
+    assert all(n <= 64 for n in count_tokens([t for _, _, t in chunks]))
+    assert all(TEXT[s:e] == t for s, e, t in chunks)
+    # overlap: chunk berikutnya mulai sebelum akhir chunk sebelumnya
+    assert all(b[0] < a[1] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_token_stream_matches_in_memory():
+    spec = token_spec(64, 16)
+    expected = list(iter_chunks(TEXT, spec))
+    assert list(iter_chunks(io.StringIO(TEXT), spec, block_chars=500)) == expected
+    pieces = [TEXT[i:i + 37] for i in range(0, len(TEXT), 37)]
+    assert list(iter_chunks(pieces, spec, block_chars=300)) == expected
+
+
+def test_oversize_unit_split_to_budget():
+    spec = token_spec(8, 0)
+    text = "abc " * 200 + "sangatpanjang" * 40  # 4 char/kata -> estimasi token aditif
+    chunks = list(iter_chunks(text, spec))
+    assert all(n <= 8 for n in count_tokens([t for _, _, t in chunks]))
+    assert "".join(t for _, _, t in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_length_cache_keyed_by_digest(monkeypatch):
+    monkeypatch.setattr(tokens, "_MAX_ENTRIES", 3)
+    tokens._lengths.clear()
+    texts = [f"segmen {i} " * 50 for i in range(5)]
+    assert count_tokens(texts) == [len(t) // 4 for t in texts]
+    assert len(tokens._lengths) == 3
+    assert all(isinstance(k, bytes) and len(k) == 16 for k in tokens._lengths)
+
+
+class _TopicEngine:
+    """Embedding fake: vektor one-hot per kata kunci topik di kalimat."""
+    TOPICS = ("kucing", "planet", "korsel")
+
+    def embed(self, texts):
+        import numpy as np
+        return np.array([[1.0 if k in t else 0.0 for k in self.TOPICS] + [0.01] for t in texts], dtype=np.float32)
+
+
+def test_semantic_chunks_follow_topics_and_budget(monkeypatch):
+    from embeddings import text_embed
+    from chunking.semantic_chunker import chunk_semantic
+
+    monkeypatch.setattr(text_embed, "_engine", _TopicEngine())
+    monkeypatch.setattr(text_embed, "get_cache", lambda: pytest.fail("cache embedding tidak boleh dipakai"))
+    monkeypatch.setattr(settings, "SEMANTIC_CONTEXT_SENTENCES", 0)
+    # kalimat 36 char (dengan spasi) -> estimasi token chars/4 aditif
+    text = " ".join(f"Kalimat {chr(97 + i)} tentang {topic} yang lucu." for topic in _TopicEngine.TOPICS for i in range(12))
+    docs = chunk_semantic(text, doc_id="d", file_name="a.txt", max_tokens=48)
+    assert all(n <= 48 for n in count_tokens([d.page_content for d in docs]))
+    # tidak ada chunk yang mencampur dua topik; nomor topik naik mengikuti urutan
+    for d in docs:
+        assert sum(k in d.page_content for k in _TopicEngine.TOPICS) == 1
+    topics = [d.metadata["topic"] for d in docs]
+    assert topics == sorted(topics) and len(set(topics)) == 3
+    assert all(text[slice(*d.metadata["span"])] == d.page_content for d in docs)
+
+
+def test_semantic_vectors_returned_beside_metadata(monkeypatch):
+    from embeddings import text_embed
+    from chunking.semantic_chunker import chunk_semantic_with_vectors
+
+    monkeypatch.setattr(text_embed, "_engine", _TopicEngine())
+    monkeypatch.setattr(settings, "SEMANTIC_CONTEXT_SENTENCES", 0)
+    text = " ".join(f"Kalimat {chr(97 + i)} tentang {topic} yang lucu." for topic in _TopicEngine.TOPICS for i in range(6))
+    docs, vecs = chunk_semantic_with_vectors(text, doc_id="d", file_name="a.txt", max_tokens=48)
+    assert vecs.shape == (len(docs), 4)
+    # vektor tidak bocor ke metadata (checkpoint / payload / konsumen lain)
+    assert all(not hasattr(v, "shape") for d in docs for v in d.metadata.values())
+    for d, v in zip(docs, vecs):
+        assert int(v[:3].argmax()) == [k in d.page_content for k in _TopicEngine.TOPICS].index(True)
@@ -0,0 +1,78 @@
+from langchain_core.runnables import RunnableLambda
+
+from settings import settings
+from llm.cleaning import clean_transcript, looks_clean, plan_clean_windows, split_units
+
+RAW = "Um halo semua.\n\nIni paragraf dua uh.\nBaris tiga sudah rapi."
+
+
+def _fake(calls=None, fail_on=None):
+    def clean(p):
+        if calls is not None:
+            calls.append(p)
+        if fail_on and fail_on in p["raw"]:
+            raise ValueError("boom")
+        return " " + p["raw"].replace("Um ", "").replace(" uh", "").upper() + " "
+    return RunnableLambda(clean)
+
+
+def test_units_are_offsets_into_raw(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOW_TOKENS", 1200)
+    units = split_units(RAW)
+    assert [RAW[s:e] for s, e in units] == ["Um halo semua.", "Ini paragraf dua uh.", "Baris tiga sudah rapi."]
+    sents = [{"text": " Um halo semua. "}, {"text": "Ini paragraf dua uh.\nBaris tiga sudah rapi."}]
+    assert [RAW[s:e] for s, e in split_units(RAW, sents)] == ["Um halo semua.", RAW[16:]]
+
+
+def test_oversize_unit_split_by_words(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOW_TOKENS", 3)
+    raw = "satu dua tiga empat lima enam tujuh"
+    units = split_units(raw)
+    assert len(units) > 1
+    assert " ".join(raw[s:e] for s, e in units) == raw
+
+
+def test_windows_keep_separators(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOW_TOKENS", 6)
+    monkeypatch.setattr(settings, "CLEAN_OVERLAP_UNITS", 1)
+    monkeypatch.setattr(settings, "CLEAN_SKIP_HEURISTIC", True)  # window terakhir sudah rapi -> tidak ke LLM
+    plan = plan_clean_windows(RAW, split_units(RAW))
+    assert len(plan) == 3
+    assert plan[1][0] == "Um halo semua."
+    out = clean_transcript(RAW, chain=_fake())
+    assert out == "HALO SEMUA.\n\nINI PARAGRAF DUA.\nBaris tiga sudah rapi."
+
+
+def test_looks_clean():
+    assert looks_clean("Kalimat pertama sudah rapi. Kalimat kedua juga!")
+    assert not looks_clean("Um kalimat ini ada filler.")
+    assert not looks_clean("Kata kata yang diulang.")
+    assert not looks_clean("tanpa kapital di awal.")
+    assert not looks_clean("Tanpa tanda baca akhir")
+
+
+def test_clean_window_skipped_verbatim(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOW_TOKENS", 1200)
+    raw = "Kalimat pertama sudah rapi.\nKalimat kedua juga rapi."
+    calls = []
+    assert clean_transcript(raw, chain=_fake(calls)) == raw.upper()  # default: heuristik off
+    assert len(calls) == 1
+    monkeypatch.setattr(settings, "CLEAN_SKIP_HEURISTIC", True)
+    calls.clear()
+    assert clean_transcript(raw, chain=_fake(calls)) == raw
+    assert calls == []
+
+
+def test_failed_window_falls_back_to_raw(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOW_TOKENS", 6)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "CLEAN_SKIP_HEURISTIC", True)
+    out = clean_transcript(RAW, chain=_fake(fail_on="paragraf"))
+    assert out == "HALO SEMUA.\n\nIni paragraf dua uh.\nBaris tiga sudah rapi."
+
+
+def test_single_shot_mode(monkeypatch):
+    monkeypatch.setattr(settings, "CLEAN_WINDOWED", False)
+    calls = []
+    assert clean_transcript(RAW, chain=_fake(calls)) == "HALO SEMUA.\n\nINI PARAGRAF DUA.\nBARIS TIGA SUDAH RAPI."
+    assert len(calls) == 1 and calls[0]["raw"] == RAW
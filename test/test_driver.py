@@ -0,0 +1,74 @@
+import threading, time
+
+from pipelines import driver
+from pipelines.driver import format_summary, run_pipelined
+
+
+class _Stages:
+    """Front/back palsu (thread, processes=0): mencatat urutan & jumlah file yang sedang ditahan."""
+
+    def __init__(self, back_s=0.0, fail_front=(), fail_back=(), partial=()):
+        self.back_s, self.fail_front, self.fail_back, self.partial = back_s, fail_front, fail_back, partial
+        self.lock = threading.Lock()
+        self.front_order, self.back_seen = [], []
+        self.submitted = self.back_done = self.peak_held = 0
+
+    def make_state(self, path):
+        with self.lock:
+            self.submitted += 1
+            self.peak_held = max(self.peak_held, self.submitted - self.back_done)
+        return {"file_path": path, "doc_id": f"doc_{path}"}
+
+    def front(self, state):
+        self.front_order.append(state["file_path"])
+        if state["file_path"] in self.fail_front:
+            raise RuntimeError("decode rusak")
+        return dict(state, transcript=state["file_path"].upper()), 0.01, 1
+
+    def back(self, state):
+        time.sleep(self.back_s)
+        self.back_seen.append((state["doc_id"], state["transcript"]))
+        try:
+            if state["file_path"] in self.fail_back:
+                raise RuntimeError("llm mati")
+            return dict(state, persist_ok=state["file_path"] not in self.partial), 0.02
+        finally:
+            with self.lock:
+                self.back_done += 1
+
+
+def _run(monkeypatch, stages, paths, **kw):
+    monkeypatch.setattr(driver, "_run_front", stages.front)
+    monkeypatch.setattr(driver, "_run_back", stages.back)
+    return run_pipelined(paths, stages.make_state, **kw)
+
+
+def test_every_file_reported_once_in_input_order_front(monkeypatch):
+    stages = _Stages()
+    paths = [f"f{i}" for i in range(6)]
+    reports = _run(monkeypatch, stages, paths, workers=3)
+    assert stages.front_order == paths  # satu thread front, urut input
+    assert sorted(r["file"] for r in reports) == paths
+    assert all(r["status"] == "ok" and r["doc_id"] == f"doc_{r['file']}" for r in reports)
+    # state back = hasil front file yang sama
+    assert sorted(stages.back_seen) == [(f"doc_{p}", p.upper()) for p in paths]
+
+
+def test_backpressure_bounds_files_in_flight(monkeypatch):
+    stages = _Stages(back_s=0.03)
+    reports = _run(monkeypatch, stages, [f"f{i}" for i in range(8)], workers=1, queue_size=2)
+    assert len(reports) == 8
+    # front berjalan + antre back <= queue_size, ditambah `workers` file di back
+    assert stages.peak_held <= 2 + 1
+
+
+def test_stage_errors_and_partial_persist_reported_per_file(monkeypatch):
+    stages = _Stages(fail_front={"b"}, fail_back={"c"}, partial={"d"})
+    reports = {r["file"]: r for r in _run(monkeypatch, stages, ["a", "b", "c", "d"], workers=2)}
+    assert reports["a"]["status"] == "ok" and reports["a"]["error"] is None
+    assert reports["b"]["status"] == "failed" and reports["b"]["error"] == "stt: decode rusak"
+    assert reports["b"]["text_s"] is None
+    assert reports["c"]["status"] == "failed" and reports["c"]["error"] == "text: llm mati"
+    assert reports["d"]["status"] == "partial" and reports["d"]["error"].startswith("persist:")
+    lines = {ln.split()[0]: ln.split()[1] for ln in format_summary(list(reports.values())).splitlines()[1:]}
+    assert lines == {"a": "ok", "b": "failed", "c": "failed", "d": "partial"}
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from settings import settings
+from embeddings import cache as embed_cache, text_embed
+from embeddings.cache import EmbeddingCache, cache_key
+from embeddings.engine import EmbeddingEngine
+
+
+def _vec(text):
+    return [float(len(text)), float(sum(map(ord, text)))]
+
+
+class _FakeModel:
+    """Pengganti SentenceTransformer: mencatat isi tiap batch, vektor = (panjang, jumlah ord)."""
+
+    def __init__(self):
+        self.batches = []
+
+    def tokenize(self, texts):
+        self.batches.append(list(texts))
+        return {"texts": list(texts)}
+
+    def __call__(self, features):
+        import torch
+        return {"sentence_embedding": torch.tensor([_vec(t) for t in features["texts"]], dtype=torch.float64)}
+
+
+def _engine(batch_size):
+    eng = EmbeddingEngine.__new__(EmbeddingEngine)  # tanpa load model
+    eng.model, eng.batch_size, eng.device, eng.dim = _FakeModel(), batch_size, "cpu", 2
+    eng._to_device = lambda features, device: features
+    return eng
+
+
+class _CountingEngine:
+    dim = 2
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return np.array([_vec(t) for t in texts], dtype=np.float32)
+
+
+def test_length_bucketing_restores_input_order():
+    pytest.importorskip("torch")
+    texts = ["a", "ccc", "bb", "eeeee", "dddd", "ff", "g"]
+    eng = _engine(batch_size=3)
+    out = eng.embed(texts)
+    assert out.dtype == np.float32 and out.shape == (7, 2)
+    np.testing.assert_array_equal(out, np.array([_vec(t) for t in texts], dtype=np.float32))
+    # batch berisi teks dengan panjang mirip: terpanjang dulu, seri tetap urut input
+    assert eng.model.batches == [["eeeee", "dddd", "ccc"], ["bb", "ff", "a"], ["g"]]
+    assert eng.embed([]).shape == (0, 2)
+
+
+def test_embed_query_returns_list(monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(text_embed, "_cache", None)
+    monkeypatch.setattr(text_embed, "_engine", _CountingEngine())
+    assert text_embed.embed_query("abc") == _vec("abc")
+    assert text_embed.get_embedder().embed_documents(["x"]) == [_vec("x")]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(str(tmp_path / "emb.sqlite"), max_mb=1)
+    yield c
+    c.close()
+
+
+def test_cache_hit_skips_engine(cache, monkeypatch):
+    eng = _CountingEngine()
+    monkeypatch.setattr(text_embed, "_engine", eng)
+    monkeypatch.setattr(text_embed, "_cache", cache)
+    first = text_embed.embed_texts(["satu", "dua", "satu"])
+    assert eng.calls == [["satu", "dua"]]  # hanya teks unik yang miss
+    again = text_embed.embed_texts(["dua  ", "satu", "tiga"])  # whitespace dinormalisasi -> key sama
+    assert eng.calls == [["satu", "dua"], ["tiga"]]
+    np.testing.assert_array_equal(again[:2], first[[1, 0]])
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["entries"]) == (2, 3, 3)
+    assert cache_key("satu") != cache_key("satu", model="lain")
+
+
+def test_cache_evicts_least_recently_used_by_size(cache, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(embed_cache.time, "time", lambda: next(clock))
+    big = np.ones((1, 65536), dtype=np.float32)  # 256 KiB per entry, batas 1 MiB
+    keys = [cache_key(f"teks {i}") for i in range(5)]
+    for k in keys[:3]:
+        cache.put_many([k], big)
+    assert set(cache.get_many([keys[0]])) == {keys[0]}  # keys[0] jadi paling baru diakses
+    cache.put_many(keys[3:], np.ones((2, 65536), dtype=np.float32))  # 1.25 MiB -> evict ke <= 90%
+    assert set(cache.get_many(keys)) == {keys[0], keys[3], keys[4]}
+    assert cache.stats()["bytes"] <= 0.9 * 1024 * 1024
@@ -0,0 +1,123 @@
+import pytest
+
+pytest.importorskip("transformers")  # benchmarks.fakes -> audio.stt_backends
+
+from benchmarks.fakes import FakeNeo4jDriver
+from db.neo4j_store import NEO4J_CONSTRAINTS, NEO4J_DROP_CHUNKS, NEO4J_MERGE_BATCH, delete_chunk_provenance, upsert_triples_bulk
+
+REL_QUERY = """
+MATCH (s:Entity)-[r:REL]->(o:Entity)
+RETURN s.name AS s, r.predicate AS p, o.name AS o, r.doc_ids AS doc_ids, r.chunk_ids AS chunk_ids,
+       r.confidence AS confidence
+"""
+
+
+@pytest.fixture(scope="module")
+def _neo4j_container():
+    """Neo4j asli via testcontainers (skip jika paket / Docker tidak tersedia)."""
+    tc = pytest.importorskip("testcontainers.neo4j")
+    try:
+        container = tc.Neo4jContainer("neo4j:5").start()
+    except Exception as e:
+        pytest.skip(f"Docker/Neo4j tidak tersedia: {e}")
+    drv = container.get_driver()
+    yield drv
+    drv.close()
+    container.stop()
+
+
+@pytest.fixture(params=["fake", "neo4j"])
+def driver(request):
+    if request.param == "fake":
+        yield FakeNeo4jDriver()
+        return
+    drv = request.getfixturevalue("_neo4j_container")
+    with drv.session() as s:
+        s.run("MATCH (n) DETACH DELETE n").consume()
+    yield drv
+
+
+def _rels(drv):
+    if isinstance(drv, FakeNeo4jDriver):
+        return drv.graph.rels
+    with drv.session() as s:
+        return {(r["s"], r["p"], r["o"]): {"doc_ids": r["doc_ids"], "chunk_ids": r["chunk_ids"],
+                                           "confidence": r["confidence"]}
+                for r in s.run(REL_QUERY)}
+
+
+class _RecordingDriver:
+    """Driver yang hanya mencatat (query, params) -> cek Cypher & parameter yang dikirim kode."""
+
+    def __init__(self):
+        self.calls = []
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.calls.append((query, params))
+        return self
+
+    def consume(self):
+        return None
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+
+def _row(s, o, chunk_id, doc_id="doc_a", conf=0.9):
+    return {"s": s, "p": "related_to", "o": o, "doc_id": doc_id, "chunk_id": chunk_id, "confidence": conf}
+
+
+def test_upsert_merges_provenance_and_filters_confidence(driver):
+    n = upsert_triples_bulk([_row("a", "b", "c1"), _row("a", "b", "c2"), _row("x", "y", "c1", conf=0.3)],
+                            driver=driver, batch_size=1)
+    assert n == 2
+    assert _rels(driver) == {("a", "related_to", "b"): {"doc_ids": ["doc_a"], "chunk_ids": ["c1", "c2"],
+                                                        "confidence": 0.9}}
+
+
+def test_delete_chunk_provenance(driver):
+    upsert_triples_bulk([_row("a", "b", "c1"), _row("a", "b", "c2"), _row("b", "c", "c2"),
+                         _row("b", "c", "d1", doc_id="doc_b")], driver=driver)
+    assert delete_chunk_provenance("doc_a", ["c2"], live_ids=["c1"], driver=driver) == 1
+    rels = _rels(driver)
+    assert rels[("a", "related_to", "b")]["chunk_ids"] == ["c1"]
+    # relasi tetap ada (dipakai doc_b) tapi doc_a tidak lagi tercatat
+    assert rels[("b", "related_to", "c")] == {"doc_ids": ["doc_b"], "chunk_ids": ["d1"], "confidence": 0.9}
+    delete_chunk_provenance("doc_a", ["c1"], driver=driver)
+    assert ("a", "related_to", "b") not in _rels(driver)
+    assert delete_chunk_provenance("doc_a", [], driver=driver) == 0
+
+
+def test_edited_chunk_reupsert_keeps_only_new_relations(driver):
+    # chunk c1 diedit: provenance lama dihapus (c1 masih hidup), lalu triple baru ditulis
+    upsert_triples_bulk([_row("a", "b", "c1"), _row("a", "b", "c2")], driver=driver)
+    delete_chunk_provenance("doc_a", ["c1"], live_ids=["c1", "c2"], driver=driver)
+    upsert_triples_bulk([_row("p", "q", "c1")], driver=driver)
+    assert _rels(driver) == {
+        ("a", "related_to", "b"): {"doc_ids": ["doc_a"], "chunk_ids": ["c2"], "confidence": 0.9},
+        ("p", "related_to", "q"): {"doc_ids": ["doc_a"], "chunk_ids": ["c1"], "confidence": 0.9},
+    }
+
+
+def test_cypher_and_parameters_sent():
+    drv = _RecordingDriver()
+    rows = [_row("a", "b", "c1"), _row("x", "y", "c1", conf=0.3), _row("b", "c", "c2")]
+    upsert_triples_bulk(rows, driver=drv, batch_size=1)
+    upsert_triples_bulk(rows[:1], driver=drv)
+    # constraint dibuat juga untuk driver dari pemanggil, tapi sekali saja per driver
+    assert [q for q, _ in drv.calls if q in NEO4J_CONSTRAINTS] == NEO4J_CONSTRAINTS
+    merges = [params for query, params in drv.calls if query == NEO4J_MERGE_BATCH]
+    assert merges == [{"rows": [rows[0]]}, {"rows": [rows[2]]}, {"rows": [rows[0]]}]  # confidence < 0.8 tidak dikirim
+
+    drv.calls.clear()
+    delete_chunk_provenance("doc_a", ("c1",), live_ids=("c2",), driver=drv)
+    assert drv.calls == [(NEO4J_DROP_CHUNKS, {"doc_id": "doc_a", "stale_ids": ["c1"], "live_ids": ["c2"]})]
@@ -0,0 +1,94 @@
+"""Graph audio end-to-end dengan backend fake (lihat benchmarks/fakes.py), tanpa server / model."""
+import pytest
+
+pytest.importorskip("librosa")
+pytest.importorskip("transformers")
+
+from sqlalchemy import func, select
+
+from settings import settings
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    from benchmarks.fixtures import make_fixtures
+    from benchmarks.fakes import install_fakes
+    from pipelines.resources import teardown
+
+    for name, value in {
+        "QDRANT_URL": ":memory:", "PG_URL": f"sqlite:///{tmp_path / 'db.sqlite'}",
+        "ENABLE_SQL": True, "ENABLE_QDRANT": True, "ENABLE_NEO4J": True, "ENABLE_EXTRACTION": True,
+        "STT_PROCESSES": 0, "EMBED_CACHE_ENABLED": False, "LLM_CACHE_ENABLED": False,
+        "MANIFEST_ENABLED": True, "MANIFEST_PATH": str(tmp_path / "manifest.sqlite"),
+        "CHECKPOINT_ENABLED": False, "TELEMETRY_ENABLED": False, "CHUNK_STRATEGY": "recursive",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    teardown()
+    from chunking import tokens  # tanpa unduh tokenizer: estimasi chars/4
+    monkeypatch.setattr(tokens, "_tokenizer", None)
+    monkeypatch.setattr(tokens, "_loaded_for", settings.EMBED_MODEL)
+    handles = install_fakes()
+    paths = make_fixtures(str(tmp_path / "audio"), 1, 60.0)
+    yield paths[0], handles["neo4j"].graph
+    teardown()
+
+
+def _stores(doc_id):
+    from db.sql import get_sql_context
+    from db.qdrant_store import get_client
+    engine, tables = get_sql_context()
+    with engine.connect() as c:
+        sql = {name: c.execute(select(func.count()).select_from(tables[name])
+                               .where(tables[name].c.chunk_id.like(f"ch_{doc_id}%"))).scalar_one()
+               for name in ("chunks", "vdb_refs")}
+    sql["qdrant"] = get_client().count(settings.QDRANT_COLLECTION, exact=True).count
+    return sql
+
+
+def test_reingest_with_fewer_chunks_drops_stale_everywhere(env, monkeypatch):
+    from pipelines.graph_audio import build_graph
+    from scripts.run_audio import new_state
+
+    path, graph = env
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 40)
+    first = build_graph().invoke(new_state(path))
+    n_first = len(first["chunks"])
+    assert first["persist_ok"] and n_first > 3
+    assert _stores(first["doc_id"]) == {"chunks": n_first, "vdb_refs": n_first, "qdrant": n_first}
+
+    monkeypatch.setattr(settings, "CHUNK_MAX_TOKENS", 200)
+    second = build_graph().invoke(new_state(path))
+    live = {d.metadata["chunk_id"] for d in second["chunks"]}
+    assert second["persist_ok"] and len(live) < n_first
+    assert _stores(second["doc_id"]) == {"chunks": len(live), "vdb_refs": len(live), "qdrant": len(live)}
+    for rel in graph.rels.values():
+        assert set(rel["chunk_ids"]) <= live
+
+
+def test_edited_chunk_drops_its_old_triples(env):
+    from langchain_core.documents import Document
+    from db.sql import get_sql_context
+    from pipelines.graph_audio import node_persist_vector_graph_sql
+    from scripts.run_audio import new_state
+
+    path, graph = env
+    engine, tables = get_sql_context()
+
+    def persist(texts):
+        state = new_state(path)
+        state["chunks"] = [Document(page_content=t, metadata={"doc_id": state["doc_id"],
+                                                               "chunk_id": f"ch_{state['doc_id']}_{i:04d}"})
+                           for i, t in enumerate(texts)]
+        assert node_persist_vector_graph_sql(state)["persist_ok"]
+        with engine.connect() as c:
+            sql = {(r.s, r.o) for r in c.execute(select(tables["gdb_triples"]))}
+        return sql, {(s, o) for s, _, o in graph.rels}
+
+    sql, neo = persist(["kucing berlari kencang", "matahari terbenam perlahan"])
+    assert ("matahari", "terbenam") in sql and ("matahari", "terbenam") in neo
+
+    # chunk_id sama, teks berubah -> triple lamanya hilang di kedua store, chunk lain utuh
+    sql, neo = persist(["kucing berlari kencang", "rembulan bersinar terang"])
+    assert ("matahari", "terbenam") not in sql and ("matahari", "terbenam") not in neo
+    assert ("rembulan", "bersinar") in sql and ("rembulan", "bersinar") in neo
+    assert ("kucing", "berlari") in sql and ("kucing", "berlari") in neo
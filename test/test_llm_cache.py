@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from llm import cache as llm_cache
+from llm.cache import CachedChain, LLMCache, memo_chain, pin_chain, release_llm
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LLMCache(str(tmp_path / "llm.sqlite"), max_mb=1, ttl_hours=1)
+    yield c
+    c.close()
+
+
+@pytest.fixture(autouse=True)
+def _reset_memo():
+    yield
+    release_llm()
+
+
+def test_hit_skips_chain(cache):
+    calls = []
+    chain = CachedChain(RunnableLambda(lambda p: calls.append(p) or p["raw"].upper()), cache,
+                        namespace="clean", model="m", prompt="tmpl")
+    assert chain.invoke({"raw": "abc"}) == "ABC"
+    assert chain.invoke({"raw": "abc"}) == "ABC"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_prompt_change_changes_key(cache):
+    a = CachedChain(RunnableLambda(lambda p: "a"), cache, namespace="clean", model="m", prompt="v1")
+    b = CachedChain(RunnableLambda(lambda p: "b"), cache, namespace="clean", model="m", prompt="v2")
+    a.invoke({"raw": "x"})
+    assert b.lookup({"raw": "x"}) == (False, None)
+
+
+def test_ttl_expires_entries(cache, monkeypatch):
+    key = LLMCache.make_key("clean", "m", "t", {"raw": "x"})
+    cache.put(key, "clean", "bersih")
+    assert cache.get(key) == "bersih"
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 3601)
+    assert cache.get(key) is llm_cache._MISS
+    assert cache.stats()["entries"] == 0
+
+
+def test_size_eviction_drops_least_recent(cache):
+    big = "x" * 300_000
+    keys = [LLMCache.make_key("clean", "m", "t", {"i": i}) for i in range(4)]
+    for k in keys[:3]:
+        cache.put(k, "clean", big)
+    cache.get(keys[0])  # keys[0] jadi paling baru diakses
+    cache.put(keys[3], "clean", big)  # total > 1 MB -> evict LRU
+    assert cache.get(keys[1]) is llm_cache._MISS
+    assert cache.get(keys[0]) == big and cache.get(keys[3]) == big
+
+
+def test_memo_chain_is_per_event_loop():
+    built = []
+
+    def build():
+        built.append(object())
+        return RunnableLambda(lambda p: p)
+
+    async def get():
+        return memo_chain("probe", build), memo_chain("probe", build)
+
+    a1, a2 = asyncio.run(get())
+    b1, _ = asyncio.run(get())
+    assert a1 is a2 and a1 is not b1
+    assert len(built) == 2
+    # pemanggil sync -> chain untuk loop scheduler, dipakai ulang
+    assert memo_chain("probe", build) is memo_chain("probe", build)
+    assert len(built) == 3
+
+
+def test_pinned_chain_shared_by_all_loops():
+    fake = RunnableLambda(lambda p: p)
+    pin_chain("probe", fake)
+
+    async def get():
+        return memo_chain("probe", lambda: pytest.fail("build tidak boleh dipanggil"))
+
+    assert asyncio.run(get()) is fake and memo_chain("probe", lambda: None) is fake
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from db.manifest import Manifest, doc_id_for, path_key
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    m = Manifest(str(tmp_path / "manifest.sqlite"))
+    yield m
+    m.close()
+
+
+def test_doc_id_independent_of_cwd(tmp_path, monkeypatch):
+    audio = tmp_path / "data" / "a.wav"
+    audio.parent.mkdir()
+    audio.write_bytes(b"x")
+    monkeypatch.chdir(tmp_path)
+    rel_id = doc_id_for("data/a.wav")
+    monkeypatch.chdir(audio.parent)
+    assert doc_id_for("a.wav") == rel_id == doc_id_for(str(audio))
+    link = tmp_path / "link.wav"
+    os.symlink(audio, link)
+    assert path_key(str(link)) == path_key(str(audio))
+
+
+def test_changed_chunks_diff(manifest):
+    assert manifest.changed_chunks("doc", [("c1", "a"), ("c2", "b")], fp="f1") == ["c1", "c2"]
+    manifest.mark_done("/x.wav", "doc", "h1", [("c1", "a"), ("c2", "b")], fp="f1")
+    assert manifest.changed_chunks("doc", [("c1", "a"), ("c2", "B"), ("c3", "c")], fp="f1") == ["c2", "c3"]
+    # fingerprint (model/konfigurasi) berubah -> semua chunk dianggap berubah
+    assert manifest.changed_chunks("doc", [("c1", "a")], fp="f2") == ["c1"]
+
+
+def test_stale_chunks_and_mark_done(manifest):
+    manifest.mark_done("/x.wav", "doc", "h1", [("c1", "a"), ("c2", "b"), ("c3", "c")], fp="f1")
+    assert manifest.is_unchanged("/x.wav", "h1", fp="f1")
+    assert not manifest.is_unchanged("/x.wav", "h2", fp="f1")
+    assert manifest.stale_chunks("doc", ["c1"]) == ["c2", "c3"]
+    assert manifest.mark_done("/x.wav", "doc", "h2", [("c1", "a")], fp="f1") == ["c2", "c3"]
+    assert manifest.stale_chunks("doc", ["c1"]) == []
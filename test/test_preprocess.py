@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from settings import settings
+from audio.preprocess import (iter_stream_windows, iter_windows, load_16k_mono, resample_to_16k_mono,
+                              segment_windows, split_audio_with_overlap, stream_16k_mono, stream_segment_windows)
+from benchmarks.fixtures import synth_speech
+
+SR = settings.SAMPLE_RATE
+
+
+@pytest.fixture(autouse=True)
+def _small_windows(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "WINDOW_SECONDS", 5)
+    monkeypatch.setattr(settings, "AUDIO_OVERLAP_SECONDS", 1)
+    monkeypatch.setattr(settings, "AUDIO_STREAM_BLOCK_SECONDS", 0.7)  # block tidak sejajar window
+    monkeypatch.chdir(tmp_path)  # split_audio_with_overlap menulis ke data/interim/ relatif cwd
+
+
+def _wav(tmp_path, seconds=23.3, sr=SR, channels=1):
+    y = synth_speech(seconds, seed=1, sr=sr)
+    path = str(tmp_path / f"clip_{sr}_{channels}.wav")
+    sf.write(path, np.stack([y] * channels, axis=1) if channels > 1 else y, sr)
+    return path
+
+
+def _file_segments(path_16k):
+    """Segmentasi lama berbasis file: (offset, durasi, samples) per segmen wav."""
+    step = settings.WINDOW_SECONDS - settings.AUDIO_OVERLAP_SECONDS
+    out = []
+    for i, p in enumerate(split_audio_with_overlap(path_16k)):
+        y, sr = sf.read(p, dtype="float32")
+        assert sr == SR
+        out.append((i * step, len(y) / SR, y))
+    return out
+
+
+def test_in_memory_windows_match_file_segments(tmp_path):
+    path = _wav(tmp_path)
+    old = _file_segments(path)
+    new = segment_windows(load_16k_mono(path), "clip")
+    assert len(new) == len(old) == 6
+    for (off, dur, y), w in zip(old, new):
+        assert w["offset"] == off and w["duration"] == dur and len(w["raw"]) == len(y)
+        np.testing.assert_allclose(w["raw"], y, atol=1 / 2 ** 15)  # wav segmen lama = PCM 16-bit
+    assert new[-1]["duration"] == pytest.approx(23.3 - 5 * 4)
+
+
+def test_stream_windows_match_in_memory_windows(tmp_path):
+    path = _wav(tmp_path)
+    y = load_16k_mono(path)
+    blocks = list(stream_16k_mono(path))
+    assert max(len(b) for b in blocks) == int(0.7 * SR)
+    np.testing.assert_array_equal(np.concatenate(blocks), y)
+    ref = list(iter_windows(y))
+    got = list(iter_stream_windows(iter(blocks)))
+    assert [s for s, _ in got] == [s for s, _ in ref]
+    for (_, a), (_, b) in zip(got, ref):
+        np.testing.assert_array_equal(a, b)
+    items = list(stream_segment_windows(path, "clip"))
+    assert [(w["offset"], w["duration"], len(w["raw"])) for w in items] == \
+        [(w["offset"], w["duration"], len(w["raw"])) for w in segment_windows(y, "clip")]
+
+
+def test_stream_resampled_windows_match_file_segments(tmp_path):
+    pytest.importorskip("soxr")
+    path = _wav(tmp_path, sr=44100, channels=2)
+    out_16k = os.path.join("data", "interim", "clip_16k.wav")
+    resample_to_16k_mono(path, out_16k)
+    old = _file_segments(out_16k)
+    new = list(stream_segment_windows(path, "clip"))
+    assert [w["offset"] for w in new] == [off for off, _, _ in old]
+    # resampler streaming vs librosa: panjang total boleh beda beberapa sample, window penuh identik
+    assert all(len(w["raw"]) == len(y) for w, (_, _, y) in zip(new[:-1], old[:-1]))
+    assert abs(len(new[-1]["raw"]) - len(old[-1][2])) <= 4
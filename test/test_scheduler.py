@@ -0,0 +1,82 @@
+import asyncio, random, threading
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from settings import settings
+from llm import scheduler
+from llm.scheduler import TokenBucket, get_bucket, run_ordered
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+def test_token_bucket_waits_when_empty():
+    bucket = TokenBucket(60)  # 1 token/detik
+    assert bucket.try_acquire(60) == 0.0
+    assert 0.9 < bucket.try_acquire(1) <= 1.0
+
+
+def test_buckets_shared_across_calls_and_threads():
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(get_bucket("rpm", 123))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(b is seen[0] for b in seen)
+    assert get_bucket("tpm", 123) is not seen[0]
+
+
+def test_run_ordered_keeps_order_on_one_loop():
+    loops = set()
+
+    async def echo(payload):
+        loops.add(id(asyncio.get_running_loop()))
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return payload["chunk"].upper()
+
+    chain = RunnableLambda(echo)
+    inputs = [{"chunk": f"c{i}"} for i in range(20)]
+    assert run_ordered(chain, inputs, concurrency=4) == [f"C{i}" for i in range(20)]
+    assert run_ordered(chain, inputs[:3]) == ["C0", "C1", "C2"]
+    assert len(loops) == 1 and id(scheduler.get_loop()) in loops
+
+
+def test_fake_chat_model_across_documents():
+    prompt = ChatPromptTemplate.from_messages([("user", "{text}")])
+    chain = prompt | FakeListChatModel(responses=["bersih"]) | StrOutputParser()
+    for _ in range(2):  # dokumen kedua memakai client/loop yang sama
+        assert run_ordered(chain, [{"text": "a"}, {"text": "b"}]) == ["bersih", "bersih"]
+
+
+def test_retry_retryable_errors_only(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE", 0.001)
+    calls = {}
+
+    async def flaky(payload):
+        key = payload["chunk"]
+        calls[key] = calls.get(key, 0) + 1
+        if key == "bad":
+            raise ValueError("tidak di-retry")
+        if calls[key] == 1:
+            raise _RateLimited("429")
+        return key
+
+    out = run_ordered(RunnableLambda(flaky), [{"chunk": "a"}, {"chunk": "bad"}, {"chunk": "b"}], max_retries=2)
+    assert out[0] == "a" and out[2] == "b"
+    assert isinstance(out[1], ValueError)
+    assert calls == {"a": 2, "bad": 1, "b": 2}
+
+
+def test_retries_exhausted_returns_exception(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE", 0.001)
+
+    async def always_429(payload):
+        raise _RateLimited("429")
+
+    out = run_ordered(RunnableLambda(always_429), [{"chunk": "x"}], max_retries=1)
+    assert isinstance(out[0], _RateLimited)
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from db.sql import TABLES, metadata, persist_document_bulk
+from models.metadata import build_chunk_meta, build_document_meta
+from models.schemas import Language, SourceType
+
+NOW = datetime.now(timezone.utc).isoformat()
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}", future=True)
+    metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+def _rows(texts):
+    doc = build_document_meta(doc_id="doc_1", title="t", language=Language.en, source=SourceType.audio_ingestion,
+                              file="a.wav", created_at_iso=NOW, knowledge_tags=["audio"], lineage={"stt": "x"})
+    chunks = [build_chunk_meta(chunk_id=f"ch_{i}", doc_id="doc_1", language=Language.en,
+                               source=SourceType.audio_ingestion, file="a.wav", created_at_iso=NOW,
+                               token_estimate=len(t.split())).to_row(text=t) for i, t in enumerate(texts)]
+    return doc.to_row(), chunks
+
+
+def _count(engine, name):
+    with engine.connect() as c:
+        return c.execute(select(func.count()).select_from(TABLES[name])).scalar_one()
+
+
+def test_persist_is_idempotent(engine):
+    doc, chunks = _rows(["satu dua", "tiga"])
+    for _ in range(3):
+        persist_document_bulk(engine, TABLES, document=doc, chunks=chunks,
+                              vdb_chunk_ids=[c["chunk_id"] for c in chunks])
+    assert _count(engine, "documents") == 1
+    assert _count(engine, "chunks") == 2
+    assert _count(engine, "vdb_refs") == 2
+
+
+def test_persist_updates_changed_rows(engine):
+    doc, chunks = _rows(["lama", "tetap"])
+    persist_document_bulk(engine, TABLES, document=doc, chunks=chunks)
+    _, chunks2 = _rows(["baru sekali", "tetap"])
+    persist_document_bulk(engine, TABLES, document=doc, chunks=chunks2)
+    with engine.connect() as c:
+        text, tok = c.execute(select(TABLES["chunks"].c.text, TABLES["chunks"].c.token_estimate)
+                              .where(TABLES["chunks"].c.chunk_id == "ch_0")).one()
+    assert (text, tok) == ("baru sekali", 2)
+
+
+def test_duplicate_pk_in_one_batch(engine):
+    doc, chunks = _rows(["a"])
+    persist_document_bulk(engine, TABLES, document=doc, chunks=chunks + [dict(chunks[0], text="b")])
+    assert _count(engine, "chunks") == 1
+
+
+def test_failed_transaction_rolls_back(engine, monkeypatch):
+    import db.sql as sql
+
+    def boom(*a, **k):
+        raise RuntimeError("triples gagal")
+
+    monkeypatch.setattr(sql, "insert_triples_bulk", boom)  # gagal setelah documents/chunks ditulis
+    doc, chunks = _rows(["a"])
+    with pytest.raises(RuntimeError):
+        persist_document_bulk(engine, TABLES, document=doc, chunks=chunks)
+    assert _count(engine, "documents") == 0 and _count(engine, "chunks") == 0
+
+
+def test_stale_chunks_deleted_in_same_transaction(engine):
+    doc, chunks = _rows(["satu", "dua", "tiga"])
+    persist_document_bulk(engine, TABLES, document=doc, chunks=chunks,
+                          vdb_chunk_ids=[c["chunk_id"] for c in chunks])
+    counts = persist_document_bulk(engine, TABLES, document=doc, chunks=chunks[:1],
+                                   vdb_chunk_ids=["ch_0"], stale_chunk_ids=["ch_1", "ch_2"])
+    assert counts["stale_chunks"] == 2
+    assert _count(engine, "chunks") == 1
+    assert _count(engine, "vdb_refs") == 1
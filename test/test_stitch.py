@@ -0,0 +1,54 @@
+from audio.stitch import stitch_segments
+
+
+def _seg(offset, duration, chunks):
+    return {"offset": offset, "duration": duration, "text": " ".join(t for _, _, t in chunks),
+            "chunks": [{"timestamp": (s, e), "text": t} for s, e, t in chunks]}
+
+
+def test_boundary_segment_not_lost():
+    # window A [0, 30), B [28, 58) -> titik potong 29.0
+    a = _seg(0.0, 30.0, [(0.0, 10.0, "alpha beta."), (10.0, 28.5, "gamma delta.")])
+    # chunk B mulai 28.8 (sebelum titik potong) tapi mayoritas setelah akhir A
+    b = _seg(28.0, 30.0, [(0.8, 6.0, "epsilon zeta."), (6.0, 20.0, "eta theta.")])
+    text, sents = stitch_segments([a, b])
+    assert text.split() == ["alpha", "beta.", "gamma", "delta.", "epsilon", "zeta.", "eta", "theta."]
+    assert sents[2]["start"] == 28.8
+
+
+def test_overlap_words_not_duplicated():
+    a = _seg(0.0, 30.0, [(0.0, 20.0, "one two three."), (20.0, 29.6, "four five six")])
+    # B mendengar ulang "five six" di area overlap lalu melanjutkan
+    b = _seg(28.0, 30.0, [(0.2, 4.0, "five six seven eight."), (4.0, 10.0, "nine.")])
+    text, _ = stitch_segments([a, b])
+    assert text.split() == ["one", "two", "three.", "four", "five", "six", "seven", "eight.", "nine."]
+
+
+def test_chunk_mostly_in_right_window_moves_right():
+    a = _seg(0.0, 30.0, [(0.0, 27.0, "left side."), (27.0, 30.0, "shared words here")])
+    b = _seg(26.0, 30.0, [(1.0, 4.0, "shared words here"), (4.0, 8.0, "right side.")])
+    text, sents = stitch_segments([a, b])
+    assert text.split() == ["left", "side.", "shared", "words", "here", "right", "side."]
+    assert sents[1]["start"] == 27.0
+
+
+def test_untimed_fallback_drops_repeated_head():
+    a = {"offset": 0.0, "duration": 30.0, "text": "the quick brown fox jumps"}
+    b = {"offset": 28.0, "duration": 30.0, "text": "fox jumps over the lazy dog"}
+    text, _ = stitch_segments([a, b])
+    assert text.split() == "the quick brown fox jumps over the lazy dog".split()
+
+
+def test_untimed_fallback_tolerates_misheard_overlap_word():
+    # "six" didengar "sicks" oleh window kanan: LCS tetap menyelaraskan area overlap
+    a = {"offset": 0.0, "duration": 30.0, "text": "one two three four five six seven"}
+    b = {"offset": 28.0, "duration": 30.0, "text": "five sicks seven eight nine"}
+    text, _ = stitch_segments([a, b])
+    assert text.split() == "one two three four five six seven eight nine".split()
+
+
+def test_untimed_fallback_ignores_match_far_from_tail_end():
+    a = {"offset": 0.0, "duration": 30.0, "text": "we went to the market early today"}
+    b = {"offset": 28.0, "duration": 30.0, "text": "and we then went home"}
+    text, _ = stitch_segments([a, b])
+    assert text.split() == "we went to the market early today and we then went home".split()
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+pytest.importorskip("transformers")  # audio.stt -> audio.stt_backends
+
+from settings import settings
+from audio import stt
+from audio.stt_backends import STTBackend, register_backend, release_backends
+
+
+class _EchoBackend(STTBackend):
+    """Teks = nilai sampel pertama window; nilai negatif -> error (segmen rusak)."""
+
+    name = "test_echo"
+    calls = []
+
+    def transcribe(self, inputs, language=None):
+        type(self).calls.append(len(inputs))
+        out = []
+        for x in inputs:
+            v = int(x["raw"][0])
+            if v < 0:
+                raise RuntimeError("segmen rusak")
+            out.append({"text": f"w{v}", "chunks": [{"text": f"w{v}", "timestamp": (0.0, 1.0)}]})
+        return out
+
+
+class _FakePool:
+    """Executor sinkron: mencatat batch in-flight (submit belum di-collect); batch `broken` -> BrokenProcessPool."""
+
+    def __init__(self, broken=()):
+        self.broken, self.submitted, self.inflight, self.peak = set(broken), 0, 0, 0
+
+    def submit(self, fn, *args):
+        pool, idx = self, self.submitted
+        self.submitted += 1
+
+        class _Fut(Future):
+            def result(self, timeout=None):
+                pool.inflight -= 1
+                return super().result(timeout)
+
+        fut = _Fut()
+        if idx in self.broken:
+            fut.set_exception(BrokenProcessPool("worker mati"))
+        else:
+            fut.set_result(fn(*args))
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        return fut
+
+
+@pytest.fixture(autouse=True)
+def _echo(monkeypatch):
+    register_backend(_EchoBackend.name, _EchoBackend)
+    monkeypatch.setattr(settings, "STT_BACKEND", _EchoBackend.name)
+    _EchoBackend.calls = []
+    yield
+    release_backends()
+
+
+def _windows(n, bad=()):
+    return [{"file": "a.wav", "offset": i * 28.0, "duration": 30.0,
+             "raw": np.full(160, -1 if i in bad else i, dtype=np.float32)} for i in range(n)]
+
+
+def test_batched_output_equals_per_segment(monkeypatch):
+    wins = _windows(7)
+    single = [stt.stt_one(w) for w in wins]
+    _EchoBackend.calls = []
+    assert stt.stt_batch(wins, batch_size=3) == single
+    assert _EchoBackend.calls == [3, 3, 1]
+    monkeypatch.setattr(settings, "STT_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "STT_PROCESSES", 0)
+    assert stt.transcribe_segments(w for w in wins) == single  # generator -> lazy stt_batch
+
+
+def test_failed_batch_falls_back_per_segment():
+    out = stt.stt_batch(_windows(6, bad={4}), batch_size=3)
+    assert [s["text"] for s in out] == ["w0", "w1", "w2", "w3", "", "w5"]
+    assert "segmen rusak" in out[4]["error"] and out[4]["offset"] == 4 * 28.0
+    assert all("error" not in s for i, s in enumerate(out) if i != 4)
+    assert _EchoBackend.calls == [3, 3, 1, 1, 1]  # batch kedua gagal -> diulang per segmen
+
+
+def test_multiprocess_keeps_order_and_survives_broken_pool(monkeypatch):
+    pool = _FakePool(broken={1})
+    monkeypatch.setattr(stt, "_get_pool", lambda: pool)
+    monkeypatch.setattr(settings, "STT_PROCESSES", 2)
+    monkeypatch.setattr(settings, "STT_BATCH_SIZE", 2)
+    stats = {}
+    out = stt.transcribe_segments((w for w in _windows(9)), stats=stats)
+    assert [s["offset"] for s in out] == [i * 28.0 for i in range(9)]
+    assert [s["text"] for s in out] == ["w0", "w1", "", "", "w4", "w5", "w6", "w7", "w8"]
+    assert all("worker mati" in out[i]["error"] for i in (2, 3))
+    assert pool.submitted == 5 and pool.peak <= 2 * settings.STT_PROCESSES
+    assert sum(st["segments"] for st in stats.values()) == 7
@@ -0,0 +1,22 @@
+import numpy as np
+
+from settings import settings
+import telemetry
+
+
+def test_span_reports_own_rss_growth(monkeypatch):
+    monkeypatch.setattr(settings, "TELEMETRY_ENABLED", True)
+    monkeypatch.setattr(settings, "TELEMETRY_PATH", "")
+    telemetry.reset()
+    with telemetry.span("alloc"):
+        buf = np.ones(64 * 1024 * 1024 // 8)  # ~64 MB, disentuh semua
+    del buf
+    with telemetry.span("idle"):
+        pass
+    rows = {r["name"]: r for r in telemetry.summarize(telemetry.load_records())}
+    assert rows["alloc"]["rss_delta_mb"] > 40
+    # span berikutnya tidak mewarisi puncak span sebelumnya (beda dengan ru_maxrss)
+    assert abs(rows["idle"]["rss_delta_mb"]) < 5
+    assert rows["idle"]["proc_rss_peak_mb"] >= rows["alloc"]["rss_mb"] - 1  # sumber beda (ru_maxrss vs psutil), pembulatan
+    assert "d_rss_mb" in telemetry.format_summary(telemetry.load_records())
+    telemetry.reset()
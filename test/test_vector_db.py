@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from settings import settings
+from db import qdrant_store
+from db.qdrant_store import close_qdrant, delete_chunks, get_client, point_id, upsert_documents
+
+DIM = 4
+
+
+@pytest.fixture(autouse=True)
+def _memory_qdrant(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_URL", ":memory:")
+    monkeypatch.setattr(settings, "EMBED_DIM", DIM)
+    monkeypatch.setattr(settings, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "QDRANT_UPSERT_BATCH", 2)
+    close_qdrant()
+    yield
+    close_qdrant()
+
+
+def _docs(n, text="teks"):
+    return [Document(page_content=f"{text} {i}", metadata={"chunk_id": f"ch_doc_{i:03d}", "doc_id": "doc"})
+            for i in range(n)]
+
+
+def _vecs(n):
+    return np.repeat(np.arange(1, n + 1, dtype=np.float32)[:, None], DIM, axis=1)
+
+
+def _count():
+    return get_client().count(settings.QDRANT_COLLECTION, exact=True).count
+
+
+def test_point_id_deterministic():
+    assert point_id("ch_doc_001") == point_id("ch_doc_001")
+    assert point_id("ch_doc_001") != point_id("ch_doc_002")
+
+
+def test_reingest_overwrites_points():
+    assert upsert_documents(_docs(5), vectors=_vecs(5)) == [f"ch_doc_{i:03d}" for i in range(5)]
+    upsert_documents(_docs(5, text="baru"), vectors=_vecs(5))
+    assert _count() == 5
+    pts = get_client().retrieve(settings.QDRANT_COLLECTION, [point_id("ch_doc_002")], with_payload=True)
+    assert pts[0].payload["page_content"] == "baru 2"
+
+
+def test_last_batch_waits(monkeypatch):
+    waits = []
+    real = qdrant_store._upsert_batch
+    monkeypatch.setattr(settings, "QDRANT_UPSERT_WAIT", False)
+    monkeypatch.setattr(qdrant_store, "_upsert_batch",
+                        lambda pts, wait=None: waits.append(wait) or real(pts, wait=wait))
+    upsert_documents(_docs(5), vectors=_vecs(5))
+    assert waits[-1] is True and all(w is None for w in waits[:-1])
+
+
+def test_failed_batch_not_reported(monkeypatch):
+    real = qdrant_store._upsert_batch
+    monkeypatch.setattr(qdrant_store, "_upsert_batch",
+                        lambda pts, wait=None: False if len(pts) == 1 else real(pts, wait=wait))
+    assert upsert_documents(_docs(5), vectors=_vecs(5)) == [f"ch_doc_{i:03d}" for i in range(4)]
+
+
+def test_delete_chunks():
+    upsert_documents(_docs(3), vectors=_vecs(3))
+    delete_chunks(["ch_doc_000", "ch_doc_002"])
+    assert _count() == 1